@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+AGREGACIÓN EN EL BORDE: VENTANAS HOUR / DAY COMO queryTelemetry
+=============================================================================
+queryTelemetry.js calcula en BigQuery, en cada consulta:
+
+    TIMESTAMP_TRUNC(timestamp, HOUR|DAY) AS bucket, machine_id,
+    AVG / MAX / MIN (value) y COUNT(*)
+
+Este módulo calcula lo mismo a medida que llegan las muestras, con ventanas
+fijas (tumbling) por máquina y dataKey, y publica cada ventana cerrada en
+un topic compañero para que el backend ingiera filas ya agregadas:
+
+    cocacola-0001/linea1/embotelladora/telemetria/rollup/hour
+    {"granularity":"HOUR","bucket":"2026-02-21 06:00:00 UTC",
+     "tenant_id":"cocacola-0001","location_id":"linea1","machine_id":"embotelladora",
+     "topic":"cocacola-0001/linea1/embotelladora/telemetria","complete":true,
+     "rows":[{"data_key":"corriente","avg_value":61.2,"max_value":75.1,
+              "min_value":0.0,"sample_count":1800}, ...]}
+
+- ✅ O(1) por muestra: suma / min / max / conteo por dataKey; la ventana se
+       cierra cuando llega la primera muestra del bucket siguiente
+- ✅ Buckets alineados en UTC (como TIMESTAMP_TRUNC); nombres de columna
+       iguales a las de la consulta (avg_value, max_value, ...)
+- ✅ tenant_id / location_id / machine_id derivados del topic como en
+       backfill_telemetria.py
+- ✅ Muestras atrasadas (de un bucket ya cerrado) se cuentan y descartan
+- ✅ Lo usan runtime_async.py (--rollup) y el proceso gateway
+       (gateway_agregacion.py)
+
+=============================================================================
+"""
+
+import json
+from datetime import datetime, timezone
+
+from binario import decodificar, es_binario
+from estadisticas import numericos
+from lotes import desempaquetar, es_lote
+
+GRANULARIDADES = {"HOUR": 3600, "DAY": 86400}
+SUFIJO_ROLLUP = "/rollup/"
+
+# Topics de 3 niveles cuya máquina no sale del topic (como en backfill_telemetria.py)
+MAQUINAS_POR_TOPIC = {"santa_isabel/telemetria": "bomba"}
+
+
+def topic_rollup(topic, granularidad):
+    return f"{topic}{SUFIJO_ROLLUP}{granularidad.lower()}"
+
+
+def es_rollup(topic):
+    return SUFIJO_ROLLUP in topic
+
+
+def identidad_topic(topic):
+    """(tenant_id, location_id, machine_id) de un topic de telemetría"""
+    niveles = topic.split("/")
+    if len(niveles) < 3:
+        return niveles[0], "", niveles[-1]
+    maquina = MAQUINAS_POR_TOPIC.get("/".join(niveles[1:]))
+    if maquina is None:
+        maquina = niveles[-2] if len(niveles) >= 4 else niveles[1]
+    return niveles[0], niveles[1], maquina
+
+
+def registros_payload(topic, payload):
+    """[(topic del dispositivo, dict)] de un payload JSON, binario o lote de planta"""
+    if es_lote(topic):
+        return desempaquetar(topic, payload)
+    if es_binario(payload):
+        return [(topic, decodificar(payload, "epoch"))]
+    return [(topic, json.loads(payload))]
+
+
+def _epoch_por_tick():
+    """Timestamp del payload → epoch (cachea el último ISO: un tick lo comparte)"""
+    ultimo = (None, 0.0)
+
+    def epoch(valor):
+        nonlocal ultimo
+        if isinstance(valor, (int, float)):
+            return valor / 1000 if valor > 1e11 else float(valor)
+        visto = ultimo  # una lectura: otro consumidor puede reemplazarlo en el medio
+        if visto[0] != valor:
+            visto = ultimo = (valor, datetime.fromisoformat(valor).timestamp())  # asignación atómica
+        return visto[1]
+    return epoch
+
+
+epoch_payload = _epoch_por_tick()
+
+
+def bucket_texto(inicio):
+    """Inicio de bucket como TIMESTAMP de BigQuery (UTC)"""
+    return datetime.fromtimestamp(inicio, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# VENTANA POR MÁQUINA
+# ═══════════════════════════════════════════════════════════════════════════
+class VentanaMaquina:
+    """Bucket abierto de un topic: [conteo, suma, min, max] por dataKey"""
+    __slots__ = ("inicio", "campos")
+
+    def __init__(self, inicio):
+        self.inicio = inicio
+        self.campos = {}
+
+    def agregar(self, clave, valor):
+        acumulado = self.campos.get(clave)
+        if acumulado is None:
+            self.campos[clave] = [1, valor, valor, valor]
+            return
+        acumulado[0] += 1
+        acumulado[1] += valor
+        if valor < acumulado[2]:
+            acumulado[2] = valor
+        if valor > acumulado[3]:
+            acumulado[3] = valor
+
+    def filas(self, decimales=3):
+        return [{"data_key": clave,
+                 "avg_value": round(suma / n, decimales),
+                 "max_value": round(maximo, decimales),
+                 "min_value": round(minimo, decimales),
+                 "sample_count": n}
+                for clave, (n, suma, minimo, maximo) in self.campos.items()]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# AGREGADOR
+# ═══════════════════════════════════════════════════════════════════════════
+class AgregadorVentanas:
+    """Ventanas tumbling por (topic, granularidad); publicar(topic, payload) al cerrar"""
+
+    def __init__(self, publicar, granularidades=("HOUR",)):
+        for g in granularidades:
+            if g not in GRANULARIDADES:
+                raise ValueError(f"granularidad inválida: {g} (HOUR o DAY)")
+        self.publicar = publicar
+        self.granularidades = [(g, GRANULARIDADES[g]) for g in granularidades]
+        self.ventanas = {}  # (topic, granularidad) → VentanaMaquina
+        self.muestras = 0
+        self.atrasadas = 0
+        self.rollups = 0
+
+    def registrar(self, topic, pares, t):
+        """Agrega las muestras (dataKey, valor) de un topic en el instante t (epoch)"""
+        for granularidad, segundos in self.granularidades:
+            inicio = t - t % segundos
+            clave = (topic, granularidad)
+            ventana = self.ventanas.get(clave)
+            if ventana is None:
+                ventana = self.ventanas[clave] = VentanaMaquina(inicio)
+            elif inicio != ventana.inicio:
+                if inicio < ventana.inicio:
+                    self.atrasadas += 1
+                    continue
+                self._emitir(topic, granularidad, ventana, completa=True)
+                ventana = self.ventanas[clave] = VentanaMaquina(inicio)
+            for data_key, valor in pares:
+                ventana.agregar(data_key, valor)
+        self.muestras += 1
+
+    def registrar_json(self, topic, data, t):
+        """Como registrar(), con un payload ya parseado (claves anidadas con '.')"""
+        self.registrar(topic, list(numericos(data)), t)
+
+    def vaciar(self):
+        """Publica las ventanas abiertas como parciales (al detener el proceso)"""
+        for (topic, granularidad), ventana in self.ventanas.items():
+            if ventana.campos:
+                self._emitir(topic, granularidad, ventana, completa=False)
+        self.ventanas.clear()
+
+    def _emitir(self, topic, granularidad, ventana, completa):
+        tenant, location, machine = identidad_topic(topic)
+        payload = {
+            "granularity": granularidad,
+            "bucket": bucket_texto(ventana.inicio),
+            "tenant_id": tenant,
+            "location_id": location,
+            "machine_id": machine,
+            "topic": topic,
+            "complete": completa,
+            "rows": ventana.filas(),
+        }
+        self.publicar(topic_rollup(topic, granularidad), json.dumps(payload, separators=(",", ":")))
+        self.rollups += 1
+
+    def resumen(self):
+        return (f"rollups: {self.rollups:,} publicados | {self.muestras:,} muestras"
+                f" | {len(self.ventanas):,} ventanas abiertas | {self.atrasadas:,} atrasadas")
+
+
+def argumentos_rollup(parser):
+    parser.add_argument("--rollup", nargs="+", choices=sorted(GRANULARIDADES), metavar="GRANULARIDAD",
+                        help="publicar rollups min/max/avg/count por ventana (HOUR y/o DAY)"
+                             " en <topic>/rollup/<granularidad>")
+    return parser
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+TOPOLOGÍA DE ALIMENTADORES: TOTALES Y PROTECCIONES EN LOTE
+=============================================================================
+Cada reconectador alimenta un conjunto de motores de una FlotaMotores. En
+vez de que cada ReconectadorState sume `corriente_actual` motor por motor
+y arme la lista de tensiones en cada tick, la topología guarda todos los
+reconectadores como struct-of-arrays (igual que flota.py):
+
+- ✅ Totales por alimentador recalculados en cada tick con un solo
+       bincount vectorizado sobre la corriente de todos los motores
+       conectados (O(motores) en NumPy, sin loop de Python)
+- ✅ Tensiones L1/L2/L3 de todos los reconectadores cerrados en un array
+       (n, 3) y las 4 protecciones evaluadas en una pasada vectorizada:
+       sobrecorriente, sobretensión, bajatensión, desequilibrio
+- ✅ Disparo automático en lote (misma lógica que ReconectadorState)
+- ✅ VistaReconectador: fila de la topología con la interfaz de
+       ReconectadorState (la usan los codificadores sin cambios)
+
+Pensado para alimentadores con cientos de motores repartidos en varios
+reconectadores (perfiles Noja, runtime con muchas plantas).
+
+Totales: no se llevan sumas incrementales por motor (árbol de agregación)
+porque FlotaMotores.paso cambia la corriente de TODOS los motores en cada
+tick: actualizar un acumulado por cada cambio costaría O(motores) en
+Python, y el bincount hace lo mismo en una sola pasada de NumPy.
+
+USO:
+    alimentadores = TopologiaAlimentadores(flota)
+    reco = VistaReconectador(alimentadores, [m.indice for m in motores.values()])
+    flota.paso()
+    alimentadores.reportar_disparos(alimentadores.paso())
+
+    python alimentadores.py 200 500     # 200 reconectadores x 500 motores: benchmark
+
+=============================================================================
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from flota import FlotaMotores
+
+PROTECCIONES = ("sobrecorriente", "sobretension", "bajatension", "desequilibrio")
+
+# Umbrales de ReconectadorState
+LIMITE_CORRIENTE = 350.0   # A, sobrecorriente
+TENSION_MAXIMA = 240.0     # V, sobretensión
+TENSION_MINIMA = 200.0     # V, bajatensión
+DESEQUILIBRIO_MAXIMO = 5.0  # V, desvío máximo de una fase contra el promedio
+
+
+# Columnas por reconectador: nombre → (dtype, valor inicial)
+COLUMNAS = {
+    "cerrado": (np.bool_, True),
+    "v_l1": (np.float64, 220.0),
+    "v_l2": (np.float64, 220.0),
+    "v_l3": (np.float64, 220.0),
+    "frecuencia": (np.float64, 50.0),
+    "corriente_total": (np.float64, 0.0),
+    "limite_corriente": (np.float64, LIMITE_CORRIENTE),
+    "sobrecorriente": (np.bool_, False),
+    "sobretension": (np.bool_, False),
+    "bajatension": (np.bool_, False),
+    "desequilibrio": (np.bool_, False),
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TOPOLOGÍA (STRUCT-OF-ARRAYS)
+# ═══════════════════════════════════════════════════════════════════════════
+class TopologiaAlimentadores:
+    """Reconectadores de una flota; un paso actualiza totales y protecciones de todos"""
+
+    def __init__(self, flota, capacidad=4, seed=None):
+        self.flota = flota
+        self.n = 0
+        self.capacidad = max(1, capacidad)
+        self.rng = np.random.default_rng(seed)
+        for nombre, (dtype, inicial) in COLUMNAS.items():
+            setattr(self, nombre, np.full(self.capacidad, inicial, dtype=dtype))
+        self.acumulado = np.zeros(self.capacidad)  # Σ corriente de los motores de cada alimentador
+        # Motores conectados y su alimentador
+        self._motores = np.empty(0, dtype=np.int64)
+        self._destino = np.empty(0, dtype=np.int64)
+        self.disparos = 0
+
+    def _crecer(self, minimo):
+        capacidad = self.capacidad
+        while capacidad < minimo:
+            capacidad *= 2
+        for nombre, (dtype, inicial) in list(COLUMNAS.items()) + [("acumulado", (np.float64, 0.0))]:
+            nuevo = np.full(capacidad, inicial, dtype=dtype)
+            nuevo[:self.n] = getattr(self, nombre)[:self.n]
+            setattr(self, nombre, nuevo)
+        self.capacidad = capacidad
+
+    def agregar(self, motores, limite_corriente=LIMITE_CORRIENTE):
+        """Reconectador que alimenta los índices `motores` de la flota. Retorna su índice"""
+        if self.n + 1 > self.capacidad:
+            self._crecer(self.n + 1)
+        indice = self.n
+        self.n += 1
+        motores = np.asarray(motores, dtype=np.int64).ravel()
+        self.limite_corriente[indice] = limite_corriente
+        self._motores = np.concatenate([self._motores, motores])
+        self._destino = np.concatenate([self._destino, np.full(len(motores), indice)])
+        self.acumulado[indice] = self.flota.corriente[motores].sum()
+        return indice
+
+    def motores_de(self, indice):
+        return self._motores[self._destino == indice]
+
+    # ───────────────────────────────────────────────────────────────────────
+    # ENTRADAS DIGITALES (índice escalar, lista o máscara)
+    # ───────────────────────────────────────────────────────────────────────
+    def cerrar(self, indices):
+        self.cerrado[indices] = True
+
+    def abrir(self, indices):
+        self.cerrado[indices] = False
+
+    # ───────────────────────────────────────────────────────────────────────
+    # PASO
+    # ───────────────────────────────────────────────────────────────────────
+    def _totales(self):
+        self.acumulado[:self.n] = np.bincount(self._destino, self.flota.corriente[self._motores],
+                                              minlength=self.n)
+
+    def paso(self):
+        """Totales + tensiones + protecciones de todos los reconectadores. Retorna los disparados"""
+        n = self.n
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        self._totales()
+        rng = self.rng
+        cerrado = self.cerrado[:n]
+
+        # Abiertos: sin tensión ni corriente (las protecciones quedan como estaban)
+        abiertos = ~cerrado
+        for columna in ("v_l1", "v_l2", "v_l3", "corriente_total"):
+            getattr(self, columna)[:n][abiertos] = 0.0
+
+        idx = np.flatnonzero(cerrado)
+        if len(idx) == 0:
+            return idx
+        m = len(idx)
+        # Tensión nominal con variaciones pequeñas, por fase
+        tension = 220.0 + rng.uniform(-2, 2, (m, 1)) + rng.uniform(-1, 1, (m, 3))
+        self.v_l1[idx], self.v_l2[idx], self.v_l3[idx] = tension.T
+        self.frecuencia[idx] = 50.0 + rng.uniform(-0.1, 0.1, m)
+        total = self.acumulado[idx]
+        self.corriente_total[idx] = total
+
+        sobrecorriente = total > self.limite_corriente[idx]
+        sobretension = tension.max(axis=1) > TENSION_MAXIMA
+        bajatension = tension.min(axis=1) < TENSION_MINIMA
+        desequilibrio = np.abs(tension - tension.mean(axis=1, keepdims=True)).max(axis=1) > DESEQUILIBRIO_MAXIMO
+        self.sobrecorriente[idx] = sobrecorriente
+        self.sobretension[idx] = sobretension
+        self.bajatension[idx] = bajatension
+        self.desequilibrio[idx] = desequilibrio
+
+        # Trip automático si hay protección activa
+        disparados = idx[sobrecorriente | sobretension | bajatension | desequilibrio]
+        self.cerrado[disparados] = False
+        self.disparos += len(disparados)
+        return disparados
+
+    def protecciones(self, indice):
+        return {p: bool(getattr(self, p)[indice]) for p in PROTECCIONES}
+
+    def reportar_disparos(self, disparados):
+        for i in disparados:
+            print(f"   ⚠️  [RECONECTADOR] PROTECCIÓN ACTIVADA: {self.protecciones(i)}")
+            print("   🔴 [RECONECTADOR] TRIP")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# VISTA POR OBJETO
+# ═══════════════════════════════════════════════════════════════════════════
+class _Columna:
+    """Expone una columna de la topología como atributo escalar de la vista"""
+
+    def __init__(self, columna, convertir=float):
+        self.columna = columna
+        self.convertir = convertir
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.convertir(getattr(obj._topologia, self.columna)[obj.indice])
+
+    def __set__(self, obj, valor):
+        getattr(obj._topologia, self.columna)[obj.indice] = valor
+
+
+class _Protecciones:
+    """protecciones["sobrecorriente"] etc. leídos de la topología (como el dict original)"""
+    __slots__ = ("_topologia", "_indice")
+
+    def __init__(self, topologia, indice):
+        self._topologia = topologia
+        self._indice = indice
+
+    def __getitem__(self, clave):
+        if clave not in PROTECCIONES:
+            raise KeyError(clave)
+        return bool(getattr(self._topologia, clave)[self._indice])
+
+    def keys(self):
+        return PROTECCIONES
+
+    def values(self):
+        return [self[p] for p in PROTECCIONES]
+
+    def items(self):
+        return [(p, self[p]) for p in PROTECCIONES]
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class VistaReconectador:
+    """Fila de la topología con la interfaz de ReconectadorState"""
+    cerrado = _Columna("cerrado", bool)
+    v_l1 = _Columna("v_l1")
+    v_l2 = _Columna("v_l2")
+    v_l3 = _Columna("v_l3")
+    frecuencia = _Columna("frecuencia")
+    corriente_total = _Columna("corriente_total")
+
+    def __init__(self, topologia, motores, limite_corriente=LIMITE_CORRIENTE):
+        self._topologia = topologia
+        self.indice = topologia.agregar(motores, limite_corriente)
+        self.protecciones = _Protecciones(topologia, self.indice)
+
+    @property
+    def reloj(self):
+        """Reloj de la flota (real o RelojVirtual), como VistaMotor"""
+        return self._topologia.flota.reloj
+
+    def actualizar(self):
+        """Paso de toda la topología (un simulador de una planta; con muchas, paso() una vez)"""
+        self._topologia.reportar_disparos(self._topologia.paso())
+
+    def cerrar(self):
+        self._topologia.cerrar(self.indice)
+        print("   🟢 [RECONECTADOR] CLOSE")
+
+    def abrir(self):
+        self._topologia.abrir(self.indice)
+        print("   🔴 [RECONECTADOR] TRIP")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BENCHMARK: suma por objeto (ReconectadorState) vs topología vectorizada
+# ═══════════════════════════════════════════════════════════════════════════
+def _paso_por_objeto(vistas_motores):
+    """El loop original: sum() sobre las vistas y lista de tensiones por reconectador"""
+    for motores in vistas_motores:
+        total = sum(m.corriente_actual for m in motores)
+        base_v = 220.0 + random.uniform(-2, 2)
+        voltajes = [base_v + random.uniform(-1, 1) for _ in range(3)]
+        promedio = sum(voltajes) / 3
+        _ = (total > 350, max(voltajes) > 240, min(voltajes) < 200,
+             max(abs(v - promedio) for v in voltajes) > 5)
+
+
+if __name__ == "__main__":
+    from flota import VistaMotor
+
+    recos = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    por_reco = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    flota = FlotaMotores(capacidad=recos * por_reco, seed=1)
+    topologia = TopologiaAlimentadores(flota, capacidad=recos, seed=1)
+    vistas = []
+    for r in range(recos):
+        motores = [VistaMotor(flota, f"M{r}-{i}", 1.0, 2.0) for i in range(por_reco)]
+        vistas.append(motores)
+        topologia.agregar([m.indice for m in motores], limite_corriente=por_reco * 2.0)
+    flota.arrancar(slice(0, flota.n), ahora=time.time() - 10)
+
+    pasos = 20
+    t0 = time.perf_counter()
+    for _ in range(pasos):
+        flota.paso()
+    t_flota = (time.perf_counter() - t0) / pasos
+    t0 = time.perf_counter()
+    for _ in range(max(1, pasos // 10)):
+        _paso_por_objeto(vistas)
+    t_objeto = (time.perf_counter() - t0) / max(1, pasos // 10)
+    t0 = time.perf_counter()
+    for _ in range(pasos):
+        flota.paso()
+        topologia.paso()
+    t_topologia = (time.perf_counter() - t0) / pasos - t_flota
+
+    print(f"⚡ {recos:,} reconectadores x {por_reco:,} motores ({flota.n:,} motores)")
+    print(f"   por objeto:  {t_objeto * 1000:9.2f} ms/tick")
+    print(f"   topología:   {t_topologia * 1000:9.2f} ms/tick  ({t_objeto / t_topologia:,.0f}x)"
+          f" | física de la flota {t_flota * 1000:.2f} ms")
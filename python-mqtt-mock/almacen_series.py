@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+ALMACÉN COLUMNAR LOCAL DE SERIES (queryTelemetry / getChartHistory SIN BIGQUERY)
+=============================================================================
+Responde offline las mismas preguntas que las Cloud Functions, sobre lo que
+grabó `monitor_mqtt.py --grabar` (o puntos cargados en columnas):
+
+    consultar()  → timeSeries por bucket HOUR/DAY y máquina + summary por
+                   máquina (avg / max / min / samples), como queryTelemetry
+    historial()  → (timestamp, value) de un topic/dataKey, como getChartHistory
+
+- ✅ Una serie append-only por (topic, dataKey): chunks NumPy sellados de
+       TAMANO_CHUNK puntos (t, v) + un buffer abierto (array('d'))
+- ✅ Cada chunk guarda t_min / t_max / n / suma / min / max: los chunks
+       fuera del rango se saltean y los que caen enteros dentro resuelven
+       el summary sin tocar los datos
+- ✅ Buckets vectorizados: floor_divide + reduceat por chunk (cacheado en
+       los chunks sellados) y merge de los parciales por bucket
+- ✅ Persistencia append-only: un .npy por chunk + catalogo.json con las
+       estadísticas; al abrir se mapean con mmap (decenas de millones de
+       puntos sin cargarlos a memoria)
+- ✅ Ingesta de JSON, binario y lotes de planta, con el timestamp del
+       payload (agregacion.py); machine_id como los rollups y el backfill
+
+USO:
+    python almacen_series.py capturas/ --data-key corriente --tenant cocacola-0001 --granularidad HOUR
+    python almacen_series.py capturas/ --guardar almacen/          # ingesta → disco
+    python almacen_series.py --almacen almacen/ --data-key voltaje_L1 --desde 2026-02-01 --hasta 2026-02-08
+    python almacen_series.py --sintetico 20000000 --data-key corriente   # escala / benchmark
+
+    almacen = AlmacenSeries()
+    almacen.ingerir_directorio("capturas/")
+    almacen.consultar("cocacola-0001", "corriente", granularidad="HOUR")
+
+=============================================================================
+"""
+
+import argparse
+import json
+import os
+import time
+from array import array
+from datetime import datetime
+
+import numpy as np
+
+from agregacion import (GRANULARIDADES, bucket_texto, epoch_payload, es_rollup,
+                        identidad_topic, registros_payload)
+from estadisticas import numericos
+from grabador import leer_directorio
+
+TAMANO_CHUNK = 1 << 16
+DTYPE_PUNTO = np.dtype([("t", "<f8"), ("v", "<f8")])
+VERSION_CATALOGO = 1
+MAX_FILAS_HISTORIAL = 100_000  # MAX_ROWS de getChartHistory
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REDUCCIONES VECTORIZADAS
+# ═══════════════════════════════════════════════════════════════════════════
+def reducir_buckets(t, v, segundos):
+    """(inicios, n, suma, min, max) por bucket de `segundos` (alineado a epoch/UTC)"""
+    buckets = np.floor_divide(t, segundos).astype(np.int64)
+    if len(buckets) > 1 and (buckets[1:] < buckets[:-1]).any():
+        orden = np.argsort(buckets, kind="stable")
+        buckets, v = buckets[orden], v[orden]
+    inicios = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    return (buckets[inicios] * segundos,
+            np.diff(inicios, append=len(buckets)),
+            np.add.reduceat(v, inicios),
+            np.minimum.reduceat(v, inicios),
+            np.maximum.reduceat(v, inicios))
+
+
+def combinar_parciales(parciales):
+    """Une parciales (inicios, n, suma, min, max) de varios chunks / series por bucket"""
+    parciales = [p for p in parciales if len(p[0])]
+    if not parciales:
+        vacio = np.empty(0)
+        return vacio, np.empty(0, dtype=np.int64), vacio, vacio, vacio
+    if len(parciales) == 1:
+        return parciales[0]
+    inicios, n, suma, minimo, maximo = (np.concatenate(c) for c in zip(*parciales))
+    orden = np.argsort(inicios, kind="stable")
+    inicios = inicios[orden]
+    cortes = np.flatnonzero(np.diff(inicios, prepend=inicios[0] - 1))
+    return (inicios[cortes],
+            np.add.reduceat(n[orden], cortes),
+            np.add.reduceat(suma[orden], cortes),
+            np.minimum.reduceat(minimo[orden], cortes),
+            np.maximum.reduceat(maximo[orden], cortes))
+
+
+def _r3(valor):
+    return round(float(valor), 3)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CHUNK / SERIE
+# ═══════════════════════════════════════════════════════════════════════════
+class Chunk:
+    """Bloque inmutable de puntos (t, v) con sus estadísticas"""
+    __slots__ = ("datos", "n", "t_min", "t_max", "suma", "minimo", "maximo", "ordenado",
+                 "guardado", "_buckets")
+
+    def __init__(self, datos, estadisticas=None, guardado=False):
+        self.datos = datos
+        if estadisticas is None:
+            t, v = datos["t"], datos["v"]
+            estadisticas = (len(datos), float(t.min()), float(t.max()), float(v.sum()),
+                            float(v.min()), float(v.max()), bool((t[1:] >= t[:-1]).all()))
+        (self.n, self.t_min, self.t_max, self.suma, self.minimo, self.maximo,
+         self.ordenado) = estadisticas
+        self.guardado = guardado
+        self._buckets = {}  # segundos → parcial (los chunks sellados no cambian)
+
+    def estadisticas(self):
+        return [self.n, self.t_min, self.t_max, self.suma, self.minimo, self.maximo, self.ordenado]
+
+    def contenido(self, desde, hasta):
+        return desde <= self.t_min and self.t_max <= hasta
+
+    def rango(self, desde, hasta):
+        """(t, v) de los puntos con desde <= t <= hasta"""
+        t, v = self.datos["t"], self.datos["v"]
+        if self.contenido(desde, hasta):
+            return t, v
+        if self.ordenado:
+            i, j = np.searchsorted(t, desde, "left"), np.searchsorted(t, hasta, "right")
+            return t[i:j], v[i:j]
+        mascara = (t >= desde) & (t <= hasta)
+        return t[mascara], v[mascara]
+
+    def parcial(self, desde, hasta, segundos):
+        if self.contenido(desde, hasta):
+            parcial = self._buckets.get(segundos)
+            if parcial is None:
+                parcial = self._buckets[segundos] = reducir_buckets(
+                    np.asarray(self.datos["t"]), np.asarray(self.datos["v"]), segundos)
+            return parcial
+        t, v = self.rango(desde, hasta)
+        return reducir_buckets(t, v, segundos) if len(t) else None
+
+
+class Serie:
+    """Puntos append-only de un (topic, dataKey): chunks sellados + buffer abierto"""
+
+    def __init__(self, topic, data_key):
+        self.topic = topic
+        self.data_key = data_key
+        self.tenant_id, self.location_id, self.machine_id = identidad_topic(topic)
+        self.chunks = []
+        self._t = array("d")
+        self._v = array("d")
+
+    def __len__(self):
+        return sum(c.n for c in self.chunks) + len(self._t)
+
+    def agregar(self, t, v):
+        self._t.append(t)
+        self._v.append(v)
+        if len(self._t) >= TAMANO_CHUNK:
+            self.sellar()
+
+    def agregar_columnas(self, t, v):
+        """Carga vectorizada: los puntos van directo a chunks sellados"""
+        self.sellar()
+        t = np.asarray(t, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        for i in range(0, len(t), TAMANO_CHUNK):
+            datos = np.empty(len(t[i:i + TAMANO_CHUNK]), dtype=DTYPE_PUNTO)
+            datos["t"] = t[i:i + TAMANO_CHUNK]
+            datos["v"] = v[i:i + TAMANO_CHUNK]
+            self.chunks.append(Chunk(datos))
+
+    def sellar(self):
+        """Buffer abierto → chunk inmutable"""
+        if not self._t:
+            return
+        self.chunks.append(Chunk(self._abierto()))
+        self._t = array("d")
+        self._v = array("d")
+
+    def _abierto(self):
+        datos = np.empty(len(self._t), dtype=DTYPE_PUNTO)
+        datos["t"] = np.frombuffer(self._t, dtype=np.float64)
+        datos["v"] = np.frombuffer(self._v, dtype=np.float64)
+        return datos
+
+    def bloques(self, desde, hasta):
+        """Chunks que se solapan con [desde, hasta], incluido el buffer abierto"""
+        bloques = [c for c in self.chunks if c.t_max >= desde and c.t_min <= hasta]
+        if self._t:
+            abierto = Chunk(self._abierto())
+            if abierto.t_max >= desde and abierto.t_min <= hasta:
+                bloques.append(abierto)
+        return bloques
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ALMACÉN
+# ═══════════════════════════════════════════════════════════════════════════
+class AlmacenSeries:
+    """Series por (topic, dataKey) con consultas estilo queryTelemetry / getChartHistory"""
+
+    def __init__(self):
+        self.series = {}  # (topic, data_key) → Serie
+        self.mensajes = 0
+        self.invalidos = 0
+
+    def serie(self, topic, data_key):
+        serie = self.series.get((topic, data_key))
+        if serie is None:
+            serie = self.series[(topic, data_key)] = Serie(topic, data_key)
+        return serie
+
+    def agregar(self, topic, data_key, t, valor):
+        self.serie(topic, data_key).agregar(t, valor)
+
+    def agregar_columnas(self, topic, data_key, t, valores):
+        self.serie(topic, data_key).agregar_columnas(t, valores)
+
+    def registrar_json(self, topic, data, t):
+        """Campos numéricos de un payload ya parseado (claves anidadas con '.')"""
+        series = self.series
+        for data_key, valor in numericos(data):
+            serie = series.get((topic, data_key))
+            if serie is None:
+                serie = self.serie(topic, data_key)
+            serie.agregar(t, valor)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Ingesta de capturas
+    # ───────────────────────────────────────────────────────────────────────
+    def ingerir_directorio(self, directorio, desde=None, hasta=None, tiempo="payload"):
+        """Carga los segmentos de `grabador.py`; tiempo = timestamp del payload o de recepción"""
+        mensajes = 0
+        for t_rx, topic, payload in leer_directorio(directorio, desde, hasta):
+            topic = topic.decode()
+            if es_rollup(topic):
+                continue
+            try:
+                registros = registros_payload(topic, bytes(payload))
+            except (ValueError, KeyError, IndexError):
+                self.invalidos += 1
+                continue
+            for topic_dispositivo, data in registros:
+                if not isinstance(data, dict):
+                    self.invalidos += 1
+                    continue
+                t = t_rx
+                if tiempo == "payload" and "timestamp" in data:
+                    try:
+                        t = epoch_payload(data["timestamp"])
+                    except (TypeError, ValueError):
+                        pass
+                self.registrar_json(topic_dispositivo, data, t)
+            mensajes += 1
+        self.mensajes += mensajes
+        return mensajes
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Consultas
+    # ───────────────────────────────────────────────────────────────────────
+    def _seleccionar(self, data_key, tenant_id=None, location_id=None, machine_id=None, topic=None):
+        return [s for s in self.series.values()
+                if s.data_key == data_key
+                and (tenant_id is None or s.tenant_id == tenant_id)
+                and (location_id is None or s.location_id == location_id)
+                and (machine_id in (None, "all") or s.machine_id == machine_id)
+                and (topic is None or s.topic == topic)]
+
+    def consultar(self, tenant_id, data_key, desde=None, hasta=None, granularidad="DAY",
+                  location_id=None, machine_id=None):
+        """Como queryTelemetry: buckets por máquina + resumen por máquina (avg desc)"""
+        segundos = GRANULARIDADES[granularidad]
+        desde = -np.inf if desde is None else desde
+        hasta = np.inf if hasta is None else hasta
+        por_maquina = {}
+        for serie in self._seleccionar(data_key, tenant_id, location_id, machine_id):
+            por_maquina.setdefault(serie.machine_id, []).extend(serie.bloques(desde, hasta))
+
+        time_series, summary = [], []
+        for maquina, bloques in por_maquina.items():
+            parciales = [p for p in (b.parcial(desde, hasta, segundos) for b in bloques) if p is not None]
+            inicios, n, suma, minimo, maximo = combinar_parciales(parciales)
+            if not len(inicios):
+                continue
+            time_series.extend(
+                {"bucket": bucket_texto(inicio), "machine_id": maquina, "avg": _r3(s / c),
+                 "max": _r3(hi), "min": _r3(lo), "samples": int(c), "_t": inicio}
+                for inicio, c, s, lo, hi in zip(inicios.tolist(), n.tolist(), suma.tolist(),
+                                                minimo.tolist(), maximo.tolist()))
+            total = int(n.sum())
+            summary.append({"machine_id": maquina, "avg": _r3(suma.sum() / total),
+                            "max": _r3(maximo.max()), "min": _r3(minimo.min()), "samples": total})
+
+        time_series.sort(key=lambda fila: fila.pop("_t"))
+        summary.sort(key=lambda fila: fila["avg"], reverse=True)
+        return {
+            "timeSeries": time_series,
+            "summary": summary,
+            "meta": {
+                "tenantId": tenant_id,
+                "locationId": location_id,
+                "machineId": machine_id or "all",
+                "dataKey": data_key,
+                "granularity": granularidad,
+                "startDate": None if desde == -np.inf else bucket_texto(desde),
+                "endDate": None if hasta == np.inf else bucket_texto(hasta),
+                "totalRows": len(time_series),
+            },
+        }
+
+    def resumen_maquinas(self, tenant_id, data_key, desde=None, hasta=None, location_id=None):
+        """Sólo el summary: los chunks enteros dentro del rango no se leen"""
+        desde = -np.inf if desde is None else desde
+        hasta = np.inf if hasta is None else hasta
+        acumulado = {}  # machine_id → [n, suma, min, max]
+        for serie in self._seleccionar(data_key, tenant_id, location_id):
+            for bloque in serie.bloques(desde, hasta):
+                if bloque.contenido(desde, hasta):
+                    n, suma, minimo, maximo = bloque.n, bloque.suma, bloque.minimo, bloque.maximo
+                else:
+                    _, v = bloque.rango(desde, hasta)
+                    if not len(v):
+                        continue
+                    n, suma, minimo, maximo = len(v), float(v.sum()), float(v.min()), float(v.max())
+                total = acumulado.setdefault(serie.machine_id, [0, 0.0, np.inf, -np.inf])
+                total[0] += n
+                total[1] += suma
+                total[2] = min(total[2], minimo)
+                total[3] = max(total[3], maximo)
+        summary = [{"machine_id": maquina, "avg": _r3(suma / n), "max": _r3(hi), "min": _r3(lo),
+                    "samples": n}
+                   for maquina, (n, suma, lo, hi) in acumulado.items()]
+        summary.sort(key=lambda fila: fila["avg"], reverse=True)
+        return summary
+
+    def historial(self, tenant_id, location_id, topic, data_key, desde=None, hasta=None,
+                  limite=MAX_FILAS_HISTORIAL):
+        """Como getChartHistory: puntos crudos en orden de tiempo, con tope de filas"""
+        desde = -np.inf if desde is None else desde
+        hasta = np.inf if hasta is None else hasta
+        tramos = [b.rango(desde, hasta)
+                  for s in self._seleccionar(data_key, tenant_id, location_id, topic=topic)
+                  for b in s.bloques(desde, hasta)]
+        if tramos:
+            t = np.concatenate([tramo[0] for tramo in tramos])
+            v = np.concatenate([tramo[1] for tramo in tramos])
+        else:
+            t = v = np.empty(0)
+        orden = np.argsort(t, kind="stable")[:limite]
+        filas = [{"timestamp": datetime.fromtimestamp(ts).isoformat(), "value": valor}
+                 for ts, valor in zip(t[orden].tolist(), v[orden].tolist())]
+        return {
+            "rows": filas,
+            "meta": {"topic": topic, "dataKey": data_key, "rowCount": len(filas),
+                     "capped": len(filas) == limite},
+        }
+
+    def resumen(self):
+        puntos = sum(len(s) for s in self.series.values())
+        chunks = sum(len(s.chunks) for s in self.series.values())
+        maquinas = len({(s.tenant_id, s.location_id, s.machine_id) for s in self.series.values()})
+        return (f"{puntos:,} puntos | {len(self.series):,} series | {maquinas:,} máquinas"
+                f" | {chunks:,} chunks sellados")
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Persistencia (append-only)
+    # ───────────────────────────────────────────────────────────────────────
+    def guardar(self, directorio):
+        """Escribe los chunks nuevos (.npy) y reescribe el catálogo; los existentes no se tocan"""
+        os.makedirs(directorio, exist_ok=True)
+        catalogo = []
+        for i, serie in enumerate(self.series.values()):
+            serie.sellar()
+            carpeta = os.path.join(directorio, f"s{i:06d}")
+            os.makedirs(carpeta, exist_ok=True)
+            for j, chunk in enumerate(serie.chunks):
+                if not chunk.guardado:
+                    np.save(os.path.join(carpeta, f"c{j:06d}.npy"), chunk.datos)
+                    chunk.guardado = True
+            catalogo.append({"topic": serie.topic, "data_key": serie.data_key,
+                             "chunks": [c.estadisticas() for c in serie.chunks]})
+        temporal = os.path.join(directorio, "catalogo.json.tmp")
+        with open(temporal, "w") as f:
+            json.dump({"version": VERSION_CATALOGO, "series": catalogo}, f)
+        os.replace(temporal, os.path.join(directorio, "catalogo.json"))
+
+    @classmethod
+    def abrir(cls, directorio, mmap=True):
+        """Almacén guardado; con mmap los chunks se leen del disco a demanda"""
+        with open(os.path.join(directorio, "catalogo.json")) as f:
+            catalogo = json.load(f)
+        if catalogo.get("version") != VERSION_CATALOGO:
+            raise ValueError(f"versión de catálogo no soportada: {catalogo.get('version')}")
+        almacen = cls()
+        for i, entrada in enumerate(catalogo["series"]):
+            serie = almacen.serie(entrada["topic"], entrada["data_key"])
+            carpeta = os.path.join(directorio, f"s{i:06d}")
+            for j, estadisticas in enumerate(entrada["chunks"]):
+                datos = np.load(os.path.join(carpeta, f"c{j:06d}.npy"), mmap_mode="r" if mmap else None)
+                serie.chunks.append(Chunk(datos, tuple(estadisticas), guardado=True))
+        return almacen
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════════════════════════
+def generar_sintetico(almacen, puntos, maquinas=50, periodo=2.0, desde=None, seed=None):
+    """`puntos` en total repartidos en `maquinas` series (carga vectorizada, para escala)"""
+    rng = np.random.default_rng(seed)
+    desde = time.time() - puntos // maquinas * periodo if desde is None else desde
+    por_maquina = puntos // maquinas
+    t = desde + np.arange(por_maquina) * periodo
+    for m in range(maquinas):
+        base = rng.uniform(20, 80)
+        v = base + np.cumsum(rng.normal(0, 0.5, por_maquina)) * 0.1
+        almacen.agregar_columnas(f"sintetico/linea{m % 5 + 1}/motor{m:03d}/telemetria", "corriente", t, v)
+
+
+def _epoch(texto):
+    return None if texto is None else datetime.fromisoformat(texto).timestamp()
+
+
+def _imprimir(resultado, filas):
+    meta = resultado["meta"]
+    print(f"\n📈 {meta['dataKey']} | {meta['granularity']} | {meta['totalRows']:,} buckets")
+    for fila in resultado["timeSeries"][:filas]:
+        print(f"   {fila['bucket']}  {fila['machine_id']:<16} avg {fila['avg']:>10.3f}"
+              f"  min {fila['min']:>10.3f}  max {fila['max']:>10.3f}  n {fila['samples']:>8,}")
+    if len(resultado["timeSeries"]) > filas:
+        print(f"   ... {len(resultado['timeSeries']) - filas:,} más")
+    print(f"\n📊 Resumen por máquina ({len(resultado['summary'])})")
+    for fila in resultado["summary"][:filas]:
+        print(f"   {fila['machine_id']:<16} avg {fila['avg']:>10.3f}  min {fila['min']:>10.3f}"
+              f"  max {fila['max']:>10.3f}  n {fila['samples']:>10,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capturas", nargs="?", help="directorio de segmentos de monitor_mqtt.py --grabar")
+    parser.add_argument("--almacen", metavar="DIR", help="abrir un almacén guardado")
+    parser.add_argument("--guardar", metavar="DIR", help="guardar el almacén (append-only)")
+    parser.add_argument("--sintetico", type=int, metavar="PUNTOS", help="cargar PUNTOS sintéticos")
+    parser.add_argument("--maquinas", type=int, default=50, help="máquinas del modo --sintetico")
+    parser.add_argument("--tiempo", choices=("payload", "recepcion"), default="payload",
+                        help="reloj de las muestras al ingerir capturas")
+    parser.add_argument("--tenant", help="tenant_id (default: todos)")
+    parser.add_argument("--location", help="location_id")
+    parser.add_argument("--machine", help="machine_id")
+    parser.add_argument("--data-key", help="dataKey a consultar")
+    parser.add_argument("--granularidad", choices=sorted(GRANULARIDADES), default="DAY")
+    parser.add_argument("--desde", help="inicio ISO (ej: 2026-02-01 o 2026-02-01T06:00)")
+    parser.add_argument("--hasta", help="fin ISO")
+    parser.add_argument("--filas", type=int, default=20, help="filas a imprimir")
+    args = parser.parse_args()
+    if not (args.capturas or args.almacen or args.sintetico):
+        parser.error("indicar capturas/, --almacen o --sintetico")
+
+    t0 = time.perf_counter()
+    if args.almacen:
+        almacen = AlmacenSeries.abrir(args.almacen)
+        print(f"📂 Almacén {args.almacen}: {almacen.resumen()} ({time.perf_counter() - t0:.2f} s)")
+    else:
+        almacen = AlmacenSeries()
+    if args.capturas:
+        t0 = time.perf_counter()
+        mensajes = almacen.ingerir_directorio(args.capturas, tiempo=args.tiempo)
+        print(f"📥 {mensajes:,} mensajes ingeridos en {time.perf_counter() - t0:.2f} s"
+              f" | {almacen.invalidos:,} inválidos | {almacen.resumen()}")
+    if args.sintetico:
+        t0 = time.perf_counter()
+        generar_sintetico(almacen, args.sintetico, args.maquinas, seed=1)
+        print(f"🧪 {args.sintetico:,} puntos sintéticos en {time.perf_counter() - t0:.2f} s"
+              f" | {almacen.resumen()}")
+    if args.guardar:
+        t0 = time.perf_counter()
+        almacen.guardar(args.guardar)
+        print(f"💾 Guardado en {args.guardar} ({time.perf_counter() - t0:.2f} s)")
+
+    if args.data_key:
+        desde, hasta = _epoch(args.desde), _epoch(args.hasta)
+        t0 = time.perf_counter()
+        resultado = almacen.consultar(args.tenant, args.data_key, desde, hasta, args.granularidad,
+                                      args.location, args.machine)
+        t_consulta = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        almacen.resumen_maquinas(args.tenant, args.data_key, desde, hasta, args.location)
+        t_resumen = time.perf_counter() - t0
+        _imprimir(resultado, args.filas)
+        print(f"\n⏱️  consulta {t_consulta * 1000:.1f} ms | sólo resumen {t_resumen * 1000:.1f} ms")
+    else:
+        claves = sorted({s.data_key for s in almacen.series.values()})
+        print(f"🔑 dataKeys: {', '.join(claves) if claves else '(vacío)'}")
+
+
+if __name__ == "__main__":
+    main()
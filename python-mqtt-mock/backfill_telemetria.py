@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+BACKFILL OFFLINE DE TELEMETRÍA (SIN MQTT)
+=============================================================================
+Genera meses de historia sintética para `raw_telemetry` / `realtime_telemetry`
+(las tablas que leen queryTelemetry y getChartHistory) sin correr los
+simuladores en vivo:
+
+- ✅ Misma física que los simuladores: FlotaMotores.paso() con un
+       RelojVirtual que avanza `--periodo` segundos por tick (turnos,
+       fines de semana, rampa, compresor, enfriador)
+- ✅ Mismos layouts de plantas y topics (TOPICS de cada simulador, con el
+       primer nivel reemplazado por el tenant): motores, reconectadores
+       (Coca-Cola sobre su topología de alimentadores), bombas y
+       bombeo_full (bomba + planta general)
+- ✅ Una fila por (máquina, dataKey, tick):
+       tenant_id, location_id, machine_id, topic, data_key, value, timestamp
+- ✅ NDJSON comprimido (gzip) en archivos de `--filas-por-archivo` filas,
+       o Parquet por chunks si está instalado pyarrow (--formato parquet)
+- ✅ Memoria constante: cada tick se codifica y se escribe en el acto
+- ✅ Reproducible: con --seed la misma corrida da archivos idénticos byte
+       a byte (gzip sin fecha en la cabecera); --verificar-semilla corre
+       dos veces cada escenario pedido y lo comprueba
+
+El `value` sale como texto (la tabla lo lee con SAFE_CAST) y el timestamp
+en UTC (formato TIMESTAMP de BigQuery).
+
+USO:
+    python backfill_telemetria.py --cocacola 50 --solfrut 100 --desde 2026-01-01 --hasta 2026-03-01
+    python backfill_telemetria.py --bombeo 200 --dias 7 --periodo 10 --salida backfill/
+    bq load --source_format=NEWLINE_DELIMITED_JSON iot_data.raw_telemetry "backfill/*.ndjson.gz"
+    python backfill_telemetria.py --solfrut 2 --cocacola 2 --bombeo 2 --bombeo-full 2 --dias 0.1 --seed 3 --verificar-semilla
+
+=============================================================================
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import bombeo
+import bombeo_full
+import simulador_cocacola
+import simulador_solfrut
+from agregacion import identidad_topic
+from alimentadores import TopologiaAlimentadores
+from codificadores import CODIFICADORES, ESQUEMAS
+from flota import FlotaMotores, TIPO_COMPRESOR, TIPO_ENFRIADOR
+from inyector_fallas import Distribucion, InyectorFallas
+from reloj_virtual import RelojVirtual
+from runtime_async import topic_tenant
+
+COLUMNAS_TABLA = ("tenant_id", "location_id", "machine_id", "topic", "data_key", "value", "timestamp")
+
+_FORMATOS_VALOR = {"f1": "%.1f", "f2": "%.2f", "int": "%d", "raw": "%r"}
+
+
+def _valores_texto(formato, valores):
+    """Valores de una columna como texto (mismo formato que el payload)"""
+    if isinstance(formato, tuple):
+        on, off = formato
+        return [on if v else off for v in valores]
+    if formato == "bool":
+        return ["true" if v else "false" for v in valores]
+    if formato == "raw":
+        return [repr(float(v)) for v in valores]
+    plantilla = _FORMATOS_VALOR[formato]
+    return [plantilla % v for v in valores]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# GRUPOS DE FILAS (máquinas con el mismo esquema de payload)
+# ═══════════════════════════════════════════════════════════════════════════
+class GrupoFlota:
+    """Máquinas de una FlotaMotores que comparten esquema"""
+
+    def __init__(self, flota, esquema):
+        self.flota = flota
+        self.campos = [c for c in ESQUEMAS[esquema] if c[3] is not None]
+        self.indices = []
+        self.claves = []  # (tenant, location, machine, topic) por máquina
+
+    def agregar(self, indice, tenant, machine_id, topic):
+        self.indices.append(indice)
+        self.claves.append((tenant, topic.split("/")[1], machine_id, topic))
+
+    def cerrar(self):
+        self.indices = np.asarray(self.indices, dtype=np.intp)
+
+    def columnas(self):
+        """(data_key, valores texto) por campo, leyendo los arrays de la flota"""
+        for clave, formato, _, columna in self.campos:
+            valores = getattr(self.flota, columna)[self.indices].tolist()
+            yield clave, _valores_texto(formato, valores)
+
+
+class GrupoObjetos:
+    """Máquinas con estado por objeto (bombas, reconectadores...), leídas con el
+    codificador de su esquema, como en el runtime
+
+    actualizar: correr objeto.actualizar() en cada tick (False si la física la
+    corre otro grupo o `paso`)
+    paso: callable una vez por tick antes de leer (ej. la topología de alimentadores)
+    """
+
+    def __init__(self, esquema, actualizar=True, paso=None):
+        self.campos = ESQUEMAS[esquema]
+        self.valores = CODIFICADORES[esquema].valores
+        self.actualizar = actualizar
+        self.paso = paso
+        self.objetos = []
+        self.claves = []
+
+    def agregar(self, objeto, topic):
+        self.objetos.append(objeto)
+        self.claves.append(identidad_topic(topic) + (topic,))
+
+    def cerrar(self):
+        pass
+
+    def columnas(self):
+        if self.paso is not None:
+            self.paso()
+        if self.actualizar:
+            for objeto in self.objetos:
+                objeto.actualizar()
+        columnas = zip(*[self.valores(o) for o in self.objetos])
+        for (clave, formato, _, _), valores in zip(self.campos, columnas):
+            yield clave, _valores_texto(formato, valores)
+
+
+class RecoSolfrut:
+    """Reconectador 101 de Solfrut: sólo estado (nadie lo comanda en el backfill)"""
+    cerrado = True
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ARMADO DE PLANTAS (mismos layouts que runtime_async)
+# ═══════════════════════════════════════════════════════════════════════════
+def armar_grupos(solfrut=0, cocacola=0, bombas=0, reloj=None, seed=None, bombas_full=0):
+    grupos = []
+    if solfrut:
+        flota = FlotaMotores(capacidad=solfrut * 3, seed=seed, reloj=reloj)
+        grupo = GrupoFlota(flota, "motor_solfrut")
+        recos = GrupoObjetos("reco_solfrut", actualizar=False)
+        for i in range(solfrut):
+            tenant = f"solfrut-{i + 1:04d}"
+            for motor_id, nominal, maximo in (("m4", 22.5, 40.0), ("m5", 15.0, 40.0), ("m6", 32.0, 50.0)):
+                motor = simulador_solfrut.MotorState(motor_id, nominal, maximo, flota)
+                grupo.agregar(motor.indice, tenant, motor_id,
+                              topic_tenant(simulador_solfrut.TOPICS[motor_id]["data"], tenant))
+            recos.agregar(RecoSolfrut(), topic_tenant(simulador_solfrut.TOPICS["reco"]["data"], tenant))
+        flota.arrancar(slice(0, flota.n))
+        grupos += [grupo, recos]
+    if cocacola:
+        flota = FlotaMotores(capacidad=cocacola * 4, seed=seed, reloj=reloj)
+        alimentadores = TopologiaAlimentadores(flota, capacidad=cocacola, seed=seed)
+        por_tipo = {tipo: GrupoFlota(flota, esquema) for tipo, esquema in
+                    ((None, "motor_cocacola"), (TIPO_COMPRESOR, "compresor"), (TIPO_ENFRIADOR, "enfriador"))}
+        # Totales y protecciones de todos los reconectadores en un paso de la topología por tick
+        recos = GrupoObjetos("reconectador", actualizar=False, paso=alimentadores.paso)
+        for i in range(cocacola):
+            tenant = f"cocacola-{i + 1:04d}"
+            motores = {
+                "embotelladora": simulador_cocacola.MotorState("EMBOTELLADORA L1", 50, 62.5, 90.0,
+                                                               flota_motores=flota),
+                "transportadora": simulador_cocacola.MotorState("TRANSPORTADORA L2", 30, 37.5, 55.0,
+                                                                flota_motores=flota),
+                "compresor": simulador_cocacola.CompresorState(flota),
+                "enfriador": simulador_cocacola.EnfriadorState(flota),
+            }
+            for motor_id, motor in motores.items():
+                grupo = por_tipo.get(motor.tipo, por_tipo[None])
+                grupo.agregar(motor.indice, tenant, motor_id,
+                              topic_tenant(simulador_cocacola.TOPICS[motor_id]["data"], tenant))
+            recos.agregar(simulador_cocacola.ReconectadorState(motores, alimentadores),
+                          topic_tenant(simulador_cocacola.TOPICS["reco"]["data"], tenant))
+        flota.arrancar(slice(0, flota.n))
+        grupos += [*por_tipo.values(), recos]
+    # Física por objeto: un random.Random(seed) compartido por las máquinas del escenario
+    if bombas:
+        grupo = GrupoObjetos("bomba")
+        rng = random.Random(seed)
+        for i in range(bombas):
+            bomba = bombeo.BombaState(rng)
+            bomba.motor_activo = True
+            grupo.agregar(bomba, topic_tenant(bombeo.TOPIC_TELEMETRIA, f"bombeo-{i + 1:04d}"))
+        grupos.append(grupo)
+    if bombas_full:
+        # La bomba corre la física de la PlantaFull; la planta general sólo la lee
+        bomba, planta = GrupoObjetos("bomba_full"), GrupoObjetos("planta_general", actualizar=False)
+        rng = random.Random(seed)
+        for i in range(bombas_full):
+            tenant = f"bombeo_full-{i + 1:04d}"
+            objeto = bombeo_full.PlantaFull(rng)
+            objeto.bomba_activa = True
+            bomba.agregar(objeto, topic_tenant(bombeo_full.TOPIC_BOMBA_DATA, tenant))
+            planta.agregar(objeto, topic_tenant(bombeo_full.TOPIC_PLANTA_DATA, tenant))
+        grupos += [bomba, planta]
+    for grupo in grupos:
+        grupo.cerrar()
+    return grupos
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ESCRITORES (archivos por chunk)
+# ═══════════════════════════════════════════════════════════════════════════
+class EscritorNDJSON:
+    """NDJSON gzip, un archivo nuevo cada `filas_por_archivo` filas"""
+    extension = ".ndjson.gz"
+
+    def __init__(self, directorio, prefijo="raw_telemetry", filas_por_archivo=5_000_000,
+                 nivel=1):
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.filas_por_archivo = filas_por_archivo
+        self.nivel = nivel
+        self.archivos = []
+        self.filas = 0
+        self._filas_archivo = 0
+        self._f = None
+        os.makedirs(directorio, exist_ok=True)
+
+    def _rotar(self):
+        self.cerrar()
+        ruta = os.path.join(self.directorio, f"{self.prefijo}-{len(self.archivos):05d}{self.extension}")
+        self.archivos.append(ruta)
+        self._f = self._abrir(ruta)
+        self._filas_archivo = 0
+
+    def _abrir(self, ruta):
+        # mtime=0: la cabecera gzip no lleva la hora de escritura (mismas filas → mismos bytes)
+        return io.TextIOWrapper(gzip.GzipFile(ruta, "wb", compresslevel=self.nivel, mtime=0),
+                                encoding="utf-8")
+
+    def tick(self, ahora):
+        """Fija el timestamp (epoch) de las filas siguientes"""
+        ts = datetime.fromtimestamp(ahora, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        self._sufijo = '","timestamp":"' + ts + ' UTC"}\n'
+
+    def escribir(self, claves, data_key, valores):
+        """Filas de un campo para todas las máquinas de un grupo en el tick actual"""
+        if self._f is None or self._filas_archivo >= self.filas_por_archivo:
+            self._rotar()
+        sufijo = self._sufijo
+        self._f.write("".join([
+            '{"tenant_id":"%s","location_id":"%s","machine_id":"%s","topic":"%s","data_key":"%s","value":"%s'
+            % (t, l, m, tp, data_key, v) + sufijo
+            for (t, l, m, tp), v in zip(claves, valores)
+        ]))
+        self._filas_archivo += len(valores)
+        self.filas += len(valores)
+
+    def cerrar(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class EscritorParquet(EscritorNDJSON):
+    """Parquet zstd (pyarrow, opcional): un row group por chunk de filas;
+    el diccionario de parquet comprime las columnas repetidas (tenant, topic...)"""
+    extension = ".parquet"
+
+    def __init__(self, *args, filas_por_chunk=500_000, **kwargs):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa, self._pq = pa, pq
+        self.esquema = pa.schema([(c, pa.string()) for c in COLUMNAS_TABLA[:-1]] +
+                                 [("timestamp", pa.timestamp("ms", tz="UTC"))])
+        self.filas_por_chunk = filas_por_chunk
+        self._chunk = {c: [] for c in COLUMNAS_TABLA}
+        super().__init__(*args, **kwargs)
+
+    def _abrir(self, ruta):
+        return self._pq.ParquetWriter(ruta, self.esquema, compression="zstd")
+
+    def tick(self, ahora):
+        self._ts = int(ahora * 1000)
+
+    def escribir(self, claves, data_key, valores):
+        if self._f is None or self._filas_archivo >= self.filas_por_archivo:
+            self._rotar()
+        chunk = self._chunk
+        for columna, valores_clave in zip(COLUMNAS_TABLA[:4], zip(*claves)):
+            chunk[columna].extend(valores_clave)
+        chunk["data_key"].extend([data_key] * len(valores))
+        chunk["value"].extend(valores)
+        chunk["timestamp"].extend([self._ts] * len(valores))
+        self._filas_archivo += len(valores)
+        self.filas += len(valores)
+        if len(chunk["value"]) >= self.filas_por_chunk:
+            self._volcar()
+
+    def _volcar(self):
+        if not self._chunk["value"]:
+            return
+        pa = self._pa
+        columnas = [pa.array(self._chunk[c], pa.string()) for c in COLUMNAS_TABLA[:-1]]
+        columnas.append(pa.array(self._chunk["timestamp"], pa.int64()).cast(self.esquema.field("timestamp").type))
+        self._f.write_table(pa.Table.from_arrays(columnas, schema=self.esquema))
+        self._chunk = {c: [] for c in COLUMNAS_TABLA}
+
+    def cerrar(self):
+        if self._f is not None:
+            self._volcar()
+        super().cerrar()
+
+
+ESCRITORES = {"ndjson": EscritorNDJSON, "parquet": EscritorParquet}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# GENERACIÓN
+# ═══════════════════════════════════════════════════════════════════════════
+def generar(grupos, escritor, reloj, hasta, periodo=2.0, falla=0.01, rearme=0.02,
+            progreso=None, seed=None):
+    """Avanza el reloj virtual tick a tick hasta `hasta` (epoch) escribiendo filas"""
+    flotas = {id(g.flota): g.flota for g in grupos if isinstance(g, GrupoFlota)}.values()
+    horas_tick = periodo / 3600
+    # Fallas y rearmes (el operador vuelve a dar MARCHA) por eventos, con la tasa
+    # de la moneda por tick de --falla / --rearme
+    inyector = InyectorFallas(reloj, seed)
+    for flota in flotas:
+        inyector.registrar_flota(
+            flota, falla=Distribucion.desde_probabilidad(falla, periodo) if falla else None,
+            rearme=Distribucion.desde_probabilidad(rearme, periodo) if rearme else None)
+    inyector.iniciar()
+    ticks = 0
+    while reloj.time() < hasta:
+        ahora = reloj.time()
+        escritor.tick(ahora)
+        for flota in flotas:
+            flota.paso(ahora)
+            n = flota.n
+            flota.horas[:n][flota.running[:n]] += horas_tick
+        inyector.avanzar(ahora)
+        for grupo in grupos:
+            for data_key, valores in grupo.columnas():
+                escritor.escribir(grupo.claves, data_key, valores)
+        reloj.avanzar(periodo)
+        ticks += 1
+        if progreso and ticks % progreso == 0:
+            yield ticks
+    yield ticks
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# VERIFICACIÓN DE SEMILLA
+# ═══════════════════════════════════════════════════════════════════════════
+ESCENARIOS = ("solfrut", "cocacola", "bombeo", "bombeo_full")
+
+
+def _huella(args, escenario, desde, hasta, directorio):
+    """Corrida completa de un solo escenario → sha256 de cada archivo generado"""
+    cantidades = {nombre: getattr(args, nombre) if nombre == escenario else 0 for nombre in ESCENARIOS}
+    escritor = ESCRITORES[args.formato](directorio, filas_por_archivo=args.filas_por_archivo)
+    reloj = RelojVirtual(desde, velocidad=float("inf"))
+    grupos = armar_grupos(cantidades["solfrut"], cantidades["cocacola"], cantidades["bombeo"],
+                          reloj, args.seed, cantidades["bombeo_full"])
+    try:
+        for _ in generar(grupos, escritor, reloj, hasta.timestamp(), args.periodo,
+                         args.falla, args.rearme, seed=args.seed):
+            pass
+    finally:
+        escritor.cerrar()
+    huellas = []
+    for ruta in escritor.archivos:
+        with open(ruta, "rb") as f:
+            huellas.append(hashlib.sha256(f.read()).hexdigest())
+    return huellas, escritor.filas
+
+
+def verificar_semilla(args, desde, hasta):
+    """Dos corridas por escenario con la misma --seed: archivos idénticos byte a byte"""
+    fallidos = 0
+    for escenario in ESCENARIOS:
+        if not getattr(args, escenario):
+            continue
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            (huellas_a, filas), (huellas_b, _) = (_huella(args, escenario, desde, hasta, d) for d in (a, b))
+        igual = huellas_a == huellas_b
+        fallidos += not igual
+        print(f"   {'✅' if igual else '❌'} {escenario:<12} {filas:,} filas | "
+              f"{huellas_a[0][:12] if huellas_a else '-'} vs {huellas_b[0][:12] if huellas_b else '-'}")
+    return fallidos == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solfrut", type=int, default=0, help="plantas Solfrut (3 motores)")
+    parser.add_argument("--cocacola", type=int, default=0, help="plantas Coca-Cola (4 líneas)")
+    parser.add_argument("--bombeo", type=int, default=0, help="bombas Santa Isabel")
+    parser.add_argument("--bombeo-full", type=int, default=0,
+                        help="plantas de bombeo_full.py (bomba + planta general)")
+    parser.add_argument("--desde", help="inicio ISO (por defecto: hace --dias días)")
+    parser.add_argument("--hasta", help="fin ISO (por defecto: ahora)")
+    parser.add_argument("--dias", type=float, default=30, help="días de historia si no hay --desde")
+    parser.add_argument("--periodo", type=float, default=2.0, help="segundos simulados entre muestras")
+    parser.add_argument("--falla", type=float, default=0.01,
+                        help="probabilidad de falla por tick (motores en marcha)")
+    parser.add_argument("--rearme", type=float, default=0.02,
+                        help="probabilidad por tick de volver a arrancar un motor detenido")
+    parser.add_argument("--seed", type=int, help="semilla de la física (reproducible)")
+    parser.add_argument("--salida", default="backfill", help="directorio de salida")
+    parser.add_argument("--formato", choices=sorted(ESCRITORES), default="ndjson")
+    parser.add_argument("--filas-por-archivo", type=int, default=5_000_000)
+    parser.add_argument("--verificar-semilla", action="store_true",
+                        help="correr dos veces cada escenario con --seed y comparar los archivos (sin --salida)")
+    args = parser.parse_args()
+
+    if not (args.solfrut or args.cocacola or args.bombeo or args.bombeo_full):
+        parser.error("indicar al menos --solfrut, --cocacola, --bombeo o --bombeo-full")
+    hasta = datetime.fromisoformat(args.hasta) if args.hasta else datetime.now()
+    desde = datetime.fromisoformat(args.desde) if args.desde else hasta - timedelta(days=args.dias)
+    if args.verificar_semilla:
+        if args.seed is None:
+            parser.error("--verificar-semilla requiere --seed")
+        print(f"🔁 Reproducibilidad con --seed {args.seed}: {desde:%Y-%m-%d %H:%M} → {hasta:%Y-%m-%d %H:%M}")
+        sys.exit(0 if verificar_semilla(args, desde, hasta) else 1)
+
+    try:
+        escritor = ESCRITORES[args.formato](args.salida, filas_por_archivo=args.filas_por_archivo)
+    except ImportError:
+        parser.error("--formato parquet requiere pyarrow (pip install pyarrow)")
+
+    reloj = RelojVirtual(desde, velocidad=float("inf"))
+    grupos = armar_grupos(args.solfrut, args.cocacola, args.bombeo, reloj, args.seed, args.bombeo_full)
+    total_ticks = int((hasta - desde).total_seconds() // args.periodo)
+    print(f"🚀 Backfill {desde:%Y-%m-%d %H:%M} → {hasta:%Y-%m-%d %H:%M} | "
+          f"{sum(len(g.claves) for g in grupos):,} máquinas | {total_ticks:,} ticks")
+
+    t0 = time.monotonic()
+    try:
+        for ticks in generar(grupos, escritor, reloj, hasta.timestamp(), args.periodo,
+                             args.falla, args.rearme, progreso=max(1, total_ticks // 20),
+                             seed=args.seed):
+            dt = time.monotonic() - t0
+            print(f"   {reloj.now():%Y-%m-%d %H:%M} | {ticks:,}/{total_ticks:,} ticks | "
+                  f"{escritor.filas:,} filas | {escritor.filas / dt * 60 / 1e6:,.1f} M filas/min")
+    except KeyboardInterrupt:
+        print("\n🛑 Backfill interrumpido")
+    finally:
+        escritor.cerrar()
+
+    dt = time.monotonic() - t0
+    print(f"✅ {escritor.filas:,} filas en {len(escritor.archivos)} archivos ({args.salida}/) "
+          f"en {dt:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
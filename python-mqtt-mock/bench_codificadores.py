@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+MICROBENCHMARK - CODIFICACIÓN DE PAYLOADS
+=============================================================================
+Compara, para una flota de N motores Coca-Cola (con compresores y
+enfriadores), el camino actual contra los codificadores precompilados:
+
+1. to_json() + json.dumps        (datetime.now().isoformat() por motor)
+2. Codificador.codificar         (un objeto a la vez, timestamp por tick)
+3. Codificador.codificar_flota   (columnar desde los arrays de la flota)
+4. Binario por objeto y columnar (binario.py), más el tamaño promedio de
+   payload y el costo de decodificar JSON vs binario
+
+USO:
+    python bench_codificadores.py            # 10.000 motores
+    python bench_codificadores.py 100000 --timestamp epoch_ms
+
+=============================================================================
+"""
+
+import argparse
+import json
+import time
+
+from binario import BINARIOS, decodificar
+from codificadores import CODIFICADORES, MODOS_TIMESTAMP, RelojTick
+from flota import FlotaMotores, TIPO_COMPRESOR, TIPO_ENFRIADOR
+from simulador_cocacola import CompresorState, EnfriadorState, MotorState
+
+
+def armar_flota(n):
+    flota = FlotaMotores(capacidad=n, seed=1)
+    motores = []
+    for i in range(n):
+        if i % 4 == 2:
+            motores.append(CompresorState(flota))
+        elif i % 4 == 3:
+            motores.append(EnfriadorState(flota))
+        else:
+            motores.append(MotorState(f"MOTOR {i}", 50, 62.5, 90.0, flota_motores=flota))
+    flota.arrancar(slice(0, n), ahora=time.time() - 10)
+    flota.paso()
+    return flota, motores
+
+
+def medir(nombre, funcion, mensajes, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    print(f"   {nombre:<34} {mejor * 1e6 / mensajes:7.3f} µs/msg | {mensajes / mejor:>12,.0f} msg/s")
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("motores", type=int, nargs="?", default=10_000)
+    parser.add_argument("--timestamp", choices=MODOS_TIMESTAMP, default="iso")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    n = args.motores
+    flota, motores = armar_flota(n)
+    reloj = RelojTick(args.timestamp)
+    esquema = {TIPO_COMPRESOR: "compresor", TIPO_ENFRIADOR: "enfriador"}
+    codificadores = [CODIFICADORES[esquema.get(m.tipo, "motor_cocacola")] for m in motores]
+    binarios = [BINARIOS[c.nombre] for c in codificadores]
+
+    # Mismo contenido que to_json (salvo timestamp y formato de floats)
+    for motor, codificador in zip(motores[:4], codificadores):
+        legado = motor.to_json()
+        nuevo = json.loads(codificador.codificar(motor, reloj.json))
+        assert set(nuevo) == set(legado), (nuevo, legado)
+        assert all(nuevo[k] == legado[k] for k in legado if k != "timestamp"), (nuevo, legado)
+
+    def legado():
+        for motor in motores:
+            json.dumps(motor.to_json())
+
+    def por_objeto():
+        ts = reloj.tick()
+        for motor, codificador in zip(motores, codificadores):
+            codificador.codificar(motor, ts)
+
+    tipos = flota.tipo[:n]
+    grupos = [(CODIFICADORES[nombre], (tipos == tipo).nonzero()[0])
+              for tipo, nombre in ((0, "motor_cocacola"), (TIPO_COMPRESOR, "compresor"),
+                                   (TIPO_ENFRIADOR, "enfriador"))]
+
+    def columnar():
+        ts = reloj.tick()
+        for codificador, indices in grupos:
+            codificador.codificar_flota(flota, indices, ts)
+
+    def binario_objeto():
+        reloj.tick()
+        t = reloj.ahora
+        for motor, binario in zip(motores, binarios):
+            binario.codificar(motor, t)
+
+    def binario_columnar():
+        reloj.tick()
+        for codificador, indices in grupos:
+            BINARIOS[codificador.nombre].codificar_flota(flota, indices, reloj.ahora)
+
+    reloj.tick()
+    textos = [c.codificar(m, reloj.json) for m, c in zip(motores, codificadores)]
+    crudos = [b.codificar(m, reloj.ahora) for m, b in zip(motores, binarios)]
+
+    def decodificar_json():
+        for texto in textos:
+            json.loads(texto)
+
+    def decodificar_binario():
+        for crudo in crudos:
+            decodificar(crudo, args.timestamp)
+
+    print(f"\n📦 Codificación de {n:,} motores (timestamp: {args.timestamp})")
+    print("-" * 78)
+    base = medir("to_json + json.dumps", legado, n, args.repeticiones)
+    t_obj = medir("Codificador.codificar", por_objeto, n, args.repeticiones)
+    t_col = medir("Codificador.codificar_flota", columnar, n, args.repeticiones)
+    t_bin = medir("binario por objeto", binario_objeto, n, args.repeticiones)
+    t_bcol = medir("binario columnar (NumPy)", binario_columnar, n, args.repeticiones)
+    print("-" * 78)
+    print(f"   Speedup por objeto: {base / t_obj:4.1f}x | columnar: {base / t_col:4.1f}x"
+          f" | binario: {base / t_bin:4.1f}x | binario columnar: {base / t_bcol:4.1f}x")
+    print(f"   Tamaño promedio: JSON {sum(map(len, textos)) / n:.0f} B"
+          f" | binario {sum(map(len, crudos)) / n:.0f} B")
+    print("\n📥 Decodificación")
+    medir("json.loads", decodificar_json, n, args.repeticiones)
+    medir("binario.decodificar (forma JSON)", decodificar_binario, n, args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+MICROBENCHMARKS DEL SIMULADOR - SUITE OFFLINE CON LÍNEA BASE
+=============================================================================
+Mide los caminos calientes del mock sin broker ni red, deja los resultados
+en JSON y los compara contra una línea base guardada en el repo
+(bench_simulador_base.json) para detectar regresiones:
+
+    referencia                      loop de Python puro (normaliza la máquina)
+    reconectador.actualizar         ReconectadorState de una planta Coca-Cola
+    to_json.<esquema>               to_json() + json.dumps por mensaje
+    codificar.<esquema>             codificador precompilado por mensaje
+    comando.on_message              RuntimeSimulacion.on_message → router → acción
+    tick.flota_<N>                  una ronda completa del runtime (física en
+                                    lote + tick de cada dispositivo) con N
+                                    dispositivos; publicar sin broker = cola
+                                    acotada, sin client.publish
+
+- ✅ Cada medición: vueltas calibradas a --minimo s por tanda, mejor de
+       --repeticiones tandas, en ns por unidad (mensaje, dispositivo...)
+- ✅ Resultados legibles por máquina (--json): versión de Python / NumPy,
+       plataforma y ns + unidades/s por benchmark
+- ✅ Comparación con la línea base: por defecto normalizada por
+       `referencia` (mismo código en otra máquina ≈ mismo cociente); la
+       referencia se vuelve a medir justo antes de cada benchmark, así la
+       deriva de la máquina durante la corrida (frecuencia, vecinos
+       ruidosos) se cancela benchmark a benchmark; una regresión es más de
+       --tolerancia por encima de la base, confirmada en --reintentos
+       re-mediciones (se queda la mejor), y el proceso sale con código 1
+- ✅ --guardar-base reescribe la línea base con la corrida actual
+
+USO:
+    python bench_simulador.py                           # todo + comparar con la base
+    python bench_simulador.py --solo tick --flotas 10 1000
+    python bench_simulador.py --json resultados.json --tolerancia 0.15
+    python bench_simulador.py --guardar-base            # después de una mejora aceptada
+
+=============================================================================
+"""
+
+import argparse
+import collections
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_simulador_base.json")
+FORMATO = 1
+
+Mensaje = collections.namedtuple("Mensaje", "topic payload")
+
+
+def medir(funcion, unidades, minimo=0.2, repeticiones=5):
+    """ns por unidad: mejor de `repeticiones` tandas de al menos `minimo` s (como timeit.autorange)"""
+    vueltas = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(vueltas):
+            funcion()
+        dt = time.perf_counter() - t0
+        if dt >= minimo:
+            break
+        vueltas = max(vueltas * 2, int(vueltas * minimo / max(dt, 1e-9) * 1.1))
+    mejor = dt
+    for _ in range(repeticiones - 1):
+        t0 = time.perf_counter()
+        for _ in range(vueltas):
+            funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor * 1e9 / (vueltas * unidades)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BENCHMARKS: cada uno arma su estado y devuelve (función, unidades, unidad)
+# ═══════════════════════════════════════════════════════════════════════════
+def bench_referencia():
+    def loop():
+        x = 0.0
+        for i in range(1000):
+            x = x * 0.5 + i
+        return x
+    return loop, 1000, "iteración"
+
+
+def bench_reconectador():
+    from simulador_cocacola import PlantaCocaCola
+    planta = PlantaCocaCola()
+    planta.flota.arrancar(slice(0, planta.flota.n))
+    planta.flota.paso()
+    return planta.reconectador.actualizar, 1, "llamada"
+
+
+def _fuentes():
+    """esquema → objeto con el estado que lee ese esquema (planta en marcha)"""
+    import bombeo
+    import bombeo_full
+    from simulador_cocacola import PlantaCocaCola
+    from simulador_solfrut import PlantaSolfrut
+
+    solfrut, cocacola = PlantaSolfrut(), PlantaCocaCola()
+    for flota in (solfrut.flota, cocacola.flota):
+        flota.arrancar(slice(0, flota.n), ahora=time.time() - 10)
+        flota.paso()
+    cocacola.reconectador.actualizar()
+    bomba = bombeo.BombaState()
+    bomba.comando("MARCHA")
+    full = bombeo_full.PlantaFull()
+    full.comando_bomba("MARCHA")
+    for _ in range(10):
+        bomba.actualizar()
+        full.actualizar()
+    return {
+        "motor_solfrut": (solfrut.motores["m4"], solfrut.motores["m4"].to_json),
+        "motor_cocacola": (cocacola.motores["embotelladora"], cocacola.motores["embotelladora"].to_json),
+        "compresor": (cocacola.motores["compresor"], cocacola.motores["compresor"].to_json),
+        "enfriador": (cocacola.motores["enfriador"], cocacola.motores["enfriador"].to_json),
+        "reconectador": (cocacola.reconectador, cocacola.reconectador.to_json),
+        "bomba": (bomba, bomba.to_json),
+        "bomba_full": (full, full.bomba_json),
+        "planta_general": (full, full.planta_json),
+    }
+
+
+def benches_serializacion():
+    """to_json + json.dumps y el codificador precompilado, por esquema"""
+    from codificadores import CODIFICADORES, RelojTick
+
+    reloj = RelojTick()
+    reloj.tick()
+    benches = {}
+    for esquema, (objeto, to_json) in _fuentes().items():
+        codificar = CODIFICADORES[esquema].codificar
+        ts = reloj.actual(CODIFICADORES[esquema].modo_timestamp)
+
+        def legado(to_json=to_json):
+            json.dumps(to_json())
+
+        def precompilado(codificar=codificar, objeto=objeto, ts=ts):
+            codificar(objeto, ts)
+
+        benches[f"to_json.{esquema}"] = lambda legado=legado: (legado, 1, "mensaje")
+        benches[f"codificar.{esquema}"] = lambda precompilado=precompilado: (precompilado, 1, "mensaje")
+    return benches
+
+
+def _runtime(**plantas):
+    """RuntimeSimulacion armado como la CLI, sin conectar (publicar encola)"""
+    from runtime_async import armar_runtime, parser_argumentos
+
+    argumentos = []
+    for escenario, cantidad in plantas.items():
+        argumentos += [f"--{escenario.replace('_', '-')}", str(cantidad)]
+    return armar_runtime(parser_argumentos().parse_args(argumentos + ["--falla", "no"]))
+
+
+def bench_comando():
+    runtime = _runtime(solfrut=1000)
+    # CLOSE a cada reconectador Solfrut (acción sin print): router + acción por comando
+    mensajes = [Mensaje(d.topic_cmd, b"CLOSE") for d in runtime.dispositivos if d.topic_cmd.endswith("reco1/comandos")]
+
+    def despachar():
+        for mensaje in mensajes:
+            runtime.on_message(None, None, mensaje)
+    return despachar, len(mensajes), "comando"
+
+
+def bench_tick(dispositivos):
+    """Ronda del runtime: plantas Coca-Cola (4 líneas + reco = 5 dispositivos)"""
+    def armar():
+        import functools
+        runtime = _runtime(cocacola=max(1, dispositivos // 5))
+        fisicas = [functools.partial(runtime._fisica, flota, alimentadores)
+                   for flota, _, alimentadores in runtime.flotas]
+        ticks = [d.tarea(runtime) for d in runtime.dispositivos]
+
+        def ronda():
+            for fisica in fisicas:
+                fisica()
+            for tick in ticks:
+                tick()
+        return ronda, len(ticks), "dispositivo"
+    return armar
+
+
+def suite(flotas):
+    benches = {
+        "referencia": bench_referencia,
+        "reconectador.actualizar": bench_reconectador,
+    }
+    benches.update(benches_serializacion())
+    benches["comando.on_message"] = bench_comando
+    for n in flotas:
+        benches[f"tick.flota_{n}"] = bench_tick(n)
+    return benches
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RESULTADOS Y LÍNEA BASE
+# ═══════════════════════════════════════════════════════════════════════════
+def entorno():
+    import numpy as np
+    return {"formato": FORMATO, "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "plataforma": platform.platform(), "procesador": platform.processor() or platform.machine()}
+
+
+def comparar(resultados, base, tolerancia, normalizar=True):
+    """{nombre: (cociente vs base, estado)}; cociente > 1 = más lento que la base"""
+    actual, previo = resultados["resultados"], base["resultados"]
+    comparacion, escalas = {}, []
+    for nombre, medida in actual.items():
+        if nombre == "referencia" or nombre not in previo:
+            continue
+        escala = 1.0
+        if normalizar and "ref_ns" in medida and "ref_ns" in previo[nombre]:
+            # Referencia medida junto a cada benchmark: cancela la deriva durante la corrida
+            escala = previo[nombre]["ref_ns"] / medida["ref_ns"]
+        elif normalizar and "referencia" in actual and "referencia" in previo:
+            escala = previo["referencia"]["ns"] / actual["referencia"]["ns"]
+        escalas.append(escala)
+        cociente = medida["ns"] * escala / previo[nombre]["ns"]
+        if cociente > 1 + tolerancia:
+            estado = "regresión"
+        elif cociente < 1 / (1 + tolerancia):
+            estado = "mejora"
+        else:
+            estado = "igual"
+        comparacion[nombre] = (cociente, estado)
+    return comparacion, statistics.median(escalas) if escalas else 1.0
+
+
+def correr_bench(armar, minimo, repeticiones):
+    """Arma y mide un benchmark, con la referencia medida justo antes"""
+    referencia, unidades_ref, _ = bench_referencia()
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):  # arranques / comandos imprimen
+        funcion, unidades, unidad = armar()
+        ref_ns = medir(referencia, unidades_ref, minimo / 2, repeticiones)
+        ns = medir(funcion, unidades, minimo, repeticiones)
+    return {"ns": round(ns, 2), "por_s": round(1e9 / ns, 1), "unidad": unidad, "ref_ns": round(ref_ns, 2)}
+
+
+def guardar(ruta, datos):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solo", nargs="+", metavar="PATRON",
+                        help="sólo los benchmarks cuyo nombre contiene alguno de los patrones")
+    parser.add_argument("--flotas", type=int, nargs="+", default=[10, 1000, 100_000],
+                        help="dispositivos por ronda de tick.flota_<N>")
+    parser.add_argument("--minimo", type=float, default=0.2, help="segundos mínimos por tanda")
+    parser.add_argument("--repeticiones", type=int, default=5, help="tandas por benchmark (se toma la mejor)")
+    parser.add_argument("--json", metavar="RUTA", help="escribir los resultados ('-' = stdout)")
+    parser.add_argument("--base", default=BASE, help="línea base a comparar / guardar")
+    parser.add_argument("--tolerancia", type=float, default=0.4,
+                        help="fracción más lenta que la base que cuenta como regresión")
+    parser.add_argument("--reintentos", type=int, default=2,
+                        help="veces que se re-mide un benchmark marcado como regresión antes de darlo por bueno")
+    parser.add_argument("--sin-normalizar", action="store_true",
+                        help="comparar ns absolutos (misma máquina) en vez de relativos a `referencia`")
+    parser.add_argument("--guardar-base", action="store_true", help="reescribir la línea base con esta corrida")
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        benches = suite(args.flotas)
+    if args.solo:
+        benches = {n: b for n, b in benches.items()
+                   if n == "referencia" or any(p in n for p in args.solo)}
+
+    resultados = entorno()
+    resultados["resultados"] = medidas = {}
+    salida = sys.stderr if args.json == "-" else sys.stdout
+    print(f"⏱️ {len(benches)} benchmarks | Python {resultados['python']} | NumPy {resultados['numpy']}"
+          f" | {resultados['procesador']}", file=salida)
+    print("-" * 78, file=salida)
+    for nombre, armar in benches.items():
+        medidas[nombre] = medida = correr_bench(armar, args.minimo, args.repeticiones)
+        print(f"   {nombre:<40} {medida['ns']:>12,.1f} ns/{medida['unidad']:<11} {medida['por_s']:>14,.0f}/s",
+              file=salida)
+
+    regresiones = 0
+    if args.guardar_base:
+        guardar(args.base, resultados)
+        print(f"💾 Línea base guardada en {args.base}", file=salida)
+    elif os.path.exists(args.base):
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        comparacion, escala = comparar(resultados, base, args.tolerancia, not args.sin_normalizar)
+        for _ in range(args.reintentos):
+            # Una regresión real se repite; un pico de ruido de la máquina no
+            sospechosos = [n for n, (_, estado) in comparacion.items() if estado == "regresión"]
+            if not sospechosos:
+                break
+            print(f"🔁 Re-midiendo {len(sospechosos)} posibles regresiones...", file=salida)
+            for nombre in sospechosos:
+                nueva = {"resultados": {nombre: correr_bench(benches[nombre], args.minimo, args.repeticiones)}}
+                cociente, _ = comparar(nueva, base, args.tolerancia, not args.sin_normalizar)[0][nombre]
+                if cociente < comparacion[nombre][0]:
+                    medidas[nombre] = nueva["resultados"][nombre]
+            comparacion, escala = comparar(resultados, base, args.tolerancia, not args.sin_normalizar)
+        print("-" * 78, file=salida)
+        print(f"📏 vs línea base {base['fecha']} ({base['procesador']})"
+              f" | escala de máquina (mediana) {escala:.2f}x | tolerancia {args.tolerancia:.0%}", file=salida)
+        iconos = {"regresión": "❌", "mejora": "🚀", "igual": "✅"}
+        for nombre, (cociente, estado) in comparacion.items():
+            print(f"   {iconos[estado]} {nombre:<40} {cociente:>6.2f}x {estado}", file=salida)
+        regresiones = sum(estado == "regresión" for _, estado in comparacion.values())
+        print(f"{'❌' if regresiones else '✅'} {regresiones} regresiones en {len(comparacion)} benchmarks",
+              file=salida)
+    else:
+        print(f"⚠️ Sin línea base ({args.base}): correr con --guardar-base", file=salida)
+
+    if args.json == "-":
+        json.dump(resultados, sys.stdout, ensure_ascii=False, indent=1)
+        print()
+    elif args.json:
+        guardar(args.json, resultados)
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+CODIFICACIÓN BINARIA CON REGISTRO DE ESQUEMAS VERSIONADOS
+=============================================================================
+Alternativa compacta al JSON: cada payload lleva el id de su esquema y los
+campos empaquetados a ancho fijo (little-endian), sin nombres de clave:
+
+    byte 0      MAGIA (0xB1: nunca empieza así un JSON ni un texto)
+    byte 1      id de esquema (REGISTRO)
+    bytes 2-9   timestamp epoch (float64)
+    bytes 10-   flags (1 bit por campo de estado/bool) + campos numéricos
+
+- ✅ Un esquema por tipo de dispositivo: MotorState (Solfrut / Coca-Cola),
+       CompresorState, EnfriadorState, ReconectadorState, reco Solfrut, la
+       bomba de bombeo y la bomba + planta general de bombeo_full. Campos y orden salen de ESQUEMAS (codificadores.py)
+- ✅ Versionado: cada id fija (esquema, versión, campos con su formato) y
+       se sigue decodificando aunque ESQUEMAS cambie; sólo la versión más
+       alta de cada nombre codifica y tiene que coincidir con ESQUEMAS. Si
+       ESQUEMAS cambia sin registrar un id nuevo, el import falla en vez de
+       codificar mal
+- ✅ f1 / f2 → entero de 32 bits escalado (exacto a los decimales del JSON),
+       int → int32, raw → float64
+- ✅ decodificar() devuelve la forma JSON actual (mismas claves y valores,
+       timestamp ISO / epoch / epoch_ms como RelojTick; bomba siempre epoch
+       y bomba_full / planta_general sin timestamp, como en JSON)
+- ✅ Camino columnar: una FlotaMotores completa en un array estructurado de
+       NumPy y un único tobytes()
+
+Un motor Coca-Cola: ~150 B en JSON → 35 B en binario.
+
+USO:
+    payload = BINARIOS["motor_cocacola"].codificar(motor, reloj.ahora)
+    data = decodificar(payload)                    # dict como el JSON
+    texto = a_json(payload, timestamp="epoch_ms")  # str JSON compacto
+    python binario.py       # verifica que dos versiones de un esquema convivan
+
+=============================================================================
+"""
+
+import functools
+import json
+import struct
+from datetime import datetime
+
+from codificadores import ESQUEMAS, ON_OFF, SIN_TIMESTAMP, TIMESTAMP_PROPIO
+
+MAGIA = 0xB1
+CABECERA = struct.Struct("<BBd")
+
+_MOTOR_COCACOLA = (("estado", ON_OFF), ("corriente", "f2"), ("velocidad", "f1"), ("temperatura", "f1"),
+                   ("vibracion", "f2"), ("horas_operacion", "raw"))
+
+# id → (esquema, versión, (clave, formato) en orden). Cada id guarda su propio
+# layout: un cambio de campos en ESQUEMAS se registra con un id y versión
+# nuevos, y los consumidores siguen decodificando los ids viejos
+REGISTRO = {
+    1: ("motor_solfrut", 1, (("estado", ON_OFF), ("falla", ("SI", "NO")), ("corriente", "f2"))),
+    2: ("motor_cocacola", 1, _MOTOR_COCACOLA),
+    3: ("compresor", 1, _MOTOR_COCACOLA + (("presion", "f2"),)),
+    4: ("enfriador", 1, _MOTOR_COCACOLA + (("temp_entrada", "f1"), ("temp_salida", "f1"))),
+    5: ("reconectador", 1, (("estado", ("CLOSED", "OPEN")), ("voltaje_L1", "f1"), ("voltaje_L2", "f1"),
+                            ("voltaje_L3", "f1"), ("frecuencia", "f2"), ("corriente_total", "f1"),
+                            ("sobrecorriente", "bool"), ("sobretension", "bool"),
+                            ("bajatension", "bool"), ("desequilibrio", "bool"))),
+    6: ("reco_solfrut", 1, (("estado", ON_OFF),)),
+    7: ("bomba", 1, (("estado", ON_OFF), ("amperes", "f2"), ("voltaje", "int"))),
+    8: ("bomba_full", 1, (("estado", ON_OFF), ("amperes", "f2"), ("voltaje", "f1"), ("temp", "f1"),
+                          ("presion", "f2"), ("vibracion", "f2"))),
+    9: ("planta_general", 1, (("estado", ON_OFF), ("temp_amb", "f1"), ("humedad", "raw"),
+                              ("nivel_tanque", "int"), ("consumo_kwh", "f2"))),
+}
+
+# formato de codificadores.py → (struct, escala)
+_NUMERICOS = {"f1": ("i", 10), "f2": ("i", 100), "int": ("i", None), "raw": ("d", None)}
+
+
+def _es_flag(formato):
+    return isinstance(formato, tuple) or formato == "bool"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ESQUEMA BINARIO
+# ═══════════════════════════════════════════════════════════════════════════
+class EsquemaBinario:
+    """Codificador / decodificador de un id del REGISTRO
+
+    campos: los de ESQUEMAS (clave, formato, atributo, columna) para la
+    versión vigente; sin `atributo` (versión vieja) sólo decodifica
+    """
+
+    def __init__(self, id_esquema, nombre, version, campos):
+        self.id = id_esquema
+        self.nombre = nombre
+        self.version = version
+        self.campos = campos
+        self.vigente = all(a is not None for _, _, a, _ in campos)
+        self.flags = [c for c in campos if _es_flag(c[1])]
+        self.numericos = [c for c in campos if not _es_flag(c[1])]
+        if len(self.flags) > 8:
+            raise ValueError(f"{nombre}: más de 8 campos de estado")
+        formato = "<BBdB" + "".join(_NUMERICOS[f][0] for _, f, _, _ in self.numericos)
+        self.struct = struct.Struct(formato)
+        self.tamano = self.struct.size
+        if self.vigente:
+            self.codificar = self._compilar()
+        self._decodificar = self._compilar_decodificador()
+
+    def codificar(self, o, t):
+        raise ValueError(f"{self.nombre} v{self.version} es una versión vieja: sólo decodifica")
+
+    @functools.cached_property
+    def dtype(self):
+        """Fila del camino columnar (NumPy recién cuando se codifica una flota)"""
+        import numpy as np
+        return np.dtype([("magia", "u1"), ("id", "u1"), ("t", "<f8"), ("flags", "u1")]
+                        + [(f"c{i}", _dtype(f)) for i, (_, f, _, _) in enumerate(self.numericos)])
+
+    def _compilar(self):
+        bits = " | ".join(f"(1 if o.{a} else 0) << {i}" for i, (_, _, a, _) in enumerate(self.flags))
+        valores = []
+        for _, formato, atributo, _ in self.numericos:
+            escala = _NUMERICOS[formato][1]
+            if escala:
+                valores.append(f"round(o.{atributo} * {escala})")
+            elif formato == "int":
+                valores.append(f"int(o.{atributo})")
+            else:
+                valores.append(f"float(o.{atributo})")
+        fuente = (f"def codificar(o, t):\n"
+                  f"    return pack({MAGIA}, {self.id}, t, {bits or '0'}, {', '.join(valores)})\n")
+        entorno = {"pack": self.struct.pack}
+        exec(compile(fuente, f"<binario {self.nombre}>", "exec"), entorno)
+        return entorno["codificar"]
+
+    def codificar_flota(self, flota, indices, t):
+        """Payloads de las filas `indices` de una FlotaMotores: un array estructurado y un tobytes()"""
+        import numpy as np
+        if not self.vigente:
+            self.codificar(None, t)
+        n = len(flota.running[indices])
+        filas = np.empty(n, dtype=self.dtype)
+        filas["magia"] = MAGIA
+        filas["id"] = self.id
+        filas["t"] = t
+        flags = np.zeros(n, dtype=np.uint8)
+        for i, (_, _, _, columna) in enumerate(self.flags):
+            flags |= getattr(flota, columna)[indices].astype(np.uint8) << i
+        filas["flags"] = flags
+        for i, (_, formato, _, columna) in enumerate(self.numericos):
+            valores = getattr(flota, columna)[indices]
+            escala = _NUMERICOS[formato][1]
+            filas[f"c{i}"] = np.round(valores * escala) if escala else valores
+        datos = filas.tobytes()
+        return [datos[i:i + self.tamano] for i in range(0, len(datos), self.tamano)]
+
+    def _compilar_decodificador(self):
+        nombres = [f"c{i}" for i in range(len(self.numericos))]
+        valores = iter(nombres)
+        bits = {c[0]: 1 << i for i, c in enumerate(self.flags)}
+        partes = []
+        for clave, formato, _, _ in self.campos:
+            if _es_flag(formato):
+                bit = bits[clave]
+                si, no = (repr(formato[0]), repr(formato[1])) if isinstance(formato, tuple) else ("True", "False")
+                partes.append(f"{clave!r}: {si} if f & {bit} else {no}")
+            else:
+                escala = _NUMERICOS[formato][1]
+                partes.append(f"{clave!r}: {next(valores)}" + (f" / {escala}" if escala else ""))
+        if self.nombre not in SIN_TIMESTAMP:
+            partes.append("'timestamp': ts(t)")
+        fuente = (f"def decodificar(payload, ts):\n"
+                  f"    _, _, t, f, {''.join(n + ', ' for n in nombres)}= unpack(payload)\n"
+                  f"    return {{{', '.join(partes)}}}\n")
+        entorno = {"unpack": self.struct.unpack}
+        exec(compile(fuente, f"<decodificador {self.nombre}>", "exec"), entorno)
+        return entorno["decodificar"]
+
+    def decodificar(self, payload, timestamp="iso"):
+        return self._decodificar(payload, _TIMESTAMPS[TIMESTAMP_PROPIO.get(self.nombre, timestamp)])
+
+
+def _dtype(formato):
+    return "<i4" if _NUMERICOS[formato][0] == "i" else "<f8"
+
+
+def _iso_por_tick():
+    """ISO del último epoch visto: los dispositivos de un tick comparten timestamp"""
+    ultimo = (None, None)
+
+    def iso(t):
+        nonlocal ultimo
+        if ultimo[0] != t:
+            ultimo = (t, datetime.fromtimestamp(t).isoformat())  # asignación atómica
+        return ultimo[1]
+    return iso
+
+
+_TIMESTAMPS = {
+    "iso": _iso_por_tick(),
+    "epoch": float,
+    "epoch_ms": lambda t: int(t * 1000),
+}
+
+
+def armar_registro(registro, esquemas):
+    """({id: EsquemaBinario}, {nombre: esquema vigente}) de un REGISTRO
+
+    Sólo la versión más alta de cada nombre se compara con `esquemas` (y
+    codifica); las anteriores decodifican con su propio layout
+    """
+    vigentes = {}
+    for i, (nombre, version, _) in registro.items():
+        if nombre not in vigentes or version > registro[vigentes[nombre]][1]:
+            vigentes[nombre] = i
+    por_id, por_nombre = {}, {}
+    for i, (nombre, version, layout) in registro.items():
+        if vigentes[nombre] == i:
+            campos = esquemas[nombre]
+            actual = tuple((c[0], c[1]) for c in campos)
+            if actual != tuple(layout):
+                raise ValueError(f"esquema binario {i} ({nombre} v{version}) no coincide con "
+                                 f"ESQUEMAS: {actual} — registrar una versión nueva")
+            por_nombre[nombre] = por_id[i] = EsquemaBinario(i, nombre, version, campos)
+        else:
+            por_id[i] = EsquemaBinario(i, nombre, version,
+                                       tuple((clave, formato, None, None) for clave, formato in layout))
+    return por_id, por_nombre
+
+
+# Todos los ids (decodificar) y el vigente por nombre de ESQUEMAS (codificar)
+ESQUEMAS_BINARIOS, BINARIOS = armar_registro(REGISTRO, ESQUEMAS)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DECODIFICADOR
+# ═══════════════════════════════════════════════════════════════════════════
+def es_binario(payload):
+    return payload[:1] == bytes((MAGIA,))
+
+
+def decodificar(payload, timestamp="iso"):
+    """dict con la forma JSON actual de un payload binario"""
+    if not es_binario(payload) or len(payload) < CABECERA.size:
+        raise ValueError("payload no binario")
+    esquema = ESQUEMAS_BINARIOS.get(payload[1])
+    if esquema is None:
+        raise ValueError(f"id de esquema desconocido: {payload[1]}")
+    if len(payload) != esquema.tamano:
+        raise ValueError(f"{esquema.nombre} v{esquema.version}: {len(payload)} bytes, se esperaban {esquema.tamano}")
+    return esquema.decodificar(payload, timestamp)
+
+
+def a_json(payload, timestamp="iso"):
+    """Payload binario → texto JSON compacto (como lo publicaría el simulador)"""
+    return json.dumps(decodificar(payload, timestamp), separators=(",", ":"))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# VERIFICACIÓN DE VERSIONES
+# ═══════════════════════════════════════════════════════════════════════════
+def verificar_versiones():
+    """v1 y v2 de un mismo esquema en un registro: los dos decodifican"""
+    from types import SimpleNamespace
+
+    v1 = ESQUEMAS["bomba"]
+    v2 = v1 + [("frecuencia", "f2", "frecuencia", None)]  # campo nuevo en ESQUEMAS
+    registro = {1: ("bomba", 1, tuple((c[0], c[1]) for c in v1))}
+    viejo, _ = armar_registro(registro, {"bomba": v1})
+    bomba = SimpleNamespace(motor_activo=True, amperes_actuales=15.25, frecuencia=50.02)
+    payload_v1 = viejo[1].codificar(bomba, 1.0)
+
+    registro[2] = ("bomba", 2, tuple((c[0], c[1]) for c in v2))
+    try:
+        armar_registro(registro, {"bomba": v1})
+        raise AssertionError("un ESQUEMAS viejo contra v2 tendría que fallar")
+    except ValueError:
+        pass
+    por_id, por_nombre = armar_registro(registro, {"bomba": v2})
+    payload_v2 = por_nombre["bomba"].codificar(bomba, 1.0)
+    assert por_nombre["bomba"].version == 2 and not por_id[1].vigente
+    datos_v1 = por_id[payload_v1[1]].decodificar(payload_v1, "epoch")
+    datos_v2 = por_id[payload_v2[1]].decodificar(payload_v2, "epoch")
+    assert datos_v1 == {"estado": "ON", "amperes": 15.25, "voltaje": 220, "timestamp": 1.0}, datos_v1
+    assert datos_v2 == dict(datos_v1, frecuencia=50.02), datos_v2
+    try:
+        por_id[1].codificar(bomba, 1.0)
+        raise AssertionError("la versión vieja no tendría que codificar")
+    except ValueError:
+        pass
+    return datos_v1, datos_v2
+
+
+if __name__ == "__main__":
+    for datos in verificar_versiones():
+        print(f"✅ {datos}")
+    print(f"✅ {len(ESQUEMAS_BINARIOS)} ids registrados, {len(BINARIOS)} vigentes")
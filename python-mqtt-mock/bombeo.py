@@ -1,8 +1,9 @@
-import paho.mqtt.client as mqtt
 import time
 import random
 import json
 
+from planificador import Metronomo
+
 # --- CONFIGURACIÓN ---
 BROKER = "127.0.0.1"
 PORT = 1883
@@ -10,10 +11,45 @@ TOPIC_TELEMETRIA = "bombeo/santa_isabel/telemetria"
 TOPIC_COMANDOS = "bombeo/santa_isabel/comandos"
 
 # Estado interno de la simulación
-motor_activo = False
-amperes_actuales = 0.0
+class BombaState:
+    """Bomba con inercia eléctrica (arranque/parada suaves)"""
+    def __init__(self, rng=None):
+        self.motor_activo = False
+        self.amperes_actuales = 0.0
+        self.rng = rng or random  # random.Random(seed) para una corrida reproducible
+
+    def comando(self, comando):
+        if "MARCHA" in comando:
+            self.motor_activo = True
+            print(">>> INICIANDO SECUENCIA DE ARRANQUE <<<")
+        elif "PARADA" in comando:
+            self.motor_activo = False
+            print(">>> DETENIENDO MOTOR <<<")
 
-# Callbacks MQTT
+    def actualizar(self):
+        # --- LÓGICA DE SIMULACIÓN FÍSICA ---
+        if self.motor_activo:
+            # Si el motor está activo, buscamos un consumo nominal (ej: 15 Amperes)
+            # Agregamos "ruido" eléctrico normal (+- 0.5 A)
+            target = 15.0 + self.rng.uniform(-0.3, 0.5)
+
+            # Simulamos la inercia (no salta de 0 a 15 instantáneo, sube suave)
+            self.amperes_actuales = self.amperes_actuales * 0.8 + target * 0.2
+        else:
+            # Si está apagado, tiende a 0
+            self.amperes_actuales = self.amperes_actuales * 0.8
+            if self.amperes_actuales < 0.1: self.amperes_actuales = 0.0
+
+    def to_json(self):
+        # Preparamos el paquete de datos
+        return {
+            "estado": "ON" if self.motor_activo and self.amperes_actuales > 1 else "OFF",
+            "amperes": round(self.amperes_actuales, 2),
+            "voltaje": 220 if self.motor_activo else 0,
+            "timestamp": time.time()
+        }
+
+# Callbacks MQTT (userdata: la BombaState del cliente)
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
         print(f"--- BOMBA ONLINE (Broker: {BROKER}) ---")
@@ -22,61 +58,45 @@ def on_connect(client, userdata, flags, rc):
         print(f"Error de conexión: {rc}")
 
 def on_message(client, userdata, msg):
-    global motor_activo
     try:
         comando = msg.payload.decode().upper()
         print(f"📝 Comando recibido: {comando}")
-        
-        if "MARCHA" in comando:
-            motor_activo = True
-            print(">>> INICIANDO SECUENCIA DE ARRANQUE <<<")
-        elif "PARADA" in comando:
-            motor_activo = False
-            print(">>> DETENIENDO MOTOR <<<")
+        userdata.comando(comando)
             
     except Exception as e:
         print(f"Error leyendo comando: {e}")
 
 # Configuración del Cliente
-client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, "Simulador_Bomba_Industrial")
-client.on_connect = on_connect
-client.on_message = on_message
-
-try:
-    client.connect(BROKER, PORT, 60)
-    client.loop_start()
-    
-    print("Simulación iniciada. Esperando comandos...")
-    
-    while True:
-        # --- LÓGICA DE SIMULACIÓN FÍSICA ---
-        if motor_activo:
-            # Si el motor está activo, buscamos un consumo nominal (ej: 15 Amperes)
-            # Agregamos "ruido" eléctrico normal (+- 0.5 A)
-            target = 15.0 + random.uniform(-0.3, 0.5)
-            
-            # Simulamos la inercia (no salta de 0 a 15 instantáneo, sube suave)
-            amperes_actuales = amperes_actuales * 0.8 + target * 0.2
-        else:
-            # Si está apagado, tiende a 0
-            amperes_actuales = amperes_actuales * 0.8
-            if amperes_actuales < 0.1: amperes_actuales = 0.0
+def main():
+    import paho.mqtt.client as mqtt
 
-        # Preparamos el paquete de datos
-        payload = {
-            "estado": "ON" if motor_activo and amperes_actuales > 1 else "OFF",
-            "amperes": round(amperes_actuales, 2),
-            "voltaje": 220 if motor_activo else 0,
-            "timestamp": time.time()
-        }
-        
-        # Publicamos
-        client.publish(TOPIC_TELEMETRIA, json.dumps(payload))
-        # print(f"Reportando: {payload}") # Descomentar para debug
-        
-        time.sleep(1) # Reporte cada segundo
-
-except KeyboardInterrupt:
-    print("\nSimulación finalizada.")
-    client.loop_stop()
-    client.disconnect()
\ No newline at end of file
+    bomba = BombaState()
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, "Simulador_Bomba_Industrial",
+                         userdata=bomba)
+    client.on_connect = on_connect
+    client.on_message = on_message
+
+    try:
+        client.connect(BROKER, PORT, 60)
+        client.loop_start()
+
+        print("Simulación iniciada. Esperando comandos...")
+        metronomo = Metronomo(1)
+
+        while True:
+            bomba.actualizar()
+
+            # Publicamos
+            client.publish(TOPIC_TELEMETRIA, json.dumps(bomba.to_json()))
+            # print(f"Reportando: {payload}") # Descomentar para debug
+
+            metronomo.esperar() # Reporte cada segundo
+
+    except KeyboardInterrupt:
+        print("\nSimulación finalizada.")
+        client.loop_stop()
+        client.disconnect()
+
+
+if __name__ == "__main__":
+    main()
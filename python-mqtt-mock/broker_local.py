@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+BROKER MQTT 3.1.1 EN PROCESO (ASYNCIO) + LABORATORIO EN UN COMANDO
+=============================================================================
+Broker mínimo para desarrollo y pruebas de carga sin Mosquitto:
+
+- ✅ CONNECT / PUBLISH / SUBSCRIBE / UNSUBSCRIBE / PING / DISCONNECT
+- ✅ QoS 0 y QoS 1 (PUBACK); la entrega usa min(QoS publicado, QoS suscrito)
+- ✅ Comodines + y # (ArbolTopics, ver topicos.py) y mensajes retenidos
+- ✅ Last will al cortarse una conexión sin DISCONNECT
+- ✅ Fan-out: un paquete QoS 0 se arma una vez y se escribe a todos
+- ✅ Cliente lento: con el buffer de salida lleno se descartan sus QoS 0
+
+Fuera de alcance: sesiones persistentes (clean session siempre), QoS 2,
+reenvío de QoS 1 sin PUBACK, WebSockets (el dashboard sigue necesitando
+Mosquitto en el puerto 9001).
+
+Modo laboratorio: el broker, el runtime de simuladores (runtime_async) y el
+monitor en un solo comando:
+
+USO:
+    python broker_local.py                                   # sólo broker en :1883
+    python broker_local.py --solfrut 10 --cocacola 5 --bombeo 5 --monitor
+    python broker_local.py --cocacola 50 --monitor --grabar capturas/ --duracion 60
+    python broker_local.py --solfrut 200 --periodo 0.5 --sonda --monitor    # latencia p50/p95/p99
+
+=============================================================================
+"""
+
+import asyncio
+import itertools
+import signal
+import struct
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from topicos import ArbolTopics, validar_filtro
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+# CONNACK return codes (3.1.1)
+ACEPTADA, PROTOCOLO_INVALIDO, ID_RECHAZADO, NO_AUTORIZADO = 0, 1, 2, 5
+
+MAX_BUFFER_SALIDA = 8 << 20  # bytes pendientes por cliente antes de descartar QoS 0
+
+_U16 = struct.Struct("!H")
+
+
+def _largo_restante(n):
+    """Codificación variable del remaining length"""
+    salida = bytearray()
+    while True:
+        byte, n = n % 128, n // 128
+        salida.append(byte | 0x80 if n else byte)
+        if not n:
+            return bytes(salida)
+
+
+def _cadena(datos, i):
+    largo = _U16.unpack_from(datos, i)[0]
+    return bytes(datos[i + 2:i + 2 + largo]), i + 2 + largo
+
+
+def paquete_publish(topic, payload, qos=0, retain=False, packet_id=None, dup=False):
+    topic = topic.encode() if isinstance(topic, str) else topic
+    variable = _U16.pack(len(topic)) + topic
+    if qos:
+        variable += _U16.pack(packet_id)
+    cabecera = (PUBLISH << 4) | (dup << 3) | (qos << 1) | retain
+    return bytes((cabecera,)) + _largo_restante(len(variable) + len(payload)) + variable + payload
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SESIÓN (UNA CONEXIÓN TCP)
+# ═══════════════════════════════════════════════════════════════════════════
+class SesionMQTT(asyncio.Protocol):
+    """Parsea paquetes del buffer de entrada y atiende cada tipo"""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.transport = None
+        self.buffer = bytearray()
+        self.client_id = None
+        self.will = None
+        self.keepalive = 0
+        self.ultimo_rx = time.monotonic()
+        self._ids = itertools.count(1)
+        self.inflight = {}  # packet id → topic (QoS 1 sin PUBACK)
+        self.descartados = 0
+
+    # ───────────────────────────────────────────────────────────────────────
+    # TRANSPORTE
+    # ───────────────────────────────────────────────────────────────────────
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=MAX_BUFFER_SALIDA)
+
+    def connection_lost(self, exc):
+        if self.will is not None:
+            self.broker.publicar(*self.will)
+        self.broker.desconectar(self)
+
+    def data_received(self, data):
+        self.buffer += data
+        self.ultimo_rx = time.monotonic()
+        datos = self.buffer
+        i = 0
+        fin = len(datos)
+        while i + 2 <= fin:
+            # Fixed header: tipo/flags + remaining length (1 a 4 bytes)
+            largo, multiplicador, j, completo = 0, 1, i + 1, False
+            while j < fin and j < i + 5:
+                byte = datos[j]
+                j += 1
+                largo += (byte & 0x7F) * multiplicador
+                multiplicador *= 128
+                if not byte & 0x80:
+                    completo = True
+                    break
+            if not completo or j + largo > fin:
+                break  # paquete incompleto
+            cabecera = datos[i]
+            cuerpo = memoryview(datos)[j:j + largo]
+            try:
+                self._paquete(cabecera >> 4, cabecera & 0x0F, cuerpo)
+            except Exception as e:
+                print(f"❌ [{self.client_id}] paquete inválido: {e}")
+                cuerpo.release()
+                self.transport.close()
+                return
+            cuerpo.release()
+            i = j + largo
+            if self.transport.is_closing():
+                return
+        del self.buffer[:i]
+
+    def escribir(self, datos, descartable=False):
+        if descartable and self.transport.get_write_buffer_size() > MAX_BUFFER_SALIDA:
+            self.descartados += 1
+            return
+        self.transport.write(datos)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # PAQUETES
+    # ───────────────────────────────────────────────────────────────────────
+    def _paquete(self, tipo, flags, cuerpo):
+        if self.client_id is None and tipo != CONNECT:
+            raise ValueError(f"paquete {tipo} antes de CONNECT")
+        if tipo == PUBLISH:
+            self._publish(flags, cuerpo)
+        elif tipo == PUBACK:
+            self.inflight.pop(_U16.unpack_from(cuerpo)[0], None)
+        elif tipo == PINGREQ:
+            self.transport.write(bytes((PINGRESP << 4, 0)))
+        elif tipo == SUBSCRIBE:
+            self._subscribe(cuerpo)
+        elif tipo == UNSUBSCRIBE:
+            self._unsubscribe(cuerpo)
+        elif tipo == CONNECT:
+            self._connect(cuerpo)
+        elif tipo == DISCONNECT:
+            self.will = None
+            self.transport.close()
+        else:
+            raise ValueError(f"tipo de paquete no soportado: {tipo}")
+
+    def _connect(self, cuerpo):
+        if self.client_id is not None:
+            raise ValueError("CONNECT duplicado")
+        protocolo, i = _cadena(cuerpo, 0)
+        nivel, flags = cuerpo[i], cuerpo[i + 1]
+        self.keepalive = _U16.unpack_from(cuerpo, i + 2)[0]
+        i += 4
+        if protocolo not in (b"MQTT", b"MQIsdp") or nivel not in (3, 4):
+            self._connack(PROTOCOLO_INVALIDO)
+            return
+        client_id, i = _cadena(cuerpo, i)
+        will = None
+        if flags & 0x04:  # will flag
+            will_topic, i = _cadena(cuerpo, i)
+            will_payload, i = _cadena(cuerpo, i)
+            will = (will_topic.decode(), will_payload, (flags >> 3) & 0x03, bool(flags & 0x20))
+        usuario = password = None
+        if flags & 0x80:
+            usuario, i = _cadena(cuerpo, i)
+        if flags & 0x40:
+            password, i = _cadena(cuerpo, i)
+        if not self.broker.autorizar(usuario, password):
+            self._connack(NO_AUTORIZADO)
+            return
+        self.will = will  # sólo un cliente autorizado deja last will
+        self.client_id = client_id.decode() or f"auto-{id(self):x}"
+        self.broker.conectar(self)
+        self._connack(ACEPTADA)
+
+    def _connack(self, codigo):
+        self.transport.write(bytes((CONNACK << 4, 2, 0, codigo)))
+        if codigo != ACEPTADA:
+            self.transport.close()
+
+    def _publish(self, flags, cuerpo):
+        qos = (flags >> 1) & 0x03
+        largo_topic = _U16.unpack_from(cuerpo)[0]
+        topic = bytes(cuerpo[2:2 + largo_topic]).decode()
+        i = 2 + largo_topic
+        if qos:
+            packet_id = _U16.unpack_from(cuerpo, i)[0]
+            i += 2
+        if qos > 1:
+            raise ValueError("QoS 2 no soportado")
+        self.broker.publicar(topic, bytes(cuerpo[i:]), qos, bool(flags & 0x01))
+        if qos == 1:
+            self.transport.write(bytes((PUBACK << 4, 2)) + _U16.pack(packet_id))
+
+    def _subscribe(self, cuerpo):
+        packet_id = _U16.unpack_from(cuerpo)[0]
+        i, codigos = 2, bytearray()
+        suscritos = []
+        while i < len(cuerpo):
+            filtro, i = _cadena(cuerpo, i)
+            qos = min(cuerpo[i] & 0x03, 1)
+            i += 1
+            filtro = filtro.decode()
+            if validar_filtro(filtro):
+                self.broker.suscribir(self, filtro, qos)
+                suscritos.append((filtro, qos))
+                codigos.append(qos)
+            else:
+                codigos.append(0x80)
+        self.transport.write(bytes((SUBACK << 4,)) + _largo_restante(2 + len(codigos))
+                             + _U16.pack(packet_id) + codigos)
+        for filtro, qos in suscritos:
+            self.broker.enviar_retenidos(self, filtro, qos)
+
+    def _unsubscribe(self, cuerpo):
+        packet_id = _U16.unpack_from(cuerpo)[0]
+        i = 2
+        while i < len(cuerpo):
+            filtro, i = _cadena(cuerpo, i)
+            self.broker.desuscribir(self, filtro.decode())
+        self.transport.write(bytes((UNSUBACK << 4, 2)) + _U16.pack(packet_id))
+
+    def entregar(self, topic, payload, qos, retain=False, paquete=None):
+        """Envía un PUBLISH (paquete QoS 0 ya armado si se comparte entre sesiones)"""
+        if qos == 0:
+            self.escribir(paquete or paquete_publish(topic, payload, 0, retain), descartable=True)
+            return
+        packet_id = next(self._ids) % 65535 + 1
+        self.inflight[packet_id] = topic
+        self.escribir(paquete_publish(topic, payload, 1, retain, packet_id))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BROKER
+# ═══════════════════════════════════════════════════════════════════════════
+class BrokerMQTT:
+    """Sesiones, suscripciones (trie) y retenidos"""
+
+    def __init__(self, host="0.0.0.0", port=1883, usuario=None, password=None):
+        self.host = host
+        self.port = port
+        self.usuario = usuario
+        self.password = password
+        self.sesiones = {}  # client_id → SesionMQTT
+        self.suscripciones = ArbolTopics(combinar=max)  # filtro → {sesión: qos}
+        self.retenidos = {}  # topic → (payload, qos)
+        self.recibidos = 0
+        self.entregados = 0
+        self.server = None
+        self.tareas = []
+
+    def autorizar(self, usuario, password):
+        if self.usuario is None:
+            return True
+        return usuario == self.usuario.encode() and password == (self.password or "").encode()
+
+    def conectar(self, sesion):
+        previa = self.sesiones.get(sesion.client_id)
+        if previa is not None:
+            # Mismo client id: se cierra la sesión anterior (MQTT-3.1.4-2)
+            previa.will = None
+            self.desconectar(previa)
+            previa.transport.close()
+        self.sesiones[sesion.client_id] = sesion
+
+    def desconectar(self, sesion):
+        if self.sesiones.get(sesion.client_id) is sesion:
+            del self.sesiones[sesion.client_id]
+        self.suscripciones.quitar_valor(sesion)
+
+    def suscribir(self, sesion, filtro, qos):
+        self.suscripciones.agregar(filtro, sesion, qos)
+
+    def desuscribir(self, sesion, filtro):
+        self.suscripciones.quitar(filtro, sesion)
+
+    def enviar_retenidos(self, sesion, filtro, qos):
+        arbol = ArbolTopics()
+        arbol.agregar(filtro, True)
+        for topic, (payload, qos_msg) in self.retenidos.items():
+            if arbol.buscar(topic):
+                sesion.entregar(topic, payload, min(qos, qos_msg), retain=True)
+
+    def publicar(self, topic, payload, qos=0, retain=False):
+        self.recibidos += 1
+        if retain:
+            if payload:
+                self.retenidos[topic] = (payload, qos)
+            else:
+                self.retenidos.pop(topic, None)
+        destinos = self.suscripciones.buscar(topic)
+        if not destinos:
+            return
+        paquete_qos0 = None
+        for sesion, qos_sub in destinos.items():
+            qos_entrega = min(qos, qos_sub)
+            if qos_entrega == 0 and paquete_qos0 is None:
+                paquete_qos0 = paquete_publish(topic, payload)
+            sesion.entregar(topic, payload, qos_entrega, paquete=paquete_qos0)
+        self.entregados += len(destinos)
+
+    async def iniciar(self, estadisticas=True):
+        """Abre el puerto y lanza las tareas de keepalive / estadísticas"""
+        loop = asyncio.get_running_loop()
+        self.server = await loop.create_server(lambda: SesionMQTT(self), self.host, self.port,
+                                               reuse_address=True)
+        self.tareas.append(asyncio.create_task(self._vigilar_keepalive()))
+        if estadisticas:
+            self.tareas.append(asyncio.create_task(self._estadisticas()))
+        print(f"📡 Broker MQTT 3.1.1 escuchando en {self.host}:{self.port}")
+        return self
+
+    def cerrar(self):
+        for tarea in self.tareas:
+            tarea.cancel()
+        self.server.close()
+        for sesion in list(self.sesiones.values()):
+            sesion.transport.close()
+
+    async def _vigilar_keepalive(self):
+        while True:
+            await asyncio.sleep(5)
+            ahora = time.monotonic()
+            for sesion in list(self.sesiones.values()):
+                if sesion.keepalive and ahora - sesion.ultimo_rx > 1.5 * sesion.keepalive:
+                    print(f"⏱️  [{sesion.client_id}] keepalive vencido")
+                    sesion.transport.close()
+
+    async def _estadisticas(self, intervalo=5.0):
+        previos, t_prev = (self.recibidos, self.entregados), time.monotonic()
+        while True:
+            await asyncio.sleep(intervalo)
+            ahora = time.monotonic()
+            dt = ahora - t_prev
+            descartados = sum(s.descartados for s in self.sesiones.values())
+            print(f"[{datetime.now():%H:%M:%S}] 📡 broker | {len(self.sesiones)} clientes"
+                  f" | {(self.recibidos - previos[0]) / dt:,.0f} msg/s in"
+                  f" | {(self.entregados - previos[1]) / dt:,.0f} msg/s out"
+                  f" | {len(self.retenidos)} retenidos | {descartados} descartados")
+            previos, t_prev = (self.recibidos, self.entregados), ahora
+
+    async def correr(self, estadisticas=True):
+        await self.iniciar(estadisticas)
+        try:
+            await self.server.serve_forever()
+        finally:
+            self.cerrar()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LABORATORIO: BROKER + SIMULADORES + MONITOR
+# ═══════════════════════════════════════════════════════════════════════════
+async def laboratorio(args):
+    broker = BrokerMQTT(args.host, args.port, args.user, args.password)
+    await broker.iniciar()
+
+    monitor = None
+    if args.monitor:
+        # El monitor es un proceso aparte (loop paho propio), apuntado a este broker
+        comando = [sys.executable, "monitor_mqtt.py", "--broker", "127.0.0.1",
+                   "--port", str(args.port), "--sin-tls", "--user", args.user or "",
+                   "--password", args.password or "", "--topics", *args.topics]
+        if args.grabar:
+            comando += ["--grabar", args.grabar]
+        elif args.sonda:
+            comando += ["--latencia"]
+        monitor = subprocess.Popen(comando, cwd=sys.path[0] or ".")
+
+    try:
+        if args.solfrut or args.cocacola or args.bombeo or args.bombeo_full:
+            from runtime_async import armar_runtime
+            args.broker = "127.0.0.1"
+            args.tls = False
+            runtime = armar_runtime(args)
+            print(f"🚀 Runtime asyncio: {len(runtime.dispositivos):,} dispositivos virtuales")
+            await runtime.correr(args.duracion, estadisticas=True)
+        elif args.duracion:
+            await asyncio.sleep(args.duracion)
+        else:
+            await asyncio.sleep(float("inf"))
+    finally:
+        broker.cerrar()
+        if monitor:
+            # SIGINT: el monitor corta por KeyboardInterrupt y cierra la grabación (índice + resumen)
+            monitor.send_signal(signal.SIGINT)
+            monitor.wait()
+
+
+def main():
+    from runtime_async import parser_argumentos, validar_argumentos
+    parser = parser_argumentos(__doc__)
+    parser.set_defaults(client_id="Laboratorio_Simulador")
+    parser.add_argument("--host", default="0.0.0.0", help="interfaz donde escucha el broker")
+    parser.add_argument("--monitor", action="store_true", help="lanzar monitor_mqtt.py contra el broker")
+    parser.add_argument("--topics", nargs="+", default=["#"], help="filtros del monitor")
+    parser.add_argument("--grabar", metavar="DIR", help="monitor en modo grabador")
+    args = parser.parse_args()
+    validar_argumentos(parser, args)
+    try:
+        asyncio.run(laboratorio(args))
+    except KeyboardInterrupt:
+        print("\n🛑 Laboratorio detenido")
+
+
+if __name__ == "__main__":
+    main()
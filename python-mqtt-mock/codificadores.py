@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+CODIFICADORES DE PAYLOAD PRECOMPILADOS + RELOJ POR TICK
+=============================================================================
+Reemplaza el camino `json.dumps(x.to_json())` en el hot path:
+
+- ✅ Orden de campos fijo por tipo de dispositivo (ESQUEMAS)
+- ✅ Formateadores compilados UNA vez (se genera el código de una función
+       que arma el JSON con un único `plantilla % (...)`)
+- ✅ Un timestamp por tick, compartido por todos los dispositivos (RelojTick)
+- ✅ Modo timestamp ISO (default, como los simuladores), epoch en segundos
+       (como bombeo.py) o epoch en milisegundos (entero)
+- ✅ Timestamp por esquema como su script original: bomba siempre epoch
+       (time.time() de bombeo.py); bomba_full y planta_general sin
+       timestamp (bombeo_full.py no lo manda)
+- ✅ Camino columnar: codifica una FlotaMotores completa desde sus arrays
+
+El JSON resultante es compacto (sin espacios) y los floats salen con
+decimales fijos ("%.2f"): mismos valores que round(x, 2).
+
+USO:
+    reloj = RelojTick("epoch_ms")
+    reloj.tick()
+    payload = CODIFICADORES["motor_cocacola"].codificar(motor, reloj.json)
+
+=============================================================================
+"""
+
+from datetime import datetime
+
+from reloj_virtual import RELOJ_REAL
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RELOJ COMPARTIDO
+# ═══════════════════════════════════════════════════════════════════════════
+MODOS_TIMESTAMP = ("iso", "epoch", "epoch_ms")
+
+
+def _timestamp_json(ahora, modo):
+    if modo == "iso":
+        return '"' + datetime.fromtimestamp(ahora).isoformat() + '"'
+    if modo == "epoch_ms":
+        return str(int(ahora * 1000))
+    return repr(ahora)
+
+
+def convertir_timestamp(valor, modo):
+    """Timestamp ya decodificado de un JSON (ISO, epoch o epoch_ms) → el mismo instante en `modo`"""
+    if isinstance(valor, str):
+        ahora = datetime.fromisoformat(valor).timestamp()
+    elif isinstance(valor, int):
+        ahora = valor / 1000
+    else:
+        ahora = valor
+    if modo == "iso":
+        return datetime.fromtimestamp(ahora).isoformat()
+    return int(ahora * 1000) if modo == "epoch_ms" else float(ahora)
+
+
+class RelojTick:
+    """Timestamp calculado una vez por tick y compartido por toda la flota"""
+
+    def __init__(self, modo="iso", resolucion=0.001, fuente=None):
+        if modo not in MODOS_TIMESTAMP:
+            raise ValueError(f"modo de timestamp inválido: {modo}")
+        self.modo = modo
+        self.fuente = fuente or RELOJ_REAL  # RELOJ_REAL o RelojVirtual
+        self.resolucion = resolucion
+        self.ahora = 0.0
+        self.json = ""
+        self._otros = {}  # modo → timestamp JSON del tick (esquemas con modo propio)
+        self.tick()
+
+    def tick(self, ahora=None):
+        """Fija el instante del tick. Retorna el timestamp ya codificado en JSON"""
+        self.ahora = self.fuente.time() if ahora is None else ahora
+        self.json = _timestamp_json(self.ahora, self.modo)
+        self._otros = {}
+        return self.json
+
+    def actual(self, modo=None):
+        """Timestamp JSON, recalculado sólo si pasó más de `resolucion`
+
+        modo: el de un esquema con timestamp propio (TIMESTAMP_PROPIO); None → el del reloj
+        """
+        ahora = self.fuente.time()
+        if ahora - self.ahora >= self.resolucion:
+            self.tick(ahora)
+        if modo is None or modo == self.modo:
+            return self.json
+        texto = self._otros.get(modo)
+        if texto is None:
+            texto = self._otros[modo] = _timestamp_json(self.ahora, modo)
+        return texto
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ESQUEMAS (orden fijo de campos)
+# ═══════════════════════════════════════════════════════════════════════════
+# Campo: (clave JSON, formato, atributo del objeto, columna de FlotaMotores)
+# Formato: "f1"/"f2" decimales | "int" | "raw" (repr) | "bool" (true/false)
+#          (on, off) → texto según el valor de verdad
+ON_OFF = ("ON", "OFF")
+
+_MOTOR_COCACOLA = [
+    ("estado", ON_OFF, "running", "running"),
+    ("corriente", "f2", "corriente_actual", "corriente"),
+    ("velocidad", "f1", "velocidad", "velocidad"),
+    ("temperatura", "f1", "temperatura", "temperatura"),
+    ("vibracion", "f2", "vibracion", "vibracion"),
+    ("horas_operacion", "raw", "horas_operacion", "horas"),
+]
+
+ESQUEMAS = {
+    "motor_solfrut": [
+        ("estado", ON_OFF, "running", "running"),
+        ("falla", ("SI", "NO"), "falla", "falla"),
+        ("corriente", "f2", "corriente_actual", "corriente"),
+    ],
+    "motor_cocacola": _MOTOR_COCACOLA,
+    "compresor": _MOTOR_COCACOLA + [
+        ("presion", "f2", "presion", "presion"),
+    ],
+    "enfriador": _MOTOR_COCACOLA + [
+        ("temp_entrada", "f1", "temp_entrada", "temp_entrada"),
+        ("temp_salida", "f1", "temp_salida", "temp_salida"),
+    ],
+    "reconectador": [
+        ("estado", ("CLOSED", "OPEN"), "cerrado", None),
+        ("voltaje_L1", "f1", "v_l1", None),
+        ("voltaje_L2", "f1", "v_l2", None),
+        ("voltaje_L3", "f1", "v_l3", None),
+        ("frecuencia", "f2", "frecuencia", None),
+        ("corriente_total", "f1", "corriente_total", None),
+        ("sobrecorriente", "bool", 'protecciones["sobrecorriente"]', None),
+        ("sobretension", "bool", 'protecciones["sobretension"]', None),
+        ("bajatension", "bool", 'protecciones["bajatension"]', None),
+        ("desequilibrio", "bool", 'protecciones["desequilibrio"]', None),
+    ],
+    "reco_solfrut": [
+        ("estado", ON_OFF, "cerrado", None),
+    ],
+    "bomba": [
+        ("estado", ON_OFF, "motor_activo and o.amperes_actuales > 1", None),
+        ("amperes", "f2", "amperes_actuales", None),
+        ("voltaje", "int", "motor_activo * 220", None),
+    ],
+    "bomba_full": [
+        ("estado", ON_OFF, "bomba_activa", None),
+        ("amperes", "f2", "amperes", None),
+        ("voltaje", "f1", "voltaje", None),
+        ("temp", "f1", "temp_motor", None),
+        ("presion", "f2", "presion", None),
+        ("vibracion", "f2", "vibracion", None),
+    ],
+    "planta_general": [
+        ("estado", ON_OFF, "luces_activas", None),
+        ("temp_amb", "f1", "temp_amb", None),
+        ("humedad", "raw", "humedad", None),
+        ("nivel_tanque", "int", "nivel_tanque", None),
+        ("consumo_kwh", "f2", "consumo_kwh", None),
+    ],
+}
+
+# Timestamp como lo mandaba el script original de cada esquema; el resto usa
+# el modo del RelojTick (--timestamp)
+TIMESTAMP_PROPIO = {"bomba": "epoch"}  # bombeo.py: time.time()
+SIN_TIMESTAMP = {"bomba_full", "planta_general"}  # bombeo_full.py no manda timestamp
+
+_PLANTILLA = {"f1": "%.1f", "f2": "%.2f", "int": "%d", "raw": "%r", "bool": "%s"}
+
+
+def _expresion(formato, valor):
+    if isinstance(formato, tuple):
+        return f'("{formato[0]}" if {valor} else "{formato[1]}")'
+    if formato == "bool":
+        return f'("true" if {valor} else "false")'
+    if formato == "raw":
+        return f"float({valor})"
+    return valor
+
+
+def _formato(formato):
+    return '"%s"' if isinstance(formato, tuple) else _PLANTILLA[formato]
+
+
+def _plantilla(campos, con_timestamp=True):
+    partes = [f'"{clave}":{_formato(formato)}' for clave, formato, _, _ in campos]
+    if con_timestamp:
+        partes.append('"timestamp":%s')
+    return "{" + ",".join(partes) + "}"
+
+
+def _plantilla_lote(nombre, campos):
+    """Sólo valores, sin claves ni timestamp: ["esquema",v1,v2,...] (ver lotes.py)"""
+    return "[" + ",".join([f'"{nombre}"'] + [_formato(f) for _, f, _, _ in campos]) + "]"
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CODIFICADOR
+# ═══════════════════════════════════════════════════════════════════════════
+class Codificador:
+    """Codificador JSON compilado para un esquema"""
+
+    def __init__(self, nombre, campos):
+        self.nombre = nombre
+        self.campos = campos
+        self.con_timestamp = nombre not in SIN_TIMESTAMP
+        self.modo_timestamp = TIMESTAMP_PROPIO.get(nombre)  # None → el del RelojTick
+        self.plantilla = _plantilla(campos, self.con_timestamp)
+        self.codificar = self._compilar_objeto()
+        self.codificar_lote = self._compilar_lote()
+        self.codificar_columnas = self._compilar_columnas()
+        self.valores = self._compilar_valores()
+        # Campos con banda muerta numérica (texto / bool → comparación exacta)
+        self.numericos = tuple(not isinstance(f, tuple) and f != "bool" for _, f, _, _ in campos)
+        self.claves_numericas = tuple((i, c[0]) for i, c in enumerate(campos) if self.numericos[i])
+
+    def _compilar_objeto(self):
+        valores = "".join(_expresion(f, "o." + a) + ", " for _, f, a, _ in self.campos)
+        ts = "ts" if self.con_timestamp else ""
+        fuente = f"def codificar(o, ts):\n    return P % ({valores}{ts})\n"
+        entorno = {"P": self.plantilla}
+        exec(compile(fuente, f"<codificador {self.nombre}>", "exec"), entorno)
+        return entorno["codificar"]
+
+    def _compilar_lote(self):
+        valores = "".join(_expresion(f, "o." + a) + ", " for _, f, a, _ in self.campos)
+        fuente = f"def codificar_lote(o):\n    return P % ({valores})\n"
+        entorno = {"P": _plantilla_lote(self.nombre, self.campos)}
+        exec(compile(fuente, f"<codificador lote {self.nombre}>", "exec"), entorno)
+        return entorno["codificar_lote"]
+
+    def _compilar_valores(self):
+        """Tupla de valores crudos (sin formatear), para report-by-exception"""
+        valores = "".join(f"o.{a}, " for _, _, a, _ in self.campos)
+        fuente = f"def valores(o):\n    return ({valores})\n"
+        entorno = {}
+        exec(compile(fuente, f"<valores {self.nombre}>", "exec"), entorno)
+        return entorno["valores"]
+
+    def _compilar_columnas(self):
+        if any(c is None for _, _, _, c in self.campos):
+            return None
+        nombres = [f"c{i}" for i in range(len(self.campos))]
+        valores = "".join(_expresion(f, n) + ", " for (_, f, _, _), n in zip(self.campos, nombres))
+        ts = "ts" if self.con_timestamp else ""
+        fuente = (f"def codificar_columnas(cols, ts):\n"
+                  f"    return [P % ({valores}{ts}) for {', '.join(nombres)} in zip(*cols)]\n")
+        entorno = {"P": self.plantilla}
+        exec(compile(fuente, f"<codificador columnas {self.nombre}>", "exec"), entorno)
+        return entorno["codificar_columnas"]
+
+    def codificar_flota(self, flota, indices, ts):
+        """Payloads de las filas `indices` de una FlotaMotores (un tolist por columna)"""
+        cols = [getattr(flota, columna)[indices].tolist() for _, _, _, columna in self.campos]
+        return self.codificar_columnas(cols, ts)
+
+
+CODIFICADORES = {nombre: Codificador(nombre, campos) for nombre, campos in ESQUEMAS.items()}
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+ESTADÍSTICAS EN STREAMING POR TOPIC Y DATAKEY (MONITOR)
+=============================================================================
+Agregación de memoria constante para `monitor_mqtt.py`:
+
+- ✅ Por topic: msg/s, bytes/s, histograma de tamaño de payload (buckets
+       potencia de 2), "visto hace" (staleness)
+- ✅ Por dataKey numérico (claves anidadas con punto, como payloadParser.js):
+       min / max / media / EWMA
+- ✅ El thread de red de paho sólo encola (t, topic, payload); el parseo
+       JSON y la agregación corren una vez por refresco en el thread principal
+- ✅ Costo acotado: con más de `max_parseo` mensajes por refresco los
+       dataKeys se muestrean (conteos, bytes e histograma siguen exactos)
+- ✅ Lotes de planta (<tenant>/planta/lote, ver lotes.py): el topic del
+       lote cuenta los bytes reales y cada dispositivo aparece como su propio
+       topic (marcado "lote"), con sus mensajes y dataKeys
+- ✅ Payloads binarios (binario.py) se decodifican a su forma JSON
+
+USO:
+    agregador = AgregadorTopics()
+    client.on_message = lambda c, u, m: agregador.registrar(m.topic, m.payload)
+    while True:
+        time.sleep(1)
+        agregador.procesar()
+        agregador.imprimir()
+
+=============================================================================
+"""
+
+import collections
+import json
+import time
+from datetime import datetime
+
+from binario import decodificar, es_binario
+from lotes import desempaquetar, es_lote
+
+BUCKETS = 16           # tamaños 1 B .. 32 KiB (el último acumula el resto)
+BARRAS = " ▁▂▃▄▅▆▇█"
+IGNORADOS = ("timestamp", "seq", "t_envio")  # campos de control, no telemetría
+
+
+class EstadisticaCampo:
+    """min / max / media / EWMA de un dataKey numérico"""
+    __slots__ = ("n", "minimo", "maximo", "media", "ewma")
+
+    def __init__(self):
+        self.n = 0
+        self.minimo = float("inf")
+        self.maximo = float("-inf")
+        self.media = 0.0
+        self.ewma = None
+
+    def agregar(self, valor, alfa):
+        self.n += 1
+        if valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+        self.media += (valor - self.media) / self.n
+        self.ewma = valor if self.ewma is None else self.ewma + alfa * (valor - self.ewma)
+
+
+class EstadisticaTopic:
+    __slots__ = ("mensajes", "bytes", "histograma", "ultimo", "campos",
+                 "tasa", "tasa_bytes", "desempaquetado", "_previos")
+
+    def __init__(self, desempaquetado=False):
+        self.desempaquetado = desempaquetado  # dispositivo que llega dentro de un lote
+        self.mensajes = 0
+        self.bytes = 0
+        self.histograma = [0] * BUCKETS
+        self.ultimo = 0.0
+        self.campos = {}
+        self.tasa = self.tasa_bytes = 0.0
+        self._previos = (0, 0)
+
+    def sparkline(self):
+        """Histograma de tamaños como barras (sólo el rango con datos)"""
+        if self.desempaquetado:
+            return "lote"
+        usados = [i for i, c in enumerate(self.histograma) if c]
+        if not usados:
+            return ""
+        tramo = self.histograma[usados[0]:usados[-1] + 1]
+        pico = max(tramo)
+        return f"{1 << max(usados[0] - 1, 0)}B " + "".join(
+            BARRAS[min(8, -(-c * 8 // pico))] for c in tramo) + f" {1 << usados[-1]}B"
+
+
+def numericos(data, prefijo=""):
+    """(dataKey, valor) de los campos numéricos, aplanando objetos con '.'"""
+    for clave, valor in data.items():
+        if type(valor) in (int, float):
+            if not prefijo and clave in IGNORADOS:
+                continue
+            yield prefijo + clave, valor
+        elif isinstance(valor, dict):
+            yield from numericos(valor, prefijo + clave + ".")
+
+
+class AgregadorTopics:
+    """Estadísticas por topic/dataKey actualizadas en lote"""
+
+    def __init__(self, alfa=0.1, max_parseo=20_000):
+        self.alfa = alfa
+        self.max_parseo = max_parseo  # JSON parseados por refresco, como máximo
+        self.muestreo = 1
+        self.topics = {}
+        self.pendientes = collections.deque()
+        self.total = 0
+        self.no_json = 0
+        self._t_tasa = time.monotonic()
+
+    def registrar(self, topic, payload):
+        # Hot path (thread de red): sin parseo
+        self.pendientes.append((time.monotonic(), topic, payload))
+
+    def procesar(self):
+        """Agrega los mensajes encolados y recalcula tasas. Conteos, bytes e
+        histograma son exactos; si hay más de `max_parseo` mensajes encolados,
+        los campos numéricos se muestrean (1 de cada `muestreo`)"""
+        sacar = self.pendientes.popleft
+        n = len(self.pendientes)
+        self.muestreo = max(1, -(-n // self.max_parseo))
+        for _ in range(n):
+            t, topic, payload = sacar()
+            estado = self.topics.get(topic)
+            if estado is None:
+                estado = self.topics[topic] = EstadisticaTopic()
+            largo = len(payload)
+            estado.mensajes += 1
+            estado.bytes += largo
+            estado.histograma[min(largo.bit_length(), BUCKETS - 1)] += 1
+            estado.ultimo = t
+            if es_lote(topic):
+                self._desempaquetar(t, topic, payload)  # siempre: definen los conteos por dispositivo
+                continue
+            if estado.mensajes % self.muestreo:
+                continue
+            try:
+                if es_binario(payload):
+                    data = decodificar(payload)
+                elif payload[:1] == b"{":
+                    data = json.loads(payload)
+                else:
+                    raise ValueError("payload de texto")
+            except ValueError:
+                self.no_json += 1
+                continue
+            self._agregar_campos(estado, data)
+
+        ahora = time.monotonic()
+        dt = ahora - self._t_tasa
+        if dt > 0:
+            self._t_tasa = ahora
+            for estado in self.topics.values():
+                mensajes, bytes_ = estado._previos
+                estado.tasa = (estado.mensajes - mensajes) / dt
+                estado.tasa_bytes = (estado.bytes - bytes_) / dt
+                estado._previos = (estado.mensajes, estado.bytes)
+
+    def _agregar_campos(self, estado, data):
+        campos = estado.campos
+        alfa = self.alfa
+        for clave, valor in numericos(data):
+            campo = campos.get(clave)
+            if campo is None:
+                campo = campos[clave] = EstadisticaCampo()
+            campo.agregar(valor, alfa)
+        self.total += 1
+
+    def _desempaquetar(self, t, topic, payload):
+        """Un registro por dispositivo del lote, bajo su topic original"""
+        try:
+            registros = desempaquetar(topic, payload)
+        except (ValueError, KeyError, IndexError):
+            self.no_json += 1
+            return
+        for topic_dispositivo, data in registros:
+            estado = self.topics.get(topic_dispositivo)
+            if estado is None:
+                estado = self.topics[topic_dispositivo] = EstadisticaTopic(desempaquetado=True)
+            estado.mensajes += 1
+            estado.ultimo = t
+            self._agregar_campos(estado, data)
+
+    def imprimir(self, filas=20, campos=20, en_lugar=True):
+        """Tabla refrescada en el lugar (ANSI): topics más activos y sus dataKeys"""
+        ahora = time.monotonic()
+        lineas = []
+        en_red = [e for e in self.topics.values() if not e.desempaquetado]  # sin contar dos veces los lotes
+        tasa = sum(e.tasa for e in en_red)
+        tasa_bytes = sum(e.tasa_bytes for e in en_red)
+        lineas.append(f"[{datetime.now():%H:%M:%S}] 📊 {len(self.topics)} topics | {tasa:,.0f} msg/s"
+                      f" | {tasa_bytes / 1024:,.1f} KiB/s | {self.no_json} no JSON"
+                      + (f" | dataKeys muestreados 1/{self.muestreo}" if self.muestreo > 1 else ""))
+        lineas.append(f"{'TOPIC':<46} {'MSG/S':>7} {'B/S':>9} {'VISTO':>7}  TAMAÑOS")
+        activos = sorted(self.topics.items(), key=lambda kv: kv[1].tasa, reverse=True)[:filas]
+        for topic, e in activos:
+            lineas.append(f"{topic[-46:]:<46} {e.tasa:>7.1f} {e.tasa_bytes:>9,.0f}"
+                          f" {ahora - e.ultimo:>6.1f}s  {e.sparkline()}")
+        lineas.append("")
+        lineas.append(f"{'TOPIC · DATAKEY':<56} {'MIN':>9} {'MAX':>9} {'MEDIA':>9} {'EWMA':>9}")
+        mostrados = 0
+        for topic, e in activos:
+            for clave, c in e.campos.items():
+                if mostrados >= campos:
+                    break
+                nombre = f"{topic.rsplit('/', 1)[0][-36:]} · {clave}"
+                lineas.append(f"{nombre[-56:]:<56} {c.minimo:>9.2f} {c.maximo:>9.2f}"
+                              f" {c.media:>9.2f} {c.ewma:>9.2f}")
+                mostrados += 1
+        salida = "\n".join(lineas)
+        if en_lugar:
+            salida = "\x1b[H\x1b[2J" + salida  # cursor al inicio + limpiar pantalla
+        print(salida, flush=True)
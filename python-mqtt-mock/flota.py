@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+MOTOR DE FLOTA VECTORIZADO (NumPy)
+=============================================================================
+Modela miles de motores como struct-of-arrays: corriente, velocidad,
+temperatura, vibración, presión y temperaturas del enfriador viven en
+arrays de NumPy y la física se aplica a TODA la flota en un solo paso.
+
+FÍSICA (idéntica a simulador_cocacola.py / simulador_solfrut.py):
+- ✅ Rampa de arranque (pico % nominal durante N segundos)
+- ✅ Factor de turno (día 100% / noche 40-60% / fin de semana 30%)
+- ✅ Modelo térmico + vibración proporcional a velocidad
+- ✅ Ciclo de presión del compresor y carga térmica del enfriador
+- ✅ Fallas aleatorias en lote (Solfrut) o por eventos (inyector_fallas.py)
+
+Las clases MotorState / CompresorState / EnfriadorState de los simuladores
+son vistas livianas (VistaMotor) sobre una fila de la flota.
+
+USO:
+    flota = FlotaMotores(seed=42)
+    idx = flota.agregar(nominal=62.5, maximo=90.0)
+    flota.arrancar(idx)
+    flota.paso()
+
+    # Reloj inyectable (ver reloj_virtual.py): turno, rampa y enfriador
+    # usan flota.reloj en vez de time.time() / datetime.now()
+    flota = FlotaMotores(reloj=RelojVirtual(velocidad=3600))
+
+    python flota.py 100000     # benchmark de pasos/seg
+
+=============================================================================
+"""
+
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from reloj_virtual import RELOJ_REAL
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TIPOS Y MODELOS
+# ═══════════════════════════════════════════════════════════════════════════
+TIPO_MOTOR = 0
+TIPO_COMPRESOR = 1
+TIPO_ENFRIADOR = 2
+
+# rampa: segundos de arranque | pico: múltiplo del nominal al final de la rampa
+# ruido: variación ± en operación | turno: aplica factor de turno
+MODELO_COCACOLA = {"rampa": 5.0, "pico": 1.5, "ruido": 0.03, "turno": True}
+MODELO_SOLFRUT = {"rampa": 3.0, "pico": 1.8, "ruido": 0.05, "turno": False}
+
+# Columnas de la flota: nombre → (dtype, valor inicial)
+COLUMNAS = {
+    "tipo": (np.int8, TIPO_MOTOR),
+    "nominal": (np.float64, 0.0),
+    "maximo": (np.float64, 0.0),
+    "rampa": (np.float64, 5.0),
+    "pico": (np.float64, 1.5),
+    "ruido": (np.float64, 0.03),
+    "usa_turno": (np.bool_, True),
+    "running": (np.bool_, False),
+    "falla": (np.bool_, False),
+    "t_arranque": (np.float64, 0.0),
+    "corriente": (np.float64, 0.0),
+    "velocidad": (np.float64, 0.0),
+    "temperatura": (np.float64, 25.0),
+    "vibracion": (np.float64, 0.0),
+    "horas": (np.float64, 0.0),
+    "presion": (np.float64, 0.0),
+    "temp_entrada": (np.float64, 25.0),
+    "temp_salida": (np.float64, 4.0),
+}
+
+
+def factor_turno(fecha, rng, n=None):
+    """Factor de carga según turno y día (escalar, o array de n si n != None)"""
+    if fecha.weekday() >= 5:
+        return 0.3 if n is None else np.full(n, 0.3)  # 30% fin de semana
+    if 6 <= fecha.hour < 18:
+        return 1.0 if n is None else np.ones(n)  # 100% turno día
+    return rng.uniform(0.4, 0.6, n)  # 40-60% turno noche
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FLOTA (STRUCT-OF-ARRAYS)
+# ═══════════════════════════════════════════════════════════════════════════
+class FlotaMotores:
+    """Flota de motores con estado en arrays; un paso actualiza a todos"""
+
+    def __init__(self, capacidad=16, seed=None, reloj=None):
+        self.n = 0
+        self.reloj = reloj or RELOJ_REAL
+        self.capacidad = max(1, capacidad)
+        self.rng = np.random.default_rng(seed)
+        for nombre, (dtype, inicial) in COLUMNAS.items():
+            setattr(self, nombre, np.full(self.capacidad, inicial, dtype=dtype))
+
+    def _crecer(self, minimo):
+        capacidad = self.capacidad
+        while capacidad < minimo:
+            capacidad *= 2
+        for nombre, (dtype, inicial) in COLUMNAS.items():
+            nuevo = np.full(capacidad, inicial, dtype=dtype)
+            nuevo[:self.n] = getattr(self, nombre)[:self.n]
+            setattr(self, nombre, nuevo)
+        self.capacidad = capacidad
+
+    def agregar_lote(self, cantidad, nominal, maximo, tipo=TIPO_MOTOR,
+                     modelo=MODELO_COCACOLA, horas=0.0):
+        """Agrega `cantidad` motores iguales. Retorna el rango de índices"""
+        inicio, fin = self.n, self.n + cantidad
+        if fin > self.capacidad:
+            self._crecer(fin)
+        self.tipo[inicio:fin] = tipo
+        self.nominal[inicio:fin] = nominal
+        self.maximo[inicio:fin] = maximo
+        self.rampa[inicio:fin] = modelo["rampa"]
+        self.pico[inicio:fin] = modelo["pico"]
+        self.ruido[inicio:fin] = modelo["ruido"]
+        self.usa_turno[inicio:fin] = modelo["turno"]
+        self.horas[inicio:fin] = horas
+        self.n = fin
+        return range(inicio, fin)
+
+    def agregar(self, nominal, maximo, tipo=TIPO_MOTOR, modelo=MODELO_COCACOLA, horas=0.0):
+        """Agrega un motor. Retorna su índice"""
+        return self.agregar_lote(1, nominal, maximo, tipo, modelo, horas)[0]
+
+    # ───────────────────────────────────────────────────────────────────────
+    # ENTRADAS DIGITALES (aceptan índice escalar, lista o máscara)
+    # ───────────────────────────────────────────────────────────────────────
+    def arrancar(self, indices, ahora=None):
+        self.running[indices] = True
+        self.falla[indices] = False
+        self.t_arranque[indices] = self.reloj.time() if ahora is None else ahora
+
+    def detener(self, indices):
+        self.running[indices] = False
+        self.corriente[indices] = 0.0
+        self.velocidad[indices] = 0.0
+
+    def fallar(self, indices):
+        self.falla[indices] = True
+        self.running[indices] = False
+        self.corriente[indices] = 0.0
+
+    def simular_fallas(self, probabilidad=0.01):
+        """Falla aleatoria en lote sobre los motores en marcha. Retorna índices
+        (moneda por tick; los simuladores usan inyector_fallas.py, por eventos)"""
+        n = self.n
+        fallan = self.running[:n] & (self.rng.random(n) < probabilidad)
+        idx = np.flatnonzero(fallan)
+        self.fallar(idx)
+        return idx
+
+    # ───────────────────────────────────────────────────────────────────────
+    # PASO DE SIMULACIÓN
+    # ───────────────────────────────────────────────────────────────────────
+    def paso(self, ahora=None, indices=None):
+        """Aplica rampa, turno y modelo térmico a toda la flota (o a `indices`)"""
+        if ahora is None:
+            ahora = self.reloj.time()
+        sel = slice(0, self.n) if indices is None else np.atleast_1d(indices)
+        m = self.n if indices is None else len(sel)
+        if m == 0:
+            return
+        rng = self.rng
+        fecha = datetime.fromtimestamp(ahora)
+
+        running = self.running[sel]
+        f = np.where(self.usa_turno[sel], factor_turno(fecha, rng, m), 1.0)
+
+        # Rampa de arranque / operación normal con variación
+        rampa = self.rampa[sel]
+        t_on = ahora - self.t_arranque[sel]
+        en_rampa = t_on < rampa
+        progreso = np.clip(t_on / rampa, 0.0, 1.0)
+        variacion = rng.uniform(-1.0, 1.0, m) * self.ruido[sel]
+        nominal = self.nominal[sel]
+        corriente = np.where(en_rampa, nominal * self.pico[sel] * progreso,
+                             nominal * f * (1 + variacion))
+        velocidad = np.where(en_rampa, 100 * progreso, 100 * f * (1 + variacion * 0.5))
+
+        # Temperatura sube con carga / se enfría detenido
+        temp = self.temperatura[sel]
+        temp_objetivo = 45 + f * 20
+        temp_on = np.where(temp < temp_objetivo, temp + 0.2,
+                           temp_objetivo + rng.uniform(-2, 2, m))
+        temp = np.where(running, temp_on, np.maximum(25, temp - 0.5))
+
+        # Vibración proporcional a velocidad
+        vibracion = (velocidad / 100) * rng.uniform(1.5, 2.5, m)
+        corriente = np.minimum(corriente, self.maximo[sel])
+
+        # Compresor: ciclo de carga/descarga
+        tipo = self.tipo[sel]
+        es_comp = tipo == TIPO_COMPRESOR
+        if es_comp.any():
+            presion = self.presion[sel]
+            p_on = 7.0 + f * 1.5 + np.sin(ahora / 30) * 0.3
+            p_off = np.maximum(0, presion - 0.05)
+            self.presion[sel] = np.where(es_comp, np.where(running, p_on, p_off), presion)
+
+        # Enfriador: temperatura ambiente y carga térmica sobre la corriente
+        es_enf = tipo == TIPO_ENFRIADOR
+        if es_enf.any():
+            if 10 <= fecha.hour < 18:
+                temp_ambiente = rng.uniform(28, 35, m)
+            else:
+                temp_ambiente = rng.uniform(18, 25, m)
+            te, ts = self.temp_entrada[sel], self.temp_salida[sel]
+            te_on = temp_ambiente + f * 3
+            ts_on = 4.0 + rng.uniform(-0.5, 0.5, m)
+            enf_on = es_enf & running
+            corriente = np.where(enf_on, corriente * (te_on - ts_on) / 25.0, corriente)
+            self.temp_entrada[sel] = np.where(es_enf, np.where(running, te_on, temp_ambiente), te)
+            self.temp_salida[sel] = np.where(es_enf, np.where(running, ts_on, np.minimum(25, ts + 0.3)), ts)
+
+        self.corriente[sel] = np.where(running, corriente, 0.0)
+        self.velocidad[sel] = np.where(running, velocidad, 0.0)
+        self.vibracion[sel] = np.where(running, vibracion, self.vibracion[sel])
+        self.temperatura[sel] = temp
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# VISTAS POR OBJETO
+# ═══════════════════════════════════════════════════════════════════════════
+class _Columna:
+    """Expone una columna de la flota como atributo escalar de la vista"""
+
+    def __init__(self, columna, convertir=float):
+        self.columna = columna
+        self.convertir = convertir
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.convertir(getattr(obj._flota, self.columna)[obj.indice])
+
+    def __set__(self, obj, valor):
+        getattr(obj._flota, self.columna)[obj.indice] = valor
+
+
+class VistaMotor:
+    """Vista de una fila de la flota con la interfaz de MotorState"""
+    tipo = _Columna("tipo", int)
+    running = _Columna("running", bool)
+    falla = _Columna("falla", bool)
+    corriente_nominal = _Columna("nominal")
+    corriente_max = _Columna("maximo")
+    corriente_actual = _Columna("corriente")
+    velocidad = _Columna("velocidad")
+    temperatura = _Columna("temperatura")
+    vibracion = _Columna("vibracion")
+    horas_operacion = _Columna("horas")
+    tiempo_arranque = _Columna("t_arranque")
+    presion = _Columna("presion")
+    temp_entrada = _Columna("temp_entrada")
+    temp_salida = _Columna("temp_salida")
+
+    def __init__(self, flota, name, corriente_nominal, corriente_max,
+                 tipo=TIPO_MOTOR, modelo=MODELO_COCACOLA, horas=0.0):
+        self._flota = flota
+        self.indice = flota.agregar(corriente_nominal, corriente_max, tipo, modelo, horas)
+        self.name = name
+
+    @property
+    def reloj(self):
+        return self._flota.reloj
+
+    def arrancar(self):
+        self._flota.arrancar(self.indice)
+
+    def detener(self):
+        self._flota.detener(self.indice)
+
+    def fallar(self):
+        self._flota.fallar(self.indice)
+
+    def get_factor_turno(self):
+        return factor_turno(self.reloj.now(), self._flota.rng)
+
+    def actualizar_corriente(self):
+        """Sólo compatibilidad con MotorState: un FlotaMotores.paso de una fila
+
+        Cuesta lo mismo que un paso de NumPy (~80 µs, contra <1 µs del
+        MotorState original); los simuladores corren la física con un
+        FlotaMotores.paso por tick para toda la flota, nunca por motor.
+        """
+        self._flota.paso(indices=self.indice)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BENCHMARK
+# ═══════════════════════════════════════════════════════════════════════════
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    flota = FlotaMotores(seed=1)
+    flota.agregar_lote(n // 2, 62.5, 90.0)
+    flota.agregar_lote(n // 4, 95.0, 140.0, tipo=TIPO_COMPRESOR)
+    flota.agregar_lote(n - n // 2 - n // 4, 75.0, 110.0, tipo=TIPO_ENFRIADOR)
+    flota.arrancar(slice(0, n), ahora=time.time() - 10)
+
+    pasos = 50
+    t0 = time.perf_counter()
+    for _ in range(pasos):
+        flota.paso()
+    dt = time.perf_counter() - t0
+    print(f"🚀 {n:,} motores | {pasos / dt:,.1f} pasos/s | {n * pasos / dt:,.0f} motores/s")
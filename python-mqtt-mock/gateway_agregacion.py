@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+GATEWAY DE AGREGACIÓN (ROLLUPS HOUR / DAY EN EL BORDE)
+=============================================================================
+Proceso gateway: se suscribe a la telemetría de un broker, calcula ventanas
+min/max/avg/count por máquina y dataKey (agregacion.py) y publica cada
+ventana cerrada en <topic>/rollup/<granularidad>, al lado de los datos.
+
+- ✅ El thread de red de paho sólo encola; el decodificado y la agregación
+       corren en lote una vez por segundo (como el monitor)
+- ✅ Entiende JSON, payloads binarios (binario.py) y lotes de planta
+       (lotes.py, desarmados por dispositivo)
+- ✅ Tiempo de la muestra: el `timestamp` del payload (ISO, epoch o
+       epoch_ms), así un replay acelerado o un simulador con --velocidad
+       caen en el bucket correcto; --tiempo recepcion usa la hora de llegada
+- ✅ Ignora sus propios rollups aunque se suscriba a "#"
+
+USO:
+    python gateway_agregacion.py --broker 127.0.0.1 --port 1883 --topics "#" --rollup HOUR DAY
+    python gateway_agregacion.py --topics "cocacola-0001/#" --tiempo recepcion
+
+=============================================================================
+"""
+
+import argparse
+import collections
+import time
+from datetime import datetime
+
+import paho.mqtt.client as mqtt
+
+from agregacion import AgregadorVentanas, epoch_payload, es_rollup, registros_payload
+
+
+class GatewayAgregacion:
+    """Cola del thread de red → agregación en lote → rollups publicados"""
+
+    def __init__(self, client, granularidades, tiempo="payload"):
+        self.client = client
+        self.agregador = AgregadorVentanas(self.publicar, granularidades)
+        self.tiempo = tiempo
+        self.pendientes = collections.deque()
+        self.invalidos = 0
+
+    def on_message(self, client, userdata, msg):
+        # Hot path (thread de red): sin parseo
+        self.pendientes.append((time.time(), msg.topic, msg.payload))
+
+    def publicar(self, topic, payload):
+        self.client.publish(topic, payload, qos=1)
+
+    def procesar(self):
+        sacar = self.pendientes.popleft
+        for _ in range(len(self.pendientes)):
+            t_rx, topic, payload = sacar()
+            if es_rollup(topic):
+                continue
+            try:
+                registros = registros_payload(topic, payload)
+            except (ValueError, KeyError, IndexError):
+                self.invalidos += 1
+                continue
+            for topic_dispositivo, data in registros:
+                if not isinstance(data, dict):
+                    self.invalidos += 1
+                    continue
+                t = t_rx
+                if self.tiempo == "payload" and "timestamp" in data:
+                    try:
+                        t = epoch_payload(data["timestamp"])
+                    except (TypeError, ValueError):
+                        pass
+                self.agregador.registrar_json(topic_dispositivo, data, t)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--broker", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--tls", action="store_true")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--client-id", default="Gateway_Agregacion")
+    parser.add_argument("--topics", nargs="+", default=["#"], help="filtros de telemetría")
+    parser.add_argument("--rollup", nargs="+", choices=("DAY", "HOUR"), default=["HOUR"],
+                        metavar="GRANULARIDAD", help="HOUR y/o DAY")
+    parser.add_argument("--tiempo", choices=("payload", "recepcion"), default="payload",
+                        help="reloj de las muestras: timestamp del payload u hora de llegada")
+    args = parser.parse_args()
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, args.client_id)
+    if args.user:
+        client.username_pw_set(args.user, args.password)
+    if args.tls:
+        client.tls_set()
+    gateway = GatewayAgregacion(client, args.rollup, args.tiempo)
+
+    def on_connect(client, userdata, flags, rc, properties=None):
+        if rc == 0:
+            client.subscribe([(t, 0) for t in args.topics])
+            print(f"✅ Gateway conectado a {args.broker}:{args.port} | agregando {', '.join(args.topics)}"
+                  f" | ventanas {' '.join(args.rollup)}")
+        else:
+            print(f"❌ Fallo conexión: {rc}")
+
+    client.on_connect = on_connect
+    client.on_message = gateway.on_message
+    client.connect(args.broker, args.port, 60)
+    client.loop_start()
+    try:
+        ciclo = 0
+        while True:
+            time.sleep(1)
+            gateway.procesar()
+            ciclo += 1
+            if ciclo % 5 == 0:
+                print(f"[{datetime.now():%H:%M:%S}] 🧮 {gateway.agregador.resumen()}"
+                      f" | {gateway.invalidos} inválidos")
+    except KeyboardInterrupt:
+        print("\n🛑 Gateway detenido")
+    finally:
+        gateway.procesar()
+        gateway.agregador.vaciar()
+        print(f"🧮 {gateway.agregador.resumen()}")
+        time.sleep(0.5)  # dejar salir los rollups parciales
+        client.loop_stop()
+        client.disconnect()
+
+
+if __name__ == "__main__":
+    main()
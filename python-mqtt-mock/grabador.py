@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+LOG SEGMENTADO DE MENSAJES MQTT (GRABACIÓN / LECTURA)
+=============================================================================
+Formato de captura que usan `monitor_mqtt.py --grabar` y el replayer:
+
+    <dir>/seg-000000.log   registros binarios, append-only
+    <dir>/seg-000000.idx   índice disperso (t_recepcion, offset)
+
+Segmento .log:
+    cabecera   b"MQTTLOG1"
+    registro   <d t_recepcion> <H largo_topic> <I largo_payload> topic payload
+
+- ✅ Los registros se empaquetan y escriben en lotes (un write por lote)
+- ✅ Rotación por tamaño (`tamano_segmento`) y retención (`max_segmentos`)
+- ✅ Índice disperso: una entrada cada `intervalo_indice` bytes, así buscar
+       un instante es bisect en el .idx + lectura secuencial corta
+- ✅ Lectura con mmap (sin cargar el segmento entero a memoria)
+
+USO:
+    grabador = Grabador("capturas/")
+    grabador.escribir_lote([(time.time(), b"solfrut/motores/m4/telemetria", b'{"estado":"ON"}')])
+    grabador.cerrar()
+
+    for t, topic, payload in leer_directorio("capturas/", desde=t0):
+        ...
+
+=============================================================================
+"""
+
+import bisect
+import glob
+import mmap
+import os
+import struct
+
+MAGIA = b"MQTTLOG1"
+REGISTRO = struct.Struct("<dHI")    # t_recepcion, largo topic, largo payload
+ENTRADA_INDICE = struct.Struct("<dQ")  # t_recepcion, offset en el .log
+
+
+def rutas_segmentos(directorio):
+    """Segmentos .log del directorio, en orden de grabación"""
+    return sorted(glob.glob(os.path.join(directorio, "seg-*.log")))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ESCRITURA
+# ═══════════════════════════════════════════════════════════════════════════
+class Grabador:
+    """Escribe lotes de (t_recepcion, topic, payload) en segmentos rotativos"""
+
+    def __init__(self, directorio, tamano_segmento=64 << 20, intervalo_indice=64 << 10,
+                 max_segmentos=None):
+        self.directorio = directorio
+        self.tamano_segmento = tamano_segmento
+        self.intervalo_indice = intervalo_indice
+        self.max_segmentos = max_segmentos
+        self.registros = 0
+        self.bytes = 0
+        self.segmentos = 0
+        self._log = self._idx = None
+        self._offset = 0
+        self._proximo_indice = 0
+        os.makedirs(directorio, exist_ok=True)
+        existentes = rutas_segmentos(directorio)
+        self._numero = int(os.path.basename(existentes[-1])[4:10]) + 1 if existentes else 0
+
+    def _rotar(self):
+        self._cerrar_segmento()
+        base = os.path.join(self.directorio, f"seg-{self._numero:06d}")
+        self._numero += 1
+        self.segmentos += 1
+        self._log = open(base + ".log", "wb")
+        self._idx = open(base + ".idx", "wb")
+        self._log.write(MAGIA)
+        self._offset = len(MAGIA)
+        self._proximo_indice = self._offset
+        self._aplicar_retencion()
+
+    def _aplicar_retencion(self):
+        if not self.max_segmentos:
+            return
+        for ruta in rutas_segmentos(self.directorio)[:-self.max_segmentos]:
+            os.remove(ruta)
+            if os.path.exists(ruta[:-4] + ".idx"):
+                os.remove(ruta[:-4] + ".idx")
+
+    def escribir_lote(self, lote):
+        """Agrega los registros (t, topic bytes, payload bytes) con un write y los vuelca"""
+        if not lote:
+            return
+        if self._log is None or self._offset >= self.tamano_segmento:
+            self._rotar()
+        buffer = bytearray()
+        indice = bytearray()
+        empaquetar = REGISTRO.pack
+        base = self._offset
+        for t, topic, payload in lote:
+            offset = base + len(buffer)
+            if offset >= self._proximo_indice:
+                indice += ENTRADA_INDICE.pack(t, offset)
+                self._proximo_indice = offset + self.intervalo_indice
+            buffer += empaquetar(t, len(topic), len(payload))
+            buffer += topic
+            buffer += payload
+        self._log.write(buffer)
+        if indice:
+            self._idx.write(indice)
+        self._offset += len(buffer)
+        self.registros += len(lote)
+        self.bytes += len(buffer)
+        # Cada lote llega al kernel: un corte abrupto del proceso pierde a lo sumo el lote en curso
+        self.flush()
+
+    def flush(self):
+        if self._log is not None:
+            self._log.flush()
+            self._idx.flush()
+
+    def _cerrar_segmento(self):
+        if self._log is not None:
+            self._log.close()
+            self._idx.close()
+            self._log = self._idx = None
+
+    def cerrar(self):
+        self._cerrar_segmento()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LECTURA
+# ═══════════════════════════════════════════════════════════════════════════
+class Segmento:
+    """Segmento .log mapeado en memoria con su índice disperso"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[:len(MAGIA)] != MAGIA:
+            self.mmap.close()
+            raise ValueError(f"{ruta}: no es un segmento de captura")
+        self.tiempos, self.offsets = [], []
+        ruta_idx = ruta[:-4] + ".idx"
+        if os.path.exists(ruta_idx):
+            with open(ruta_idx, "rb") as f:
+                for t, offset in ENTRADA_INDICE.iter_unpack(f.read()):
+                    self.tiempos.append(t)
+                    self.offsets.append(offset)
+
+    @property
+    def t_inicio(self):
+        return self.tiempos[0] if self.tiempos else None
+
+    def offset_desde(self, t):
+        """Offset del último punto indexado con tiempo <= t"""
+        i = bisect.bisect_right(self.tiempos, t) - 1
+        return self.offsets[i] if i >= 0 else len(MAGIA)
+
+    def registros(self, desde=None):
+        """Itera (t, topic, payload); sólo se copian los bytes de cada registro"""
+        datos = self.mmap
+        offset = len(MAGIA) if desde is None else self.offset_desde(desde)
+        fin = len(self.mmap)
+        desempaquetar = REGISTRO.unpack_from
+        cabecera = REGISTRO.size
+        while offset + cabecera <= fin:
+            t, largo_topic, largo_payload = desempaquetar(datos, offset)
+            inicio = offset + cabecera
+            offset = inicio + largo_topic + largo_payload
+            if offset > fin:
+                break  # registro truncado (grabación cortada)
+            if desde is not None and t < desde:
+                continue
+            yield t, datos[inicio:inicio + largo_topic], datos[inicio + largo_topic:offset]
+
+    def cerrar(self):
+        self.mmap.close()
+
+
+def leer_directorio(directorio, desde=None, hasta=None):
+    """(t, topic bytes, payload bytes) de todos los segmentos, en orden"""
+    rutas = rutas_segmentos(directorio)
+    for i, ruta in enumerate(rutas):
+        segmento = Segmento(ruta)
+        try:
+            # Saltear segmentos enteros anteriores a `desde` usando el siguiente
+            if desde is not None and i + 1 < len(rutas):
+                siguiente = Segmento(rutas[i + 1])
+                t_siguiente = siguiente.t_inicio
+                siguiente.cerrar()
+                if t_siguiente is not None and t_siguiente <= desde:
+                    continue
+            for t, topic, payload in segmento.registros(desde):
+                if hasta is not None and t > hasta:
+                    return
+                yield t, topic, payload
+        finally:
+            segmento.cerrar()
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+INYECTOR DE FALLAS POR EVENTOS (COLA DE PRIORIDAD, REPRODUCIBLE)
+=============================================================================
+En vez de tirar una moneda por motor en cada tick (O(motores × ticks), e
+irreproducible), el instante de la próxima falla / rearme de cada motor se
+sortea UNA vez de una distribución y se guarda en una cola de prioridad
+(CalendarioEventos: ventana ordenada de arrays de NumPy que se consume con
+un cursor): el costo es O(eventos), y los eventos que vencen en el mismo
+tick se aplican en lote. Con tasas de falla reales (pocos eventos por
+tick) los eventos ganan por lejos; con 1% por tick los eventos ganan desde
+unos 20k motores y en flotas chicas la moneda sigue siendo más barata.
+
+- ✅ Distribuciones configurables: "exp:200" (media 200 s, equivale al 1%
+       por tick de 2 s), "weibull:1.5:3600", "lognormal:300:0.5",
+       "uniforme:60:120", "fija:300"
+- ✅ Falla sólo si el motor está en marcha al vencer el evento; con
+       --rearme el motor vuelve a arrancar solo (backfill, laboratorio)
+- ✅ Semilla (--seed): misma semilla y mismos ticks (reloj virtual
+       --velocidad max, backfill) → la misma secuencia de eventos
+- ✅ Escenarios con guion (--escenario): eventos a t segundos del inicio
+       sobre objetivos con nombre, con el vocabulario de los comandos
+       (MARCHA / PARADA / CLOSE / TRIP / OPEN) más FALLA
+- ✅ Funciona con RELOJ_REAL y con RelojVirtual (t en tiempo simulado)
+
+ESCENARIO (texto, una línea por evento; o JSON con la misma información):
+
+    # t(s)   ACCION   objetivo
+    seed 42
+    300      TRIP     reco1
+    320      FALLA    m5
+    t=900s   CLOSE    reco1
+
+    {"seed": 42, "eventos": [{"t": 300, "accion": "TRIP", "objetivo": "reco1"}]}
+
+USO:
+    inyector = InyectorFallas(reloj, seed=42)
+    inyector.registrar_flota(flota, falla="exp:200")
+    inyector.registrar("reco1", {"TRIP": abrir, "CLOSE": cerrar})
+    inyector.escenario("escenarios/trip_reco.txt")
+    inyector.iniciar()
+    for evento in inyector.avanzar():   # en cada tick
+        ...
+
+    python inyector_fallas.py 100000 --horas 24   # eventos vs moneda por tick
+
+=============================================================================
+"""
+
+import argparse
+import collections
+import heapq
+import itertools
+import json
+import math
+import time
+
+from reloj_virtual import RELOJ_REAL
+
+# nombre → (cantidad de parámetros, muestreo(rng, n, *parámetros))
+DISTRIBUCIONES = {
+    "exp": (1, lambda rng, n, media: rng.exponential(media, n)),
+    "weibull": (2, lambda rng, n, forma, escala: escala * rng.weibull(forma, n)),
+    "lognormal": (2, lambda rng, n, mediana, sigma: rng.lognormal(math.log(mediana), sigma, n)),
+    "uniforme": (2, lambda rng, n, minimo, maximo: rng.uniform(minimo, maximo, n)),
+    "fija": (1, lambda rng, n, valor: _fija(n, valor)),
+}
+
+ACCIONES = ("MARCHA", "PARADA", "CLOSE", "TRIP", "OPEN", "FALLA")
+
+# Evento aplicado. Guion: t y objetivo (nombre). Sorteados: t e índice son arrays de
+# NumPy con todos los motores de la flota que fallaron / rearmaron en el lote
+Evento = collections.namedtuple("Evento", "t accion objetivo indice")
+
+
+def _fija(n, valor):
+    import numpy as np
+    return np.full(n, float(valor))
+
+
+class Distribucion:
+    """Tiempo entre eventos en segundos: "exp:200", "weibull:1.5:3600"..."""
+
+    def __init__(self, texto):
+        nombre, *parametros = str(texto).split(":")
+        if nombre not in DISTRIBUCIONES:
+            raise ValueError(f"Distribución desconocida '{nombre}' (usar {', '.join(DISTRIBUCIONES)})")
+        cantidad, self._muestrear = DISTRIBUCIONES[nombre]
+        if len(parametros) != cantidad:
+            raise ValueError(f"'{nombre}' lleva {cantidad} parámetro(s): {texto}")
+        self.texto = str(texto)
+        self.parametros = [float(p) for p in parametros]
+
+    @classmethod
+    def desde_probabilidad(cls, probabilidad, periodo):
+        """Moneda de `probabilidad` por tick de `periodo` s → exponencial de igual tasa"""
+        return cls(f"exp:{periodo / probabilidad:g}")
+
+    def muestrear(self, rng, n):
+        return self._muestrear(rng, n, *self.parametros)
+
+    def __repr__(self):
+        return self.texto
+
+
+def distribucion(valor):
+    """None, texto o Distribucion → Distribucion o None"""
+    if valor is None or isinstance(valor, Distribucion):
+        return valor
+    return Distribucion(valor)
+
+
+def nombre_objetivo(topic_cmd):
+    """Nombre de guion de un dispositivo: su topic de comandos sin el último nivel"""
+    return topic_cmd.rsplit("/", 1)[0]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ESCENARIOS
+# ═══════════════════════════════════════════════════════════════════════════
+def _segundos(texto):
+    texto = str(texto).strip().lower()
+    if texto.startswith("t="):
+        texto = texto[2:]
+    return float(texto[:-1] if texto.endswith("s") else texto)
+
+
+def cargar_escenario(ruta):
+    """{"seed": int o None, "eventos": [(t relativo, ACCION, objetivo)]} desde texto o JSON"""
+    with open(ruta, encoding="utf-8") as f:
+        contenido = f.read()
+    if ruta.endswith(".json"):
+        datos = json.loads(contenido)
+        eventos = [(_segundos(e["t"]), e["accion"].upper(), e["objetivo"])
+                   for e in datos.get("eventos", [])]
+        return {"seed": datos.get("seed"), "eventos": eventos}
+    seed, eventos = None, []
+    for numero, linea in enumerate(contenido.splitlines(), 1):
+        campos = linea.split("#", 1)[0].split()
+        if not campos:
+            continue
+        if campos[0].lower() == "seed" and len(campos) == 2:
+            seed = int(campos[1])
+            continue
+        if len(campos) != 3:
+            raise ValueError(f"{ruta}:{numero}: se esperaba '<t> <ACCION> <objetivo>'")
+        eventos.append((_segundos(campos[0]), campos[1].upper(), campos[2]))
+    return {"seed": seed, "eventos": eventos}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# COLA DE PRIORIDAD POR VENTANA (FALLAS SORTEADAS)
+# ═══════════════════════════════════════════════════════════════════════════
+class CalendarioEventos:
+    """Cola de prioridad de eventos (t, es rearme, índice) en dos niveles
+
+    Lo que vence en los próximos `ancho` s está en una ventana de arrays de
+    NumPy ordenada por t que se consume con un cursor (searchsorted): la
+    ventana no se vuelve a concatenar ni partir en cada tick, y no hay una
+    tupla de Python por motor. Lo que vence después espera en los lotes tal
+    como llegaron y, al armar cada ventana, en una corrida ordenada más; la
+    ventana siguiente toma la cabeza de cada corrida con un searchsorted
+    (vistas, sin copiar lo lejano). Lo sorteado que cae dentro de la
+    ventana en curso (pocos eventos) espera aparte hasta que vence.
+    """
+
+    MAX_CORRIDAS = 8  # corridas antes de fundirlas en una (eventos lejanos, tasas bajas)
+
+    def __init__(self, ancho=30.0):
+        self.ancho = float(ancho)
+        self.fin = float("-inf")  # la ventana cubre t < fin
+        self.ventana = None  # (t, rearme, índices) ordenados por t
+        self.cursor = 0  # ventana[:cursor] ya salió
+        self.recientes = []  # [(t, rearme, índices)] con t < fin llegados después de armarla
+        self.lotes = []  # [(t, rearme, índices)] con t >= fin, sin ordenar
+        self.corridas = []  # [(t, rearme, índices)] con t >= fin, cada una ordenada por t
+        self.proximo = float("inf")  # t del próximo evento (ventana o recientes)
+        self.pendientes = 0
+
+    def agregar(self, t, rearme, indices):
+        if not len(t):
+            return
+        self.pendientes += len(t)
+        adentro = t < self.fin
+        if adentro.any():
+            self.recientes.append((t[adentro], rearme[adentro], indices[adentro]))
+            self.proximo = min(self.proximo, float(self.recientes[-1][0].min()))
+            afuera = ~adentro
+            t, rearme, indices = t[afuera], rearme[afuera], indices[afuera]
+        if len(t):
+            self.lotes.append((t, rearme, indices))
+
+    def _armar_ventana(self, ahora):
+        """Ventana nueva: lo que queda de la anterior, los recientes, la cabeza de
+        cada corrida y lo de los lotes que entra (el resto de los lotes, otra corrida)"""
+        import numpy as np
+        self.fin = ahora + self.ancho
+        partes, corridas = [], []
+        if self.ventana is not None:
+            partes.append(tuple(a[self.cursor:] for a in self.ventana))
+        for corrida in self.corridas:
+            corte = int(corrida[0].searchsorted(self.fin))
+            partes.append(tuple(a[:corte] for a in corrida))
+            if corte < len(corrida[0]):
+                corridas.append(tuple(a[corte:] for a in corrida))
+        sueltos = self.recientes + self.lotes
+        if sueltos:
+            t, rearme, indices = (np.concatenate(c) for c in zip(*sueltos))
+            adentro = t < self.fin
+            partes.append((t[adentro], rearme[adentro], indices[adentro]))
+            afuera = ~adentro
+            if afuera.any():
+                t, rearme, indices = t[afuera], rearme[afuera], indices[afuera]
+                orden = np.argsort(t, kind="stable")
+                corridas.append((t[orden], rearme[orden], indices[orden]))
+        if len(corridas) > self.MAX_CORRIDAS:
+            t, rearme, indices = (np.concatenate(c) for c in zip(*corridas))
+            orden = np.argsort(t, kind="stable")
+            corridas = [(t[orden], rearme[orden], indices[orden])]
+        self.recientes, self.lotes, self.corridas = [], [], corridas
+        if not partes:
+            self.ventana, self.proximo = None, float("inf")
+            return
+        t, rearme, indices = (np.concatenate(c) for c in zip(*partes))
+        orden = np.argsort(t, kind="stable")
+        self.ventana = t[orden], rearme[orden], indices[orden]
+        self.cursor = 0
+        self.proximo = float(self.ventana[0][0]) if len(t) else float("inf")
+
+    def vencidos(self, ahora):
+        """(t, rearme, índices) con t <= ahora, ordenados por t; None si no hay"""
+        import numpy as np
+        if ahora >= self.fin:
+            self._armar_ventana(ahora)
+        if self.proximo > ahora:
+            return None
+        partes, self.proximo = [], float("inf")
+        if self.ventana is not None:
+            t, rearme, indices = self.ventana
+            cursor, fin = self.cursor, int(t.searchsorted(ahora, side="right"))
+            if fin > cursor:
+                partes.append((t[cursor:fin], rearme[cursor:fin], indices[cursor:fin]))
+            self.cursor = fin
+            if fin < len(t):
+                self.proximo = float(t[fin])
+        de_ventana = bool(partes)
+        if self.recientes:
+            t, rearme, indices = (np.concatenate(c) for c in zip(*self.recientes))
+            vence = t <= ahora
+            if vence.any():
+                partes.append((t[vence], rearme[vence], indices[vence]))
+                queda = ~vence
+                t, rearme, indices = t[queda], rearme[queda], indices[queda]
+            self.recientes = [(t, rearme, indices)] if len(t) else []
+            if len(t):
+                self.proximo = min(self.proximo, float(t.min()))
+        if not partes:
+            return None
+        self.pendientes -= sum(len(p[0]) for p in partes)
+        if len(partes) == 1 and de_ventana:
+            return partes[0]  # sólo de la ventana: ya ordenado
+        # Orden por t: el orden de los sorteos no depende de cómo se agruparon los ticks
+        t, rearme, indices = (np.concatenate(c) for c in zip(*partes))
+        orden = np.argsort(t, kind="stable")
+        return t[orden], rearme[orden], indices[orden]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INYECTOR
+# ═══════════════════════════════════════════════════════════════════════════
+class InyectorFallas:
+    """Eventos a t absoluto: sorteados de distribuciones o escritos en un guion"""
+
+    def __init__(self, reloj=None, seed=None):
+        self.reloj = reloj or RELOJ_REAL
+        self.seed = seed
+        self._rng = None  # al primer sorteo (sin flotas no se importa NumPy)
+        self.eventos = []  # heap del guion (t, secuencia, ACCION, objetivo)
+        self._secuencia = itertools.count()
+        self.objetivos = {}  # nombre → {ACCION: callable()} o callable(accion)
+        # (flota, índices, distribución de falla, distribución de rearme, CalendarioEventos)
+        self.procesos = []
+        self.guion = []  # (t relativo, ACCION, objetivo) hasta iniciar()
+        self.t0 = None
+        self.disparados = collections.Counter()  # ACCION → eventos aplicados
+        self.ignorados = 0  # fallas vencidas con el motor ya detenido
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            import numpy as np
+            self._rng = np.random.default_rng(self.seed)
+        return self._rng
+
+    # ───────────────────────────────────────────────────────────────────────
+    # ALTA
+    # ───────────────────────────────────────────────────────────────────────
+    def registrar(self, nombre, acciones):
+        """Objetivo de guion: {ACCION: callable()} o un callable(accion) (ej. ComandosPerfil.comando)"""
+        self.objetivos[nombre] = acciones
+
+    def registrar_flota(self, flota, indices=None, falla=None, rearme=None):
+        """Fallas / rearmes sorteados para los motores `indices` de la flota (todos si None)"""
+        falla, rearme = distribucion(falla), distribucion(rearme)
+        if falla is None and rearme is None:
+            return
+        self.procesos.append((flota, indices, falla, rearme, CalendarioEventos()))
+        if self.t0 is not None:
+            self._sortear(self.procesos[-1], self.reloj.time())
+
+    def escenario(self, ruta_o_datos, solo_registrados=False):
+        """Agrega los eventos de un guion (ruta o dict de cargar_escenario)
+
+        solo_registrados: descartar los eventos de objetivos que no están en
+        este proceso (un shard de lanzador_shards.py sólo tiene sus plantas)
+        """
+        datos = cargar_escenario(ruta_o_datos) if isinstance(ruta_o_datos, str) else ruta_o_datos
+        if datos.get("seed") is not None and self.seed is None:
+            self.seed = datos["seed"]
+            self._rng = None
+        for t, accion, objetivo in datos["eventos"]:
+            if accion not in ACCIONES:
+                raise ValueError(f"Escenario: acción desconocida {accion} (usar {', '.join(ACCIONES)})")
+            if solo_registrados and objetivo not in self.objetivos:
+                continue
+            self.guion.append((t, accion, objetivo))
+            if self.t0 is not None:
+                self._push(self.t0 + t, accion, objetivo)
+
+    def iniciar(self, t0=None):
+        """t = 0 del guion; sortea los primeros eventos de cada flota"""
+        self.t0 = self.reloj.time() if t0 is None else t0
+        desconocidos = sorted({o for _, _, o in self.guion if o not in self.objetivos})
+        if desconocidos:
+            raise ValueError(f"Escenario: objetivos desconocidos {', '.join(desconocidos)}")
+        # Objetivos con dict de acciones: cada acción del guion tiene que estar registrada
+        faltantes = sorted({f"{accion} en {o}" for _, accion, o in self.guion
+                            if not callable(self.objetivos[o]) and accion not in self.objetivos[o]})
+        if faltantes:
+            raise ValueError(f"Escenario: acciones no registradas {', '.join(faltantes)}")
+        for t, accion, objetivo in self.guion:
+            self._push(self.t0 + t, accion, objetivo)
+        for proceso in self.procesos:
+            self._sortear(proceso, self.t0)
+
+    def _push(self, t, accion, objetivo):
+        heapq.heappush(self.eventos, (t, next(self._secuencia), accion, objetivo))
+
+    def _sortear(self, proceso, ahora):
+        """Primer evento de cada motor del proceso"""
+        import numpy as np
+        flota, indices, falla, rearme, calendario = proceso
+        indices = np.arange(flota.n) if indices is None else np.asarray(indices)
+        # Con rearme, un motor detenido espera su rearme; si no, su próxima falla
+        if falla is None:
+            rearmar = np.ones(len(indices), bool)
+        elif rearme is None:
+            rearmar = np.zeros(len(indices), bool)
+        else:
+            rearmar = ~flota.running[indices]
+        calendario.agregar(self._siguientes(np.full(len(indices), float(ahora)), rearmar,
+                                            falla, rearme), rearmar, indices)
+
+    def _siguientes(self, t, rearmar, falla, rearme):
+        import numpy as np
+        t = t.copy()
+        n_rearme = int(np.count_nonzero(rearmar))
+        if falla is not None and n_rearme < len(t):
+            t[~rearmar] += falla.muestrear(self.rng, len(t) - n_rearme)
+        if rearme is not None and n_rearme:
+            t[rearmar] += rearme.muestrear(self.rng, n_rearme)
+        return t
+
+    # ───────────────────────────────────────────────────────────────────────
+    # DISPARO
+    # ───────────────────────────────────────────────────────────────────────
+    def avanzar(self, ahora=None):
+        """Aplica los eventos vencidos hasta `ahora`. Retorna [Evento] aplicados"""
+        if ahora is None:
+            ahora = self.reloj.time()
+        eventos, aplicados = self.eventos, []
+        while eventos and eventos[0][0] <= ahora:
+            t, _, accion, objetivo = heapq.heappop(eventos)
+            acciones = self.objetivos[objetivo]
+            if callable(acciones):
+                acciones(accion)
+            else:
+                acciones[accion]()
+            self.disparados[accion] += 1
+            aplicados.append(Evento(t, accion, objetivo, None))
+        for proceso in self.procesos:
+            vencidos = proceso[4].vencidos(ahora)
+            if vencidos is not None:
+                aplicados += self._lote(proceso, *vencidos)
+        return aplicados
+
+    def _lote(self, proceso, t, rearmar, idx):
+        """Fallas / rearmes vencidos de un proceso, en lote; sortea los siguientes"""
+        import numpy as np
+        flota, _, falla, rearme, calendario = proceso
+        running = flota.running[idx]
+        fallan = ~rearmar & running
+        arrancan = rearmar & ~running
+        n_fallan, n_arrancan = int(np.count_nonzero(fallan)), int(np.count_nonzero(arrancan))
+        self.ignorados += len(idx) - int(np.count_nonzero(rearmar)) - n_fallan
+        if n_fallan:
+            flota.fallar(idx[fallan])
+        if n_arrancan:
+            flota.arrancar(idx[arrancan], t[arrancan])
+        self.disparados["FALLA"] += n_fallan
+        self.disparados["REARME"] += n_arrancan
+
+        # Después de una falla viene el rearme (si hay); después de un rearme, la falla
+        siguiente_rearme = np.where(rearmar, falla is None, rearme is not None)
+        calendario.agregar(self._siguientes(t, siguiente_rearme, falla, rearme),
+                           siguiente_rearme, idx)
+
+        return [Evento(t[mascara], accion, None, idx[mascara])
+                for accion, mascara, n in (("FALLA", fallan, n_fallan), ("REARME", arrancan, n_arrancan)) if n]
+
+    # ───────────────────────────────────────────────────────────────────────
+    # MÉTRICAS
+    # ───────────────────────────────────────────────────────────────────────
+    def pendientes(self):
+        return len(self.eventos) + sum(p[4].pendientes for p in self.procesos)
+
+    def resumen(self):
+        aplicados = " | ".join(f"{n:,} {a}" for a, n in sorted(self.disparados.items())) or "sin eventos"
+        semilla = "" if self.seed is None else f" | seed {self.seed}"
+        return (f"💥 fallas: {aplicados} | {self.ignorados:,} ignoradas (motor detenido)"
+                f" | {self.pendientes():,} pendientes{semilla}")
+
+
+def argumentos_fallas(parser):
+    parser.add_argument("--falla", default="exp:200",
+                        help="tiempo hasta la falla de un motor en marcha (Solfrut); 'no' = sin fallas")
+    parser.add_argument("--rearme", default=None,
+                        help="tiempo hasta que un motor detenido vuelve a arrancar solo (ej exp:100)")
+    parser.add_argument("--escenario", help="guion de eventos (texto o .json, ver inyector_fallas.py)")
+    parser.add_argument("--seed", type=int, help="semilla de las fallas (reproducible)")
+    return parser
+
+
+def opciones_fallas(args):
+    """(falla, rearme) para registrar_flota desde la CLI"""
+    falla = None if args.falla in (None, "no", "0") else Distribucion(args.falla)
+    return falla, distribucion(args.rearme)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BENCHMARK: MONEDA POR TICK vs EVENTOS
+# ═══════════════════════════════════════════════════════════════════════════
+def main():
+    import numpy as np
+
+    from flota import FlotaMotores
+    from reloj_virtual import RelojVirtual
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("motores", type=int, nargs="?", default=100_000)
+    parser.add_argument("--horas", type=float, default=24.0, help="horas simuladas")
+    parser.add_argument("--periodo", type=float, default=2.0)
+    parser.add_argument("--probabilidad", type=float, default=0.01, help="falla por tick")
+    parser.add_argument("--rearme", type=float, default=0.02, help="rearme por tick")
+    args = parser.parse_args()
+    ticks = int(args.horas * 3600 / args.periodo)
+
+    def armar():
+        flota = FlotaMotores(capacidad=args.motores, seed=1)
+        flota.agregar_lote(args.motores, 22.5, 40.0)
+        flota.arrancar(slice(0, flota.n), ahora=0.0)
+        return flota
+
+    flota = armar()
+    fallas = 0
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        fallas += len(flota.simular_fallas(args.probabilidad))
+        detenidos = np.flatnonzero(~flota.running[:flota.n] & (flota.rng.random(flota.n) < args.rearme))
+        flota.arrancar(detenidos, 0.0)
+    moneda = time.perf_counter() - t0
+
+    flota = armar()
+    reloj = RelojVirtual(inicio=0.0, velocidad=float("inf"))
+    inyector = InyectorFallas(reloj, seed=1)
+    inyector.registrar_flota(flota, falla=Distribucion.desde_probabilidad(args.probabilidad, args.periodo),
+                             rearme=Distribucion.desde_probabilidad(args.rearme, args.periodo))
+    t0 = time.perf_counter()
+    inyector.iniciar()
+    for _ in range(ticks):
+        reloj.avanzar(args.periodo)
+        inyector.avanzar()
+    eventos = time.perf_counter() - t0
+    print(f"🎲 moneda por tick: {ticks:,} ticks × {args.motores:,} motores en {moneda:.2f} s"
+          f" | {fallas:,} fallas")
+    print(f"💥 eventos:         {sum(inyector.disparados.values()):,} eventos en {eventos:.2f} s"
+          f" | {inyector.disparados['FALLA']:,} fallas | {moneda / eventos:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
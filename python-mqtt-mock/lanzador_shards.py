@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+LANZADOR MULTI-NÚCLEO - SIMULACIÓN EN SHARDS
+=============================================================================
+Reparte una flota grande (plantas Solfrut / Coca-Cola / bombeo armadas con
+los layouts TOPICS) entre N procesos worker. Cada shard es un
+RuntimeSimulacion completo con SU PROPIA conexión MQTT (client id
+`<client-id>_<shard>`); el proceso padre recolecta el throughput de cada
+shard por una cola y muestra el agregado.
+
+Las plantas se asignan round-robin: la planta i va al shard i % N, así los
+tenants quedan repartidos parejo sin importar el tamaño de la flota.
+
+USO:
+    python lanzador_shards.py --workers 8 --solfrut 4000 --cocacola 2000
+    python lanzador_shards.py --workers 4 --bombeo 20000 --periodo 0 --duracion 30
+
+=============================================================================
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import time
+
+from runtime_async import armar_runtime, parser_argumentos, validar_argumentos
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WORKER
+# ═══════════════════════════════════════════════════════════════════════════
+def _worker(shard, shards, args, cola):
+    runtime = armar_runtime(args, shard, shards)
+
+    async def reportar():
+        while True:
+            cola.put((shard, time.monotonic(), runtime.publicados,
+                      runtime.comandos, len(runtime.dispositivos)))
+            await asyncio.sleep(1.0)
+
+    try:
+        asyncio.run(runtime.correr(args.duracion, extras=[reportar()], estadisticas=False))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cola.put((shard, time.monotonic(), runtime.publicados,
+                  runtime.comandos, len(runtime.dispositivos)))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PADRE
+# ═══════════════════════════════════════════════════════════════════════════
+class ThroughputShards:
+    """Último reporte y tasa de cada shard"""
+
+    def __init__(self, shards):
+        self.ultimo = {}  # shard → (t, publicados, comandos, dispositivos)
+        self.primero = {}
+        self.tasa = dict.fromkeys(range(shards), 0.0)
+
+    def registrar(self, shard, t, publicados, comandos, dispositivos):
+        previo = self.ultimo.get(shard)
+        if previo and t > previo[0]:
+            self.tasa[shard] = (publicados - previo[1]) / (t - previo[0])
+        self.primero.setdefault(shard, (t, publicados))
+        self.ultimo[shard] = (t, publicados, comandos, dispositivos)
+
+    def tasa_media(self, shard):
+        if shard not in self.ultimo:
+            return 0.0
+        t0, p0 = self.primero[shard]
+        t1, p1 = self.ultimo[shard][:2]
+        return (p1 - p0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def imprimir(self):
+        print(f"\n{'SHARD':>5} | {'DISPOSITIVOS':>12} | {'MSG/S':>10} | {'PUBLICADOS':>12} | CMDS")
+        print("-" * 60)
+        for shard in sorted(self.tasa):
+            _, publicados, comandos, dispositivos = self.ultimo.get(shard, (0, 0, 0, 0))
+            print(f"{shard:>5} | {dispositivos:>12,} | {self.tasa[shard]:>10,.0f} | "
+                  f"{publicados:>12,} | {comandos}")
+        total = sum(self.tasa.values())
+        print("-" * 60)
+        print(f"{'TOTAL':>5} | {sum(u[3] for u in self.ultimo.values()):>12,} | {total:>10,.0f} |")
+
+
+def main():
+    parser = parser_argumentos(__doc__)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="procesos (por defecto: un shard por núcleo)")
+    parser.add_argument("--intervalo", type=float, default=5.0,
+                        help="segundos entre reportes agregados")
+    args = parser.parse_args()
+    validar_argumentos(parser, args)
+
+    ctx = mp.get_context("spawn")
+    cola = ctx.Queue()
+    procesos = [ctx.Process(target=_worker, args=(i, args.workers, args, cola), daemon=True)
+                for i in range(args.workers)]
+    print(f"🚀 Lanzando {args.workers} shards (una conexión MQTT por shard)...")
+    for proceso in procesos:
+        proceso.start()
+
+    stats = ThroughputShards(args.workers)
+    proximo = time.monotonic() + args.intervalo
+    try:
+        while any(p.is_alive() for p in procesos) or not cola.empty():
+            try:
+                stats.registrar(*cola.get(timeout=0.5))
+            except queue.Empty:
+                pass
+            if time.monotonic() >= proximo:
+                stats.imprimir()
+                proximo += args.intervalo
+    except KeyboardInterrupt:
+        print("\n🛑 Deteniendo shards...")
+        for proceso in procesos:
+            proceso.terminate()
+
+    for proceso in procesos:
+        proceso.join()
+
+    print("\n📊 RESUMEN (tasa media por shard)")
+    for shard in range(args.workers):
+        print(f"   Shard {shard}: {stats.tasa_media(shard):,.0f} msg/s")
+    print(f"   TOTAL:   {sum(stats.tasa_media(s) for s in range(args.workers)):,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
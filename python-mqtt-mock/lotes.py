@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+PAYLOADS EN LOTE: UN MENSAJE POR PLANTA POR TICK
+=============================================================================
+En vez de un mensaje por dispositivo (4 motores + reco1 = 5 publish, cada
+uno con su timestamp ISO y sus nombres de campo), la planta publica UNO:
+
+    cocacola/planta/lote
+    {"lote":1,"timestamp":"2026-02-21T06:00:00",
+     "d":{"linea1/embotelladora/telemetria":["motor_cocacola","ON",61.25,...],
+          "electrico/reco1/telemetria":["reconectador","CLOSED",221.3,...]}}
+
+- ✅ Un timestamp por lote; las claves de los campos NO viajan: cada
+       dispositivo es ["esquema", valores...] en el orden de ESQUEMAS
+       (codificadores.py), así que el decodificador las reconstruye
+- ✅ Topic del lote: <primer nivel>/planta/lote; dentro, los topics de cada
+       dispositivo sin el primer nivel (el tenant no se repite)
+- ✅ desempaquetar() devuelve los registros por dispositivo (topic original
+       + payload con las mismas claves y timestamp), para el monitor y el
+       grabador; bomba recupera su epoch y bomba_full / planta_general
+       vuelven sin timestamp, como los publica cada dispositivo
+
+USO:
+    empaquetador = EmpaquetadorPlanta("cocacola")
+    empaquetador.agregar(TOPICS["embotelladora"]["data"], CODIFICADORES["motor_cocacola"], motor)
+    client.publish(empaquetador.topic, empaquetador.codificar(reloj.tick()))
+
+    for topic, data in desempaquetar(msg.topic, msg.payload): ...
+
+=============================================================================
+"""
+
+import json
+
+from codificadores import ESQUEMAS, SIN_TIMESTAMP, TIMESTAMP_PROPIO, convertir_timestamp
+
+SUFIJO_LOTE = "/planta/lote"
+VERSION_LOTE = 1
+
+# Claves de cada esquema, en el orden en que viajan los valores
+_CLAVES = {nombre: tuple(c[0] for c in campos) for nombre, campos in ESQUEMAS.items()}
+
+
+def topic_lote(topic):
+    """Topic del lote de la planta (tenant) a la que pertenece `topic`"""
+    return topic.split("/", 1)[0] + SUFIJO_LOTE
+
+
+def es_lote(topic):
+    return topic.endswith(SUFIJO_LOTE)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EMISOR
+# ═══════════════════════════════════════════════════════════════════════════
+class EmpaquetadorPlanta:
+    """Arma el payload en lote de los dispositivos de una planta"""
+
+    def __init__(self, topic):
+        self.topic = topic_lote(topic)
+        self.miembros = []  # (subtopic JSON, codificar_lote, fuente)
+
+    def agregar(self, topic_data, codificador, fuente):
+        subtopic = topic_data.split("/", 1)[1]
+        self.miembros.append((json.dumps(subtopic), codificador.codificar_lote, fuente))
+
+    def codificar(self, ts):
+        """Payload del lote; `ts` es el timestamp ya codificado en JSON (RelojTick)"""
+        partes = [sub + ":" + codificar(fuente) for sub, codificar, fuente in self.miembros]
+        return '{"lote":%d,"timestamp":%s,"d":{%s}}' % (VERSION_LOTE, ts, ",".join(partes))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DECODIFICADOR
+# ═══════════════════════════════════════════════════════════════════════════
+def desempaquetar(topic, payload):
+    """[(topic del dispositivo, dict)] con las claves y el timestamp originales"""
+    lote = json.loads(payload)
+    if lote.get("lote") != VERSION_LOTE:
+        raise ValueError(f"versión de lote no soportada: {lote.get('lote')}")
+    tenant = topic[:-len(SUFIJO_LOTE)]
+    timestamp = lote["timestamp"]
+    registros = []
+    for subtopic, valores in lote["d"].items():
+        esquema = valores[0]
+        data = dict(zip(_CLAVES[esquema], valores[1:]))
+        if esquema in TIMESTAMP_PROPIO:
+            data["timestamp"] = convertir_timestamp(timestamp, TIMESTAMP_PROPIO[esquema])
+        elif esquema not in SIN_TIMESTAMP:
+            data["timestamp"] = timestamp
+        registros.append((f"{tenant}/{subtopic}", data))
+    return registros
+
+
+def desempaquetar_bytes(topic, payload):
+    """Como desempaquetar(), con payloads JSON compactos (para grabar/reproducir)"""
+    return [(t, json.dumps(data, separators=(",", ":")).encode())
+            for t, data in desempaquetar(topic, payload)]
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+MÉTRICAS DEL CAMINO CALIENTE: TIEMPO POR ETAPA + ENDPOINT PROMETHEUS
+=============================================================================
+¿En qué se va el tiempo del simulador? Contadores por etapa del tick del
+runtime (runtime_async.py) y del manejo de comandos:
+
+    fisica       FlotaMotores.paso + protecciones de la topología (por flota)
+    actualizar   física propia del dispositivo (bombas, horas de operación)
+    to_json      armado del dict (dispositivos sin codificador precompilado)
+    json_dumps   json.dumps del dict
+    codificar    codificador precompilado / binario / lote (to_json + dumps en uno)
+    publicar     sonda + cola acotada + client.publish de paho
+    comando      on_message: ruteo y acción de un comando MQTT
+
+- ✅ Costo bajo: dos time.perf_counter_ns() y unas sumas enteras por
+       medición; sin --metricas-* el tick corre sin instrumentar
+- ✅ Por etapa: cantidad, tiempo total, máximo e histograma de buckets
+       fijos (1 µs .. 100 ms), exportado como histogram de Prometheus
+- ✅ Endpoint HTTP local en formato de texto Prometheus (/metrics), servido
+       desde el mismo event loop con asyncio.start_server (sin threads ni
+       dependencias): ticks, publicados, comandos, atraso de la rueda
+- ✅ Volcado JSON periódico (--metricas-json), escrito atómico: ticks/s,
+       msg/s y µs medio / máximo por etapa desde el volcado anterior
+
+USO:
+    python runtime_async.py --cocacola 1000 --metricas-puerto 9108
+    curl -s localhost:9108/metrics | grep simulador_etapa_segundos_sum
+    python simular.py bombeo=5000 --metricas-json metricas.json --metricas-intervalo 10
+
+    metricas = MetricasTick()
+    t0 = time.perf_counter_ns()
+    ...
+    metricas.codificar.medir(time.perf_counter_ns() - t0)
+
+=============================================================================
+"""
+
+import asyncio
+import bisect
+import json
+import os
+import time
+
+ETAPAS = ("fisica", "actualizar", "to_json", "json_dumps", "codificar", "publicar", "comando")
+
+# Límites superiores de los buckets en ns (el último bucket acumula el resto)
+LIMITES_NS = (1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000,
+              500_000, 1_000_000, 2_500_000, 10_000_000, 100_000_000)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONTADOR POR ETAPA
+# ═══════════════════════════════════════════════════════════════════════════
+class Etapa:
+    """Cantidad, total, máximo e histograma de las duraciones de una etapa"""
+    __slots__ = ("nombre", "n", "total_ns", "max_ns", "buckets")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.n = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(LIMITES_NS) + 1)
+
+    def medir(self, ns):
+        self.n += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.buckets[bisect.bisect_left(LIMITES_NS, ns)] += 1
+
+    def instantanea(self):
+        return self.n, self.total_ns
+
+
+class MetricasTick:
+    """Una Etapa por nombre de ETAPAS (atributos) + las fuentes de contadores globales"""
+
+    def __init__(self, puerto=None, host="127.0.0.1", ruta_json=None, intervalo=5.0):
+        self.etapas = [Etapa(nombre) for nombre in ETAPAS]
+        for etapa in self.etapas:
+            setattr(self, etapa.nombre, etapa)
+        self.puerto = puerto
+        self.host = host
+        self.ruta_json = ruta_json
+        self.intervalo = float(intervalo)
+        self.runtime = None  # publicados, comandos, rueda, pool (ver vincular)
+        self._previo = None  # (t, ticks, publicados, {etapa: (n, total_ns)}) del último volcado
+
+    def vincular(self, runtime):
+        self.runtime = runtime
+        self._previo = self._instantanea()
+
+    def _instantanea(self):
+        runtime = self.runtime
+        return (time.monotonic(), runtime.rueda.disparos, runtime.publicados,
+                {e.nombre: e.instantanea() for e in self.etapas})
+
+    # ───────────────────────────────────────────────────────────────────────
+    # PROMETHEUS
+    # ───────────────────────────────────────────────────────────────────────
+    def prometheus(self):
+        """Texto de exposición de Prometheus (versión 0.0.4)"""
+        lineas = ["# HELP simulador_etapa_segundos Duración de cada etapa del tick del simulador",
+                  "# TYPE simulador_etapa_segundos histogram"]
+        for etapa in self.etapas:
+            etiqueta = f'etapa="{etapa.nombre}"'
+            acumulado = 0
+            for limite, cantidad in zip(LIMITES_NS, etapa.buckets):
+                acumulado += cantidad
+                lineas.append(f'simulador_etapa_segundos_bucket{{{etiqueta},le="{limite / 1e9:g}"}} {acumulado}')
+            lineas.append(f'simulador_etapa_segundos_bucket{{{etiqueta},le="+Inf"}} {etapa.n}')
+            lineas.append(f"simulador_etapa_segundos_sum{{{etiqueta}}} {etapa.total_ns / 1e9:.9f}")
+            lineas.append(f"simulador_etapa_segundos_count{{{etiqueta}}} {etapa.n}")
+        lineas += ["# HELP simulador_etapa_maximo_segundos Duración máxima de cada etapa desde el arranque",
+                   "# TYPE simulador_etapa_maximo_segundos gauge"]
+        lineas += [f'simulador_etapa_maximo_segundos{{etapa="{e.nombre}"}} {e.max_ns / 1e9:.9f}'
+                   for e in self.etapas]
+
+        runtime = self.runtime
+        if runtime is not None:
+            rueda, pool = runtime.rueda, runtime.pool
+            contadores = (
+                ("ticks", "Disparos de la rueda de tiempos", rueda.disparos),
+                ("ticks_saltados", "Ticks perdidos por atraso", rueda.saltados),
+                ("publicados", "Mensajes de telemetría publicados", runtime.publicados),
+                ("comandos", "Comandos MQTT atendidos", runtime.comandos),
+                ("descartados", "Mensajes descartados por las colas", sum(c.cola.descartados for c in pool.conexiones)),
+            )
+            for nombre, ayuda, valor in contadores:
+                lineas += [f"# HELP simulador_{nombre}_total {ayuda}",
+                           f"# TYPE simulador_{nombre}_total counter",
+                           f"simulador_{nombre}_total {valor}"]
+            lineas += ["# HELP simulador_dispositivos Dispositivos virtuales del proceso",
+                       "# TYPE simulador_dispositivos gauge",
+                       f"simulador_dispositivos {len(runtime.dispositivos)}",
+                       "# HELP simulador_cola_mensajes Mensajes esperando en las colas de publicación",
+                       "# TYPE simulador_cola_mensajes gauge",
+                       f"simulador_cola_mensajes {sum(len(c.cola) for c in pool.conexiones)}"]
+            p = rueda.percentiles()
+            lineas += ["# HELP simulador_atraso_tick_segundos Atraso de los disparos respecto de su fecha límite",
+                       "# TYPE simulador_atraso_tick_segundos gauge"]
+            lineas += [f'simulador_atraso_tick_segundos{{cuantil="{cuantil}"}} {p[clave]:.9f}'
+                       for cuantil, clave in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"), ("1", "max"))
+                       if p[clave] == p[clave]]  # NaN: sin muestras todavía
+        return "\n".join(lineas) + "\n"
+
+    async def _atender(self, reader, writer):
+        try:
+            pedido = await reader.readline()
+            while (await reader.readline()).strip():
+                pass  # cabeceras: no se usan
+            partes = pedido.decode("latin-1").split()
+            ruta = partes[1] if len(partes) > 1 else "/"
+            if ruta in ("/", "/metrics"):
+                estado, tipo, cuerpo = "200 OK", "text/plain; version=0.0.4; charset=utf-8", self.prometheus()
+            elif ruta == "/metrics.json":
+                estado, tipo, cuerpo = "200 OK", "application/json", json.dumps(self.volcado(reiniciar=False))
+            else:
+                estado, tipo, cuerpo = "404 Not Found", "text/plain; charset=utf-8", "usar /metrics\n"
+            datos = cuerpo.encode()
+            writer.write(f"HTTP/1.1 {estado}\r\nContent-Type: {tipo}\r\nContent-Length: {len(datos)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + datos)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def servir(self):
+        """Endpoint HTTP en host:puerto hasta que se cancele la tarea"""
+        servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        print(f"📐 Métricas Prometheus en http://{self.host}:{self.puerto}/metrics")
+        async with servidor:
+            await servidor.serve_forever()
+
+    # ───────────────────────────────────────────────────────────────────────
+    # JSON
+    # ───────────────────────────────────────────────────────────────────────
+    def volcado(self, reiniciar=True):
+        """Tasas y costo por etapa desde el volcado anterior (reiniciar=False: sin mover la ventana)"""
+        actual = self._instantanea()
+        t, ticks, publicados, etapas = actual
+        t_prev, ticks_prev, publicados_prev, etapas_prev = self._previo
+        dt = max(t - t_prev, 1e-9)
+        datos = {
+            "timestamp": time.time(),
+            "ventana_s": round(dt, 3),
+            "ticks_s": round((ticks - ticks_prev) / dt, 1),
+            "msg_s": round((publicados - publicados_prev) / dt, 1),
+            "publicados": publicados,
+            "comandos": self.runtime.comandos,
+            "dispositivos": len(self.runtime.dispositivos),
+            "etapas": {},
+        }
+        for etapa in self.etapas:
+            n, total = etapas[etapa.nombre]
+            n_prev, total_prev = etapas_prev[etapa.nombre]
+            if not n:
+                continue  # etapa que no corre en este proceso
+            medidas = n - n_prev
+            datos["etapas"][etapa.nombre] = {
+                "n": medidas,
+                "us_medio": round((total - total_prev) / medidas / 1000, 3) if medidas else None,
+                "us_max": round(etapa.max_ns / 1000, 1),
+                "n_total": n,
+            }
+        if reiniciar:
+            self._previo = actual
+        return datos
+
+    def escribir_json(self):
+        temporal = self.ruta_json + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(self.volcado(), f, ensure_ascii=False, indent=1)
+        os.replace(temporal, self.ruta_json)  # el lector nunca ve un archivo a medias
+
+    async def volcar_periodico(self):
+        try:
+            while True:
+                await asyncio.sleep(self.intervalo)
+                self.escribir_json()
+        finally:
+            self.escribir_json()  # último volcado al detener
+
+    def tareas(self):
+        """Corrutinas para RuntimeSimulacion.correr (endpoint y / o volcado)"""
+        tareas = []
+        if self.puerto is not None:
+            tareas.append(self.servir())
+        if self.ruta_json:
+            tareas.append(self.volcar_periodico())
+        return tareas
+
+    def resumen(self):
+        partes = []
+        for etapa in self.etapas:
+            if etapa.n:
+                partes.append(f"{etapa.nombre} {etapa.total_ns / etapa.n / 1000:.1f} µs")
+        return "📐 " + (" | ".join(partes) or "sin mediciones") + " (medio por medición)"
+
+
+def argumentos_metricas(parser):
+    parser.add_argument("--metricas-puerto", type=int, metavar="PUERTO",
+                        help="endpoint Prometheus en http://127.0.0.1:PUERTO/metrics")
+    parser.add_argument("--metricas-host", default="127.0.0.1", help="interfaz del endpoint")
+    parser.add_argument("--metricas-json", metavar="RUTA", help="volcado JSON periódico de las métricas")
+    parser.add_argument("--metricas-intervalo", type=float, default=5.0,
+                        help="segundos entre volcados JSON")
+    return parser
+
+
+def metricas_desde_args(args, shard=0, shards=1):
+    """MetricasTick o None (sin --metricas-*); con shards, puerto + shard y un JSON por shard"""
+    if args.metricas_puerto is None and not args.metricas_json:
+        return None
+    puerto = None if args.metricas_puerto is None else args.metricas_puerto + shard
+    ruta = args.metricas_json
+    if ruta and shards > 1:
+        base, extension = os.path.splitext(ruta)
+        ruta = f"{base}_{shard}{extension}"
+    return MetricasTick(puerto, args.metricas_host, ruta, args.metricas_intervalo)
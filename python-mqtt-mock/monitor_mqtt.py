@@ -1,6 +1,53 @@
-import paho.mqtt.client as mqtt
+"""
+=============================================================================
+MONITOR MQTT (ESPÍA) + MODO GRABADOR
+=============================================================================
+Modo estadísticas (default): tabla refrescada en el lugar una vez por
+segundo con msg/s, bytes/s, histograma de tamaños y "visto hace" por topic, y
+min/max/media/EWMA por dataKey numérico (ver estadisticas.py). El thread de
+red sólo encola; el parseo se hace en lote una vez por refresco.
+
+Modo espía (--espiar): imprime cada mensaje y detecta si el payload es JSON.
+
+Modo latencia (--latencia): con los simuladores corriendo con --sonda, mide
+por topic latencia p50/p95/p99, pérdida y reorden en ventanas móviles (ver
+sonda.py). Simulador y monitor deben correr en la misma máquina.
+
+Modo grabador (--grabar DIR): no imprime ni decodifica nada en el thread de
+red de paho. on_message sólo agrega (t_recepcion, topic, payload) a una
+deque; un thread escritor la vacía cada `--lote-ms` y la escribe en lote a
+segmentos rotativos con índice disperso (ver grabador.py). Con
+--desempaquetar, los lotes de planta (<tenant>/planta/lote, ver lotes.py)
+se graban como un registro por dispositivo, con su topic original, y los
+payloads binarios (binario.py) se graban ya convertidos a JSON.
+
+Los modos estadísticas y espía siempre muestran los lotes por dispositivo y
+los payloads binarios decodificados.
+
+USO:
+    python monitor_mqtt.py
+    python monitor_mqtt.py --espiar
+    python monitor_mqtt.py --broker 127.0.0.1 --port 1883 --grabar capturas/
+    python monitor_mqtt.py --grabar capturas/ --topics "solfrut/#" "cocacola/#" --max-segmentos 50
+    python monitor_mqtt.py --grabar capturas/ --topics "#" --desempaquetar
+    python monitor_mqtt.py --broker 127.0.0.1 --port 1883 --latencia --topics "#" --ventana 10
+
+=============================================================================
+"""
+
+import argparse
+import collections
+import threading
 import time
 
+import paho.mqtt.client as mqtt
+
+from estadisticas import AgregadorTopics
+from grabador import Grabador
+from binario import a_json, decodificar, es_binario
+from lotes import desempaquetar, desempaquetar_bytes, es_lote
+from sonda import AnalizadorSonda
+
 # --- CREDENCIALES HIVEMQ CLOUD (Pon las tuyas) ---
 BROKER = "d117b2b403d34e1cbc27488bb7782e37"
 PORT = 8883
@@ -10,33 +57,176 @@ PASS = "tu_password"
 # Tópicos a espiar (El # es un comodín para ver TODO bajo solfrut)
 TOPIC_ROOT = "solfrut/#"
 
-def on_connect(client, userdata, flags, rc):
+
+def on_connect(client, userdata, flags, rc, properties=None):
     if rc == 0:
-        print(f"✅ Conectado al Broker. Espiando: {TOPIC_ROOT}")
-        client.subscribe(TOPIC_ROOT)
+        topics = userdata["topics"]
+        print(f"✅ Conectado al Broker. Espiando: {', '.join(topics)}")
+        client.subscribe([(t, 0) for t in topics])
     else:
         print(f"❌ Error de conexión: {rc}")
 
 def on_message(client, userdata, msg):
+    if es_lote(msg.topic):
+        registros = desempaquetar(msg.topic, msg.payload)
+        print(f"\n📦 Lote: {msg.topic} ({len(msg.payload)} bytes, {len(registros)} dispositivos)")
+        for topic, data in registros:
+            print(f"   {topic}: {data}")
+        return
+    if es_binario(msg.payload):
+        print(f"\n📩 Tópico: {msg.topic}")
+        print(f"   Contenido: {decodificar(msg.payload)}")
+        print(f"   Formato: BINARIO ({len(msg.payload)} bytes, esquema {msg.payload[1]}) 🧬")
+        return
     payload = msg.payload.decode()
     print(f"\n📩 Tópico: {msg.topic}")
     print(f"   Contenido: '{payload}'")
-    
+
     # Análisis rápido
     if payload.startswith("{") and payload.endswith("}"):
         print("   Formato: JSON Detectado ✅")
     else:
         print("   Formato: TEXTO PLANO Detectado ⚠️ (React necesitará ajustes)")
 
-client = mqtt.Client("Python_Spy_Monitor")
-client.username_pw_set(USER, PASS)
-client.tls_set() # Importante para HiveMQ Cloud
-
-try:
-    print("Iniciando monitor...")
-    client.connect(BROKER, PORT, 60)
-    client.loop_forever()
-except KeyboardInterrupt:
-    print("\nMonitor detenido.")
-except Exception as e:
-    print(f"\nError crítico: {e}")
\ No newline at end of file
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MODO GRABADOR
+# ═══════════════════════════════════════════════════════════════════════════
+class GrabadorMQTT:
+    """Acumula mensajes en el thread de red y los escribe en lote desde otro thread"""
+
+    def __init__(self, grabador, lote_ms=50, desempaquetar=False):
+        self.grabador = grabador
+        self.desempaquetar = desempaquetar  # lotes → un registro por dispositivo; binario → JSON
+        self.intervalo = lote_ms / 1000
+        self.pendientes = collections.deque()
+        self.recibidos = 0
+        self._detener = threading.Event()
+        self._escritor = threading.Thread(target=self._escribir, name="grabador", daemon=True)
+
+    def on_message(self, client, userdata, msg):
+        # Hot path: sin decode ni print (deque.append es thread-safe)
+        self.pendientes.append((time.time(), msg.topic, msg.payload))
+
+    def iniciar(self):
+        self._escritor.start()
+
+    def _vaciar(self):
+        sacar = self.pendientes.popleft
+        lote = [sacar() for _ in range(len(self.pendientes))]
+        self.recibidos += len(lote)
+        if self.desempaquetar:
+            lote = [(t, topic_d, payload_d)
+                    for t, topic, payload in lote
+                    for topic_d, payload_d in _desempaquetar(topic, payload)]
+        self.grabador.escribir_lote([(t, topic.encode(), payload) for t, topic, payload in lote])
+
+    def _escribir(self):
+        while not self._detener.wait(self.intervalo):
+            self._vaciar()
+
+    def detener(self):
+        self._detener.set()
+        self._escritor.join()
+        self._vaciar()
+        self.grabador.cerrar()
+
+
+def _desempaquetar(topic, payload):
+    if es_lote(topic):
+        return desempaquetar_bytes(topic, payload)
+    if es_binario(payload):
+        return ((topic, a_json(payload).encode()),)
+    return ((topic, payload),)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--broker", default=BROKER)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--user", default=USER)
+    parser.add_argument("--password", default=PASS)
+    parser.add_argument("--sin-tls", action="store_true", help="broker local sin TLS")
+    parser.add_argument("--topics", nargs="+", default=None,
+                        help=f"filtros a suscribir (default: {TOPIC_ROOT}; grabando: solfrut/# cocacola/#)")
+    parser.add_argument("--espiar", action="store_true", help="imprimir cada mensaje (modo original)")
+    parser.add_argument("--filas", type=int, default=20, help="topics / dataKeys en la tabla")
+    parser.add_argument("--grabar", metavar="DIR", help="modo grabador: directorio de segmentos")
+    parser.add_argument("--tamano-segmento", type=int, default=64, help="MiB por segmento")
+    parser.add_argument("--max-segmentos", type=int, help="segmentos a conservar (rotación)")
+    parser.add_argument("--lote-ms", type=float, default=50, help="ms entre escrituras en lote")
+    parser.add_argument("--desempaquetar", action="store_true",
+                        help="grabar lotes de planta por dispositivo y payloads binarios como JSON")
+    parser.add_argument("--latencia", action="store_true",
+                        help="modo sonda: latencia / pérdida / reorden (simuladores con --sonda)")
+    parser.add_argument("--ventana", type=float, default=10.0, help="segundos por ventana de latencia")
+    args = parser.parse_args()
+
+    topics = args.topics or (["solfrut/#", "cocacola/#"] if args.grabar else [TOPIC_ROOT])
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, "Python_Spy_Monitor",
+                         userdata={"topics": topics})
+    if args.user:
+        client.username_pw_set(args.user, args.password)
+    if not args.sin_tls and args.port == 8883:
+        client.tls_set() # Importante para HiveMQ Cloud
+    client.on_connect = on_connect
+
+    grabador = analizador = agregador = None
+    if args.espiar:
+        client.on_message = on_message
+    elif args.latencia:
+        analizador = AnalizadorSonda(args.ventana)
+        client.on_message = lambda c, u, msg: analizador.registrar(msg.topic, msg.payload)
+    elif args.grabar:
+        grabador = GrabadorMQTT(Grabador(args.grabar, args.tamano_segmento << 20,
+                                         max_segmentos=args.max_segmentos),
+                                args.lote_ms, args.desempaquetar)
+        client.on_message = grabador.on_message
+        grabador.iniciar()
+    else:
+        agregador = AgregadorTopics()
+        client.on_message = lambda c, u, msg: agregador.registrar(msg.topic, msg.payload)
+
+    try:
+        print("Iniciando monitor..." if not grabador else f"🔴 Grabando en {args.grabar}...")
+        client.connect(args.broker, args.port, 60)
+        if agregador:
+            client.loop_start()
+            while True:
+                time.sleep(1)
+                agregador.procesar()
+                agregador.imprimir(args.filas, args.filas)
+        elif analizador:
+            client.loop_start()
+            while True:
+                time.sleep(args.ventana)
+                analizador.imprimir(analizador.cerrar_ventana())
+        elif grabador:
+            client.loop_start()
+            previos, t_prev = 0, time.monotonic()
+            while True:
+                time.sleep(5)
+                ahora = time.monotonic()
+                total = grabador.recibidos + len(grabador.pendientes)
+                g = grabador.grabador
+                print(f"   {(total - previos) / (ahora - t_prev):,.0f} msg/s | {g.registros:,} grabados"
+                      f" | {g.bytes / 1e6:,.1f} MB | {g.segmentos} segmentos")
+                previos, t_prev = total, ahora
+        else:
+            client.loop_forever()
+    except KeyboardInterrupt:
+        print("\nMonitor detenido.")
+    except Exception as e:
+        print(f"\nError crítico: {e}")
+    finally:
+        if analizador or agregador:
+            client.loop_stop()
+        if grabador:
+            client.loop_stop()
+            grabador.detener()
+            print(f"💾 {grabador.grabador.registros:,} mensajes grabados en {args.grabar}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+PLANIFICADOR DE TICKS: RUEDA DE TIEMPOS CON FECHAS LÍMITE ABSOLUTAS
+=============================================================================
+Los loops "trabajar y después sleep(periodo)" derivan: cada vuelta suma el
+tiempo de trabajo al período, y con 100k dispositivos el event loop carga
+100k timers en su heap. Acá cada tarea periódica guarda UNA fecha límite
+absoluta y la siguiente es siempre `base + periodo`, sin importar cuánto
+tardó el tick:
+
+- ✅ Rueda de tiempos con hash (hashed timing wheel): `ranuras` listas
+       indexadas por tick absoluto módulo la rueda; alta y disparo O(1), una
+       sola tarea asyncio despierta por tick ocupado
+- ✅ Períodos por tarea (bombeo 1 s, Solfrut / Coca-Cola 2 s, --periodo)
+- ✅ Fase aleatoria dentro del período al dar de alta: la flota se reparte
+       uniforme en vez de publicar en ráfaga; --jitter suma además un
+       ruido por disparo que NO se acumula (la base sigue siendo absoluta)
+- ✅ Si el proceso se atrasa más de un período se saltan los ticks
+       perdidos (se cuentan) en vez de dispararlos todos de golpe
+- ✅ Atraso de cada disparo respecto de su fecha límite: p50/p95/p99 y
+       máximo en segundos reales, más el pico de disparos por tick
+- ✅ Funciona con RELOJ_REAL y con RelojVirtual (acelerado o instantáneo)
+- ✅ Metronomo: la misma fecha límite absoluta para los loops bloqueantes
+       de los simuladores de un solo dispositivo (thread principal)
+
+Período 0 (máxima tasa): la tarea se dispara en cada vuelta del loop,
+cediendo con asyncio.sleep(0), como hacían las corrutinas.
+
+USO:
+    rueda = RuedaTemporal(reloj, resolucion=0.005, jitter=0.05)
+    rueda.programar(dispositivo.tarea(runtime), dispositivo.periodo)
+    await rueda.correr()
+    print(rueda.resumen())   # ⏱️ atraso p50 0.4 ms | p95 ... | 0 saltados
+
+    metronomo = Metronomo(2.0)
+    while True:
+        ...
+        metronomo.esperar()
+
+=============================================================================
+"""
+
+import asyncio
+import math
+import random
+from array import array
+
+from reloj_virtual import RELOJ_REAL
+from sonda import percentil
+
+MUESTRAS_ATRASO = 1 << 16  # ventana móvil de atrasos para los percentiles
+
+
+class RuedaTemporal:
+    """Tareas periódicas en una rueda de `ranuras` ticks de `resolucion` segundos"""
+
+    def __init__(self, reloj=None, resolucion=0.005, ranuras=1024, jitter=0.0, seed=None):
+        self.reloj = reloj or RELOJ_REAL
+        self.resolucion = float(resolucion)
+        self.jitter = float(jitter)
+        self.azar = random.Random(seed)
+        self.ranuras = [[] for _ in range(ranuras)]
+        self.continuas = []  # período 0: en cada vuelta del loop
+        self.tareas = 0
+        self._tick = self._tick_de(self.reloj.time())  # próximo tick a procesar
+        # Métricas
+        self.disparos = 0
+        self.saltados = 0
+        self.pico = 0  # máximo de disparos en un tick desde el último resumen
+        self._atrasos = array("d", bytes(8 * MUESTRAS_ATRASO))
+        self._muestras = 0
+
+    def _tick_de(self, t):
+        # Tolerancia: k * resolucion / resolucion no siempre vuelve a dar k
+        return math.ceil(t / self.resolucion - 1e-9)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # ALTA
+    # ───────────────────────────────────────────────────────────────────────
+    def programar(self, accion, periodo, fase=None, jitter=None):
+        """`accion()` cada `periodo` s; fase None → al azar dentro del período"""
+        periodo = float(periodo)
+        self.tareas += 1
+        if periodo <= 0:
+            self.continuas.append(accion)
+            return
+        if fase is None:
+            fase = self.azar.uniform(0, periodo)
+        jitter = self.jitter if jitter is None else float(jitter)
+        # [fecha límite de disparo, base absoluta, período, jitter, acción]
+        entrada = [0.0, self.reloj.time() + fase, periodo, jitter, accion]
+        self._insertar(entrada)
+
+    def _insertar(self, entrada):
+        limite = entrada[1]
+        if entrada[3]:
+            limite += self.azar.uniform(0, entrada[3])
+        entrada[0] = limite
+        tick = max(self._tick_de(limite), self._tick)
+        self.ranuras[tick % len(self.ranuras)].append((tick, entrada))
+
+    # ───────────────────────────────────────────────────────────────────────
+    # DISPARO
+    # ───────────────────────────────────────────────────────────────────────
+    def _vencer(self, tick, ahora):
+        """Dispara las entradas del tick; las de vueltas futuras quedan en la ranura"""
+        indice = tick % len(self.ranuras)
+        lista = self.ranuras[indice]
+        if not lista:
+            return 0
+        self.ranuras[indice] = quedan = []
+        reloj = self.reloj
+        velocidad = reloj.velocidad
+        atrasos, n = self._atrasos, len(self._atrasos)
+        disparados = 0
+        for item in lista:
+            if item[0] > tick:
+                quedan.append(item)
+                continue
+            entrada = item[1]
+            atraso = (reloj.time() - entrada[0]) / velocidad
+            entrada[4]()
+            atrasos[self._muestras % n] = atraso
+            self._muestras += 1
+            disparados += 1
+            # Próxima fecha límite: base + período, sin arrastrar el atraso
+            base, periodo = entrada[1] + entrada[2], entrada[2]
+            if base <= ahora:
+                perdidos = int((ahora - base) // periodo) + 1
+                self.saltados += perdidos
+                base += perdidos * periodo
+            entrada[1] = base
+            self._insertar(entrada)
+        self.disparos += disparados
+        if disparados > self.pico:
+            self.pico = disparados
+        return disparados
+
+    def _siguiente_ocupado(self):
+        """Primer tick desde self._tick con una ranura no vacía (o una vuelta entera)"""
+        n = len(self.ranuras)
+        ranuras, inicio = self.ranuras, self._tick
+        for j in range(n):
+            if ranuras[(inicio + j) % n]:
+                return inicio + j
+        return inicio + n
+
+    async def correr(self):
+        reloj = self.reloj
+        while True:
+            ahora = reloj.time()
+            actual = math.floor(ahora / self.resolucion + 1e-9)  # último tick empezado
+            while self._tick <= actual:
+                tick = self._tick
+                self._tick = tick + 1  # lo que se reprograme ahora cae en ticks futuros
+                self._vencer(tick, ahora)
+            if self.continuas:
+                for accion in self.continuas:
+                    accion()
+                self.disparos += len(self.continuas)
+                await asyncio.sleep(0)
+                continue
+            siguiente = self._siguiente_ocupado()
+            await reloj.sleep(max(0.0, siguiente * self.resolucion - reloj.time()))
+
+    # ───────────────────────────────────────────────────────────────────────
+    # MÉTRICAS
+    # ───────────────────────────────────────────────────────────────────────
+    def percentiles(self):
+        """{p50, p95, p99, max} del atraso en segundos reales (ventana móvil)"""
+        ordenados = sorted(self._atrasos[:min(self._muestras, len(self._atrasos))])
+        return {"p50": percentil(ordenados, 50), "p95": percentil(ordenados, 95),
+                "p99": percentil(ordenados, 99), "max": ordenados[-1] if ordenados else float("nan")}
+
+    def resumen(self):
+        if not self._muestras:
+            return f"⏱️ {self.tareas:,} tareas | {self.disparos:,} disparos sin fecha límite (período 0)"
+        p = self.percentiles()
+        texto = (f"⏱️ atraso p50 {p['p50'] * 1000:.1f} ms | p95 {p['p95'] * 1000:.1f} ms"
+                 f" | p99 {p['p99'] * 1000:.1f} ms | máx {p['max'] * 1000:.1f} ms"
+                 f" | pico {self.pico:,}/tick | {self.disparos:,} disparos | {self.saltados:,} saltados")
+        self.pico = 0
+        return texto
+
+
+class Metronomo:
+    """Espera bloqueante hasta la próxima fecha límite absoluta (sin deriva)"""
+
+    def __init__(self, periodo, reloj=None):
+        self.periodo = float(periodo)
+        self.reloj = reloj or RELOJ_REAL
+        self.proximo = self.reloj.time()
+        self.saltados = 0
+
+    def esperar(self):
+        self.proximo += self.periodo
+        ahora = self.reloj.time()
+        if self.proximo <= ahora:
+            # Atrasado más de un período: saltar los ticks perdidos
+            perdidos = int((ahora - self.proximo) // self.periodo) + 1
+            self.saltados += perdidos
+            self.proximo += perdidos * self.periodo
+        self.reloj.dormir(self.proximo - ahora)
+
+
+def argumentos_planificador(parser):
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="ruido por disparo en segundos (no acumula deriva)")
+    parser.add_argument("--resolucion", type=float, default=0.005,
+                        help="segundos por ranura de la rueda de tiempos")
+    return parser
+
+
+def opciones_planificador(args):
+    """kwargs de RuedaTemporal desde la CLI"""
+    return {"jitter": args.jitter, "resolucion": args.resolucion}
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+CAPA DE PUBLICACIÓN: COLA ACOTADA + POOL DE CONEXIONES
+=============================================================================
+client.publish() sin control encola en paho sin límite: si el broker o el
+enlace TLS se frenan, la memoria crece y lo que finalmente sale son
+lecturas viejas. Esta capa se pone delante de paho:
+
+ColaPublicacion (una por conexión)
+- ✅ Cola acotada con política al llenarse:
+       descartar_viejo  → sale la lectura más vieja
+       coalescer        → una lectura pendiente por topic (la última)
+- ✅ Tope de mensajes en vuelo: QoS 1 = sin PUBACK, QoS 0 = entregado a
+       paho y todavía no escrito en el socket. Se consulta el
+       MQTTMessageInfo de cada envío (is_published), no on_publish: el
+       callback VERSION2 arma ReasonCode + Properties por mensaje y
+       triplicaba el costo de publicar
+- ✅ Contadores: encolados, enviados, confirmados, descartados, coalescidos
+
+PoolConexiones (runtime_async.py)
+- ✅ Los dispositivos virtuales se reparten en N conexiones MQTT
+       (`<client-id>_<i>`); --por-dispositivo abre una por dispositivo
+       (pruebas de realismo: handshakes y sesiones como en campo)
+- ✅ Suscripciones fusionadas por conexión: sin duplicados y sin filtros
+       cubiertos por un comodín de la misma conexión
+- ✅ Reporte: conexiones, handshakes (tiempo a CONNACK) y msg/s por conexión
+
+USO:
+    cola = ColaPublicacion(client, capacidad=1000, politica="coalescer")
+    cola.publicar("cocacola/linea1/embotelladora/telemetria", payload)
+    print(cola.resumen())
+
+    python runtime_async.py --cocacola 500 --conexiones 8 --qos 1 --max-en-vuelo 200
+    python runtime_async.py --solfrut 50 --por-dispositivo
+    python runtime_async.py --cocacola 200 --cola 2000 --politica coalescer
+
+=============================================================================
+"""
+
+import asyncio
+import collections
+import socket
+import threading
+import time
+import zlib
+
+POLITICAS = ("descartar_viejo", "coalescer")
+MQTT_ERR_SUCCESS = 0  # paho.mqtt.client.MQTT_ERR_SUCCESS (paho se importa al conectar)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# COLA ACOTADA
+# ═══════════════════════════════════════════════════════════════════════════
+class ColaPublicacion:
+    """Cola acotada delante de client.publish(): backpressure, tope en vuelo y contadores"""
+
+    def __init__(self, client, capacidad=10_000, max_en_vuelo=1000, politica="descartar_viejo", qos=0):
+        if politica not in POLITICAS:
+            raise ValueError(f"política inválida: {politica} ({', '.join(POLITICAS)})")
+        self.client = None
+        self.capacidad = capacidad
+        self.max_en_vuelo = max_en_vuelo
+        self.politica = politica
+        self.qos = qos
+        self._coalescer = politica == "coalescer"
+        self._cola = {} if self._coalescer else collections.deque()  # topic → (payload, qos)
+        self._en_vuelo = collections.deque()  # (MQTTMessageInfo, qos) en orden de envío
+        self._lock = threading.Lock()  # publicar (main) vs on_disconnect (thread de red)
+        self.encolados = 0
+        self.enviados = 0
+        self.confirmados = 0
+        self.descartados = 0
+        self.coalescidos = 0
+        self.errores = 0
+        if client is not None:
+            self.enganchar(client)
+
+    def enganchar(self, client):
+        """Cliente paho que drena la cola (None al crearla: encola hasta que haya uno)"""
+        if self.qos:
+            client.max_inflight_messages_set(self.max_en_vuelo)
+        client.on_disconnect = self._on_disconnect
+        self.client = client
+
+    def __len__(self):
+        return len(self._cola)
+
+    @property
+    def en_vuelo(self):
+        with self._lock:
+            self._liberar()
+        return len(self._en_vuelo)
+
+    def publicar(self, topic, payload, qos=None):
+        qos = self.qos if qos is None else qos
+        with self._lock:
+            self.encolados += 1
+            cola = self._cola
+            if self._coalescer:
+                if topic in cola:
+                    self.coalescidos += 1  # conserva su turno, con la lectura nueva
+                elif len(cola) >= self.capacidad:
+                    del cola[next(iter(cola))]
+                    self.descartados += 1
+                cola[topic] = (payload, qos)
+            else:
+                if len(cola) >= self.capacidad:
+                    cola.popleft()
+                    self.descartados += 1
+                cola.append((topic, payload, qos))
+            self._drenar()
+
+    def drenar(self):
+        """Pasa a paho lo que entra bajo el tope (llamar también al reconectar)"""
+        with self._lock:
+            self._drenar()
+
+    def _liberar(self):
+        """Saca del frente los ya escritos (QoS 0) / confirmados (QoS 1)"""
+        en_vuelo = self._en_vuelo
+        while en_vuelo and en_vuelo[0][0].is_published():
+            en_vuelo.popleft()
+            self.confirmados += 1
+
+    def _drenar(self):
+        self._liberar()
+        if not self._cola or self.client is None or not self.client.is_connected():
+            return  # sin cliente (todavía no se conectó) o desconectado: queda en cola
+        cola, en_vuelo = self._cola, self._en_vuelo
+        publish = self.client.publish
+        while cola and len(en_vuelo) < self.max_en_vuelo:
+            if self._coalescer:
+                topic = next(iter(cola))
+                payload, qos = cola.pop(topic)
+            else:
+                topic, payload, qos = cola.popleft()
+            info = publish(topic, payload, qos)
+            if info.rc != MQTT_ERR_SUCCESS:
+                self.errores += 1
+                continue
+            self.enviados += 1
+            en_vuelo.append((info, qos))
+
+    def _on_disconnect(self, client, userdata, *args):
+        # Los QoS 0 no escritos se pierden con el socket; los QoS 1 paho los reenvía
+        with self._lock:
+            self._en_vuelo = collections.deque(e for e in self._en_vuelo if e[1])
+
+    def resumen(self):
+        return (f"cola {len(self._cola):,}/{self.capacidad:,} | {self.en_vuelo:,} en vuelo"
+                f" | {self.enviados:,} enviados | {self.confirmados:,} confirmados"
+                f" | {self.descartados:,} descartados | {self.coalescidos:,} coalescidos")
+
+
+def argumentos_cola(parser):
+    parser.add_argument("--qos", type=int, choices=(0, 1), default=0, help="QoS de la telemetría")
+    parser.add_argument("--cola", type=int, default=10_000, metavar="N",
+                        help="mensajes pendientes por conexión antes de descartar")
+    parser.add_argument("--max-en-vuelo", type=int, default=1000, metavar="N",
+                        help="mensajes entregados a paho sin confirmar, por conexión")
+    parser.add_argument("--politica", choices=POLITICAS, default="descartar_viejo",
+                        help="cola llena: descartar el más viejo o coalescer la última lectura por topic")
+    return parser
+
+
+def opciones_cola(args):
+    return {"capacidad": args.cola, "max_en_vuelo": args.max_en_vuelo,
+            "politica": args.politica, "qos": args.qos}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SUSCRIPCIONES FUSIONADAS
+# ═══════════════════════════════════════════════════════════════════════════
+def cubre(filtro, otro):
+    """True si todo topic que coincide con `otro` coincide con `filtro`"""
+    niveles, otros = filtro.split("/"), otro.split("/")
+    for i, nivel in enumerate(niveles):
+        if nivel == "#":
+            return True
+        if i >= len(otros) or (nivel == "+" and otros[i] == "#"):
+            return False
+        if nivel != "+" and nivel != otros[i]:
+            return False
+    return len(niveles) == len(otros)
+
+
+def fusionar_filtros(filtros):
+    """Filtros sin duplicados ni cubiertos por un comodín del mismo conjunto"""
+    unicos = list(dict.fromkeys(filtros))
+    comodines = [f for f in unicos if "+" in f or "#" in f]
+    if not comodines:
+        return unicos
+    return [f for f in unicos if not any(c != f and cubre(c, f) for c in comodines)]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# POOL DE CONEXIONES
+# ═══════════════════════════════════════════════════════════════════════════
+class Conexion:
+    """Un cliente paho del pool con su cola, sus filtros y sus métricas"""
+
+    def __init__(self, pool, indice):
+        self.indice = indice
+        self.client_id = f"{pool.client_id}_{indice}" if pool.multiple else pool.client_id
+        self.client = None  # paho recién al conectar (ver cliente())
+        self.cola = ColaPublicacion(None, **pool.opciones_cola)
+        self.pool = pool
+        self.filtros = []
+        self.dispositivos = 0
+        self.handshakes = 0
+        self.t_handshake = []  # segundos de connect() a CONNACK
+        self._t_connect = None
+        self._enviados_previos = 0
+        self.tasa = 0.0
+
+    def cliente(self):
+        """Cliente paho de la conexión; el primero importa paho"""
+        if self.client is None:
+            import paho.mqtt.client as mqtt
+
+            pool = self.pool
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, self.client_id)
+            if pool.usuario:
+                client.username_pw_set(pool.usuario, pool.password)
+            if pool.tls:
+                client.tls_set()
+            client.on_connect = self._on_connect
+            client.on_message = pool.on_message
+            self.client = client
+            self.cola.enganchar(client)
+        return self.client
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
+        if rc != 0:
+            print(f"❌ Fallo conexión {self.client_id}: {rc}")
+            return
+        self.handshakes += 1
+        if self._t_connect is not None:
+            self.t_handshake.append(time.monotonic() - self._t_connect)
+            self._t_connect = None
+        filtros = fusionar_filtros(self.filtros)
+        for i in range(0, len(filtros), 100):
+            client.subscribe([(t, 0) for t in filtros[i:i + 100]])
+        self.cola.drenar()
+        self.pool._conectada(self)
+
+    def conectar(self, broker, port):
+        self._t_connect = time.monotonic()
+        self.cliente().connect(broker, port, 60)
+        self.client.socket().setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+
+
+class PoolConexiones:
+    """Dispositivos virtuales repartidos en N conexiones MQTT (o una por dispositivo)"""
+
+    def __init__(self, broker, port, usuario=None, password=None, tls=False,
+                 client_id="Runtime_Simulador", conexiones=1, por_dispositivo=False,
+                 on_message=None, cola=None):
+        self.broker = broker
+        self.port = port
+        self.usuario = usuario
+        self.password = password
+        self.tls = tls
+        self.client_id = client_id
+        self.por_dispositivo = por_dispositivo
+        self.multiple = por_dispositivo or conexiones > 1
+        self.on_message = on_message
+        self.opciones_cola = cola or {}
+        self.conexiones = [] if por_dispositivo else [Conexion(self, i) for i in range(max(1, conexiones))]
+        self._por_topic = {}  # topic de telemetría → Conexion
+        self._siguiente = 0
+        self._pendientes = None  # índices sin CONNACK durante conectar()
+        self._listo = None
+        self._drenador = None
+        self._t_tasa = time.monotonic()
+
+    def asignar(self, topic_data=None, filtros=()):
+        """Conexión de un dispositivo (round-robin, o una nueva con por_dispositivo)"""
+        if self.por_dispositivo:
+            conexion = Conexion(self, len(self.conexiones))
+            self.conexiones.append(conexion)
+        else:
+            conexion = self.conexiones[self._siguiente % len(self.conexiones)]
+            self._siguiente += 1
+        conexion.dispositivos += 1
+        conexion.filtros.extend(filtros)
+        if topic_data is not None:
+            self._por_topic[topic_data] = conexion
+        return conexion
+
+    def conexion_de(self, topic):
+        conexion = self._por_topic.get(topic)
+        if conexion is None:  # rollups, topics sin dispositivo: reparto estable por hash
+            if not self.conexiones:
+                self.asignar()
+            conexion = self.conexiones[zlib.crc32(topic.encode()) % len(self.conexiones)]
+        return conexion
+
+    def publicar(self, topic, payload):
+        self.conexion_de(topic).cola.publicar(topic, payload)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Conexión
+    # ───────────────────────────────────────────────────────────────────────
+    async def conectar(self, integrar):
+        """Conecta todas (integrar(client) las engancha al event loop) y espera los CONNACK"""
+        if not self.conexiones:
+            self.asignar()
+        self._pendientes = {c.indice for c in self.conexiones}
+        self._listo = asyncio.Event()
+        t0 = time.monotonic()
+        for conexion in self.conexiones:
+            integrar(conexion.cliente())
+            conexion.conectar(self.broker, self.port)
+        await self._listo.wait()
+        self._drenador = asyncio.create_task(self._drenar_periodico())
+        filtros = sum(len(fusionar_filtros(c.filtros)) for c in self.conexiones)
+        print(f"✅ Conectado a {self.broker}:{self.port} | {len(self.conexiones):,} conexiones"
+              f" | {filtros:,} suscripciones | handshakes en {time.monotonic() - t0:.2f} s")
+
+    def _conectada(self, conexion):
+        if self._pendientes is not None:
+            self._pendientes.discard(conexion.indice)
+            if not self._pendientes:
+                self._pendientes = None
+                self._listo.set()
+
+    async def _drenar_periodico(self, intervalo=0.05):
+        # Sin on_publish: lo que quedó en cola con el tope lleno sale acá aunque no se publique más
+        while True:
+            await asyncio.sleep(intervalo)
+            for conexion in self.conexiones:
+                if len(conexion.cola):
+                    conexion.cola.drenar()
+
+    def desconectar(self):
+        if self._drenador is not None:
+            self._drenador.cancel()
+        for conexion in self.conexiones:
+            if conexion.client is not None:
+                conexion.client.disconnect()
+
+    # ───────────────────────────────────────────────────────────────────────
+    # Métricas
+    # ───────────────────────────────────────────────────────────────────────
+    def actualizar_tasas(self):
+        ahora = time.monotonic()
+        dt = max(ahora - self._t_tasa, 1e-9)
+        self._t_tasa = ahora
+        for conexion in self.conexiones:
+            enviados = conexion.cola.enviados
+            conexion.tasa = (enviados - conexion._enviados_previos) / dt
+            conexion._enviados_previos = enviados
+
+    def resumen(self):
+        conexiones = self.conexiones
+        colas = [c.cola for c in conexiones]
+        handshakes = [t for c in conexiones for t in c.t_handshake]
+        tasas = [c.tasa for c in conexiones] or [0.0]
+        t_hs = f" ({sum(handshakes) / len(handshakes) * 1000:.0f} ms medio)" if handshakes else ""
+        return (f"{len(conexiones):,} conexiones | {sum(c.handshakes for c in conexiones):,} handshakes{t_hs}"
+                f" | msg/s por conexión {min(tasas):,.0f}/{sum(tasas) / len(tasas):,.0f}/{max(tasas):,.0f}"
+                f" (min/media/max) | cola {sum(len(c) for c in colas):,} | en vuelo"
+                f" {sum(c.en_vuelo for c in colas):,} | {sum(c.descartados for c in colas):,} descartados"
+                f" | {sum(c.coalescidos for c in colas):,} coalescidos"
+                f" | {sum(c.confirmados for c in colas):,} confirmados")
+
+    def imprimir(self, filas=20):
+        print(f"\n{'CONEXIÓN':<28} | {'DISP':>5} | {'SUBS':>5} | {'MSG/S':>8} | {'ENVIADOS':>10}"
+              f" | {'CONFIRM.':>10} | {'DESCART.':>8} | {'COALESC.':>8}")
+        print("-" * 104)
+        for c in sorted(self.conexiones, key=lambda c: -c.cola.enviados)[:filas]:
+            cola = c.cola
+            print(f"{c.client_id:<28} | {c.dispositivos:>5,} | {len(fusionar_filtros(c.filtros)):>5,}"
+                  f" | {c.tasa:>8,.0f} | {cola.enviados:>10,} | {cola.confirmados:>10,}"
+                  f" | {cola.descartados:>8,} | {cola.coalescidos:>8,}")
+        if len(self.conexiones) > filas:
+            print(f"... {len(self.conexiones) - filas:,} conexiones más")
+
+
+def argumentos_pool(parser):
+    parser.add_argument("--conexiones", type=int, default=1, metavar="N",
+                        help="conexiones MQTT entre las que se reparten los dispositivos")
+    parser.add_argument("--por-dispositivo", action="store_true",
+                        help="una conexión por dispositivo (pruebas de realismo)")
+    argumentos_cola(parser)
+    return parser
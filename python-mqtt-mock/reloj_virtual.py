@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+RELOJ VIRTUAL (TIME-WARP) PARA LOS SIMULADORES
+=============================================================================
+La física lee la hora para el factor de turno (día / noche / fin de semana),
+la temperatura ambiente del enfriador y la rampa de arranque. Con un reloj
+inyectable esos patrones se reproducen sin esperar en tiempo real:
+
+- RELOJ_REAL                    → time.time() / datetime.now() (default)
+- RelojVirtual(velocidad=3600)  → 1 hora simulada por segundo real
+- RelojVirtual(velocidad=inf)   → "lo más rápido posible": cada sleep()
+                                   avanza el tiempo virtual sin esperar
+
+Interfaz común: time(), now(), await sleep(s) y dormir(s) (bloqueante).
+
+USO:
+    reloj = RelojVirtual(inicio=datetime(2026, 2, 21), velocidad=3600)
+    flota = FlotaMotores(reloj=reloj)
+
+=============================================================================
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from datetime import datetime
+
+
+class RelojReal:
+    """Hora del sistema"""
+    velocidad = 1.0
+
+    def time(self):
+        return time.time()
+
+    def now(self):
+        return datetime.now()
+
+    async def sleep(self, segundos):
+        await asyncio.sleep(segundos)
+
+    def dormir(self, segundos):
+        time.sleep(segundos)
+
+
+RELOJ_REAL = RelojReal()
+
+
+class RelojVirtual:
+    """Reloj acelerado `velocidad` veces, o instantáneo con velocidad=inf"""
+
+    def __init__(self, inicio=None, velocidad=1.0):
+        if isinstance(inicio, datetime):
+            inicio = inicio.timestamp()
+        self.inicio = time.time() if inicio is None else float(inicio)
+        self.velocidad = float(velocidad)
+        self.rapido = math.isinf(self.velocidad)
+        self._t_real0 = time.monotonic()
+        self._t_virtual = self.inicio
+        self._pendientes = []  # heap (vencimiento, secuencia, future)
+        self._secuencia = itertools.count()
+        self._conductor = None
+
+    def time(self):
+        if self.rapido:
+            return self._t_virtual
+        return self.inicio + (time.monotonic() - self._t_real0) * self.velocidad
+
+    def now(self):
+        return datetime.fromtimestamp(self.time())
+
+    def avanzar(self, segundos):
+        """Sólo modo rápido: adelanta el tiempo virtual"""
+        self._t_virtual += segundos
+
+    def dormir(self, segundos):
+        if self.rapido:
+            self.avanzar(segundos)
+        else:
+            time.sleep(segundos / self.velocidad)
+
+    async def sleep(self, segundos):
+        if not self.rapido:
+            await asyncio.sleep(segundos / self.velocidad)
+            return
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._pendientes, (self._t_virtual + segundos, next(self._secuencia), futuro))
+        if self._conductor is None or self._conductor.done():
+            self._conductor = asyncio.get_running_loop().create_task(self._conducir())
+        await futuro
+
+    async def _conducir(self):
+        """Despierta las corrutinas en orden de vencimiento virtual"""
+        while self._pendientes:
+            # Dejar correr a las recién despertadas hasta su próximo sleep()
+            for _ in range(3):
+                await asyncio.sleep(0)
+            self._t_virtual = max(self._t_virtual, self._pendientes[0][0])
+            while self._pendientes and self._pendientes[0][0] <= self._t_virtual:
+                _, _, futuro = heapq.heappop(self._pendientes)
+                if not futuro.done():
+                    futuro.set_result(None)
+
+
+def reloj_desde_args(velocidad=None, inicio=None):
+    """Reloj para la CLI: --velocidad N|max y --inicio ISO (ej 2026-02-21T06:00)"""
+    if velocidad in (None, "1", 1) and inicio is None:
+        return RELOJ_REAL
+    if velocidad in ("max", "inf"):
+        velocidad = math.inf
+    inicio = datetime.fromisoformat(inicio) if isinstance(inicio, str) else inicio
+    return RelojVirtual(inicio, float(velocidad or 1))
+
+
+def argumentos_reloj(parser):
+    parser.add_argument("--velocidad", default=None,
+                        help="multiplicador del tiempo simulado (ej 3600) o 'max'")
+    parser.add_argument("--inicio", default=None,
+                        help="fecha/hora simulada de arranque (ISO, ej 2026-02-21T06:00)")
+    return parser
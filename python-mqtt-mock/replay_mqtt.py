@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+REPLAY DE TRÁFICO MQTT GRABADO (monitor_mqtt.py --grabar)
+=============================================================================
+Relee los segmentos de una captura (mmap, ver grabador.py) y los vuelve a
+publicar en un broker para reproducir incidentes o estresar el dashboard:
+
+- ✅ Ritmo original (default) o N veces más rápido (--velocidad N)
+- ✅ Tasa fija de mensajes por segundo (--tasa 20000)
+- ✅ Planificación sin deriva: cada mensaje tiene un instante absoluto
+       t0 + offset; si el replay se atrasa, publica sin dormir hasta alcanzar
+       el cronograma (no acumula error de sleep)
+- ✅ Reporte de tasa lograda vs pedida y atraso máximo
+- ✅ Reescritura de tenant: --tenant cocacola-0042 reemplaza el primer nivel
+       del topic (layouts TOPICS de los simuladores), --solo filtra por prefijo
+
+USO:
+    python replay_mqtt.py capturas/
+    python replay_mqtt.py capturas/ --velocidad 10 --tenant solfrut-0099
+    python replay_mqtt.py capturas/ --tasa 50000 --solo cocacola/ --bucle
+
+=============================================================================
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import paho.mqtt.client as mqtt
+
+from grabador import leer_directorio
+from runtime_async import topic_tenant
+
+# Mensajes con menos de 1 ms de adelanto salen sin dormir (a tasas altas un
+# sleep por mensaje costaría más que el mensaje)
+ADELANTO_MAX = 0.001
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CRONOGRAMA
+# ═══════════════════════════════════════════════════════════════════════════
+class Cronograma:
+    """Instante objetivo (perf_counter) de cada mensaje, relativo a un t0 fijo"""
+
+    def __init__(self, velocidad=1.0, tasa=None):
+        self.velocidad = velocidad
+        self.tasa = tasa
+        self.t0 = None
+        self.t_grabado0 = None
+
+    def iniciar(self, t_grabado):
+        self.t0 = time.perf_counter()
+        self.t_grabado0 = t_grabado
+
+    def objetivo(self, i, t_grabado):
+        if self.tasa:
+            return self.t0 + i / self.tasa
+        return self.t0 + (t_grabado - self.t_grabado0) / self.velocidad
+
+    def tasa_pedida(self, i, t_grabado):
+        """msg/s que exige el cronograma para los primeros i mensajes"""
+        if self.tasa:
+            return self.tasa
+        dt = (t_grabado - self.t_grabado0) / self.velocidad
+        return i / dt if dt > 0 else 0.0
+
+
+class Reporte:
+    """Tasa lograda vs pedida por ventana"""
+
+    def __init__(self, intervalo=5.0):
+        self.intervalo = intervalo
+        self.proximo = time.perf_counter() + intervalo
+        self.previos = 0
+        self.t_prev = time.perf_counter()
+        self.atraso_max = 0.0
+
+    def registrar_atraso(self, atraso):
+        if atraso > self.atraso_max:
+            self.atraso_max = atraso
+
+    def imprimir(self, publicados, pedida, t_grabado, ahora):
+        tasa = (publicados - self.previos) / (ahora - self.t_prev)
+        print(f"[{datetime.now():%H:%M:%S}] {tasa:,.0f} msg/s (pedido {pedida:,.0f})"
+              f" | atraso máx {self.atraso_max * 1000:,.1f} ms | {publicados:,} publicados"
+              f" | grabado {datetime.fromtimestamp(t_grabado):%Y-%m-%d %H:%M:%S}")
+        self.previos, self.t_prev = publicados, ahora
+        self.proximo = ahora + self.intervalo
+        self.atraso_max = 0.0
+
+
+def reproducir(client, directorio, cronograma, tenant=None, solo=None, qos=0,
+               desde=None, hasta=None, reporte=None):
+    """Publica una pasada de la captura. Retorna (publicados, segundos, tasa pedida)"""
+    solo = solo.encode() if solo else None
+    cache_topics = {}  # topic grabado → topic a publicar (reescrito una vez)
+    publicados = 0
+    t_grabado = 0.0
+    inicio = time.perf_counter()
+    for t_grabado, topic, payload in leer_directorio(directorio, desde, hasta):
+        if solo and not topic.startswith(solo):
+            continue
+        destino = cache_topics.get(topic)
+        if destino is None:
+            destino = topic.decode()
+            if tenant:
+                destino = topic_tenant(destino, tenant)
+            cache_topics[topic] = destino
+        if cronograma.t0 is None:
+            cronograma.iniciar(t_grabado)
+        ahora = time.perf_counter()
+        adelanto = cronograma.objetivo(publicados, t_grabado) - ahora
+        if adelanto > ADELANTO_MAX:
+            time.sleep(adelanto)
+        elif adelanto < 0 and reporte:
+            reporte.registrar_atraso(-adelanto)
+        client.publish(destino, payload, qos)
+        publicados += 1
+        if reporte and ahora >= reporte.proximo:
+            reporte.imprimir(publicados, cronograma.tasa_pedida(publicados, t_grabado), t_grabado, ahora)
+    pedida = cronograma.tasa_pedida(publicados, t_grabado) if publicados else 0.0
+    return publicados, time.perf_counter() - inicio, pedida
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("captura", help="directorio de segmentos (monitor_mqtt.py --grabar)")
+    parser.add_argument("--broker", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--tls", action="store_true")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--client-id", default="Replay_MQTT")
+    parser.add_argument("--qos", type=int, choices=(0, 1), default=0)
+    ritmo = parser.add_mutually_exclusive_group()
+    ritmo.add_argument("--velocidad", type=float, default=1.0, help="N× el ritmo original")
+    ritmo.add_argument("--tasa", type=float, help="tasa fija en msg/s (ignora los tiempos grabados)")
+    parser.add_argument("--tenant", help="reemplaza el primer nivel de cada topic")
+    parser.add_argument("--solo", help="sólo topics que empiezan con este prefijo")
+    parser.add_argument("--desde", help="instante ISO de inicio dentro de la captura")
+    parser.add_argument("--hasta", help="instante ISO de fin dentro de la captura")
+    parser.add_argument("--bucle", action="store_true", help="repetir la captura indefinidamente")
+    args = parser.parse_args()
+
+    desde = datetime.fromisoformat(args.desde).timestamp() if args.desde else None
+    hasta = datetime.fromisoformat(args.hasta).timestamp() if args.hasta else None
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, args.client_id)
+    if args.user:
+        client.username_pw_set(args.user, args.password)
+    if args.tls:
+        client.tls_set()
+    client.connect(args.broker, args.port, 60)
+    client.loop_start()
+
+    pedido = f"{args.tasa:,.0f} msg/s" if args.tasa else f"{args.velocidad:g}× ritmo original"
+    print(f"▶️  Replay {args.captura} → {args.broker}:{args.port} | {pedido}"
+          + (f" | tenant {args.tenant}" if args.tenant else ""))
+    total, segundos = 0, 0.0
+    try:
+        while True:
+            cronograma = Cronograma(args.velocidad, args.tasa)
+            publicados, dt, pedida = reproducir(client, args.captura, cronograma, args.tenant,
+                                                args.solo, args.qos, desde, hasta, Reporte())
+            total += publicados
+            segundos += dt
+            if publicados:
+                print(f"✅ Pasada: {publicados:,} mensajes en {dt:.1f} s → {publicados / dt:,.0f} msg/s"
+                      f" (pedido {pedida:,.0f} msg/s)")
+            if not args.bucle or not publicados:
+                break
+    except KeyboardInterrupt:
+        print("\n🛑 Replay detenido")
+    finally:
+        client.loop_stop()
+        client.disconnect()
+    if segundos:
+        print(f"📊 Total: {total:,} mensajes en {segundos:.1f} s → {total / segundos:,.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
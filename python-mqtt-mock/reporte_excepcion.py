@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+REPORT-BY-EXCEPTION: BANDAS MUERTAS + HEARTBEAT
+=============================================================================
+Como los gateways Exemys / Noja reales: un dispositivo sólo publica cuando
+algún campo cambió más que su banda muerta, o cuando pasó `heartbeat`
+segundos (simulados) sin publicar. Un motor detenido deja de mandar
+`corriente: 0.0` cada 2 s y pasa a mandar un heartbeat por minuto.
+
+- ✅ Bandas por dataKey (BANDAS), sobreescribibles con un JSON:
+       {"corriente": 0.5, "compresor": {"presion": 0.05}}
+       (clave → banda global; esquema → {clave: banda} sólo para ese esquema)
+- ✅ Perfiles del dashboard: banda = fracción de (max - min) del widget
+- ✅ Campos de texto / booleanos (estado, falla, protecciones): cualquier
+       cambio se reporta en el tick en que ocurre
+- ✅ El payload sigue siendo completo (los widgets leen todos los campos);
+       lo que se suprime es el mensaje entero
+- ✅ Contadores: evaluados / publicados → factor de reducción
+
+USO:
+    python runtime_async.py --cocacola 100 --excepcion --heartbeat 60
+    python simulador_perfil.py ../profiles/perfil_cocacola.json --excepcion --banda-perfil 0.02
+    python runtime_async.py --solfrut 50 --excepcion --bandas bandas.json
+
+=============================================================================
+"""
+
+import json
+
+# Bandas muertas por defecto (unidades del payload). Cubren el ruido normal
+# de la física (flota.py: ±3-5 % de corriente, ±1 V por fase, ±0.1 Hz; la
+# temperatura de entrada del enfriador sigue al ambiente, sorteado en 7 °C)
+BANDAS = {
+    "corriente": 1.0,
+    "amperes": 1.0,
+    "corriente_total": 3.0,
+    "velocidad": 10.0,
+    "temperatura": 1.0,
+    "temp_entrada": 4.0,
+    "temp_salida": 0.5,
+    "vibracion": 0.2,
+    "horas_operacion": 0.1,
+    "presion": 0.2,
+    "voltaje": 5.0,
+    "voltaje_L1": 5.0,
+    "voltaje_L2": 5.0,
+    "voltaje_L3": 5.0,
+    "frecuencia": 0.2,
+}
+HEARTBEAT = 60.0       # segundos simulados sin publicar, como máximo
+FRACCION_PERFIL = 0.05  # banda de widgets con min/max: 5 % del rango (el paso del random walk es 2 %)
+
+
+def cargar_bandas(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class EstadoReporte:
+    """Último valor reportado de un dispositivo"""
+    __slots__ = ("bandas", "ultimo", "t_ultimo")
+
+    def __init__(self, bandas):
+        self.bandas = bandas  # tupla alineada con dispositivo.valores(); None = exacto
+        self.ultimo = None
+        self.t_ultimo = 0.0
+
+
+class ReporteExcepcion:
+    """Decide qué ticks se publican y cuenta la reducción lograda"""
+
+    def __init__(self, bandas=None, heartbeat=HEARTBEAT, fraccion_perfil=FRACCION_PERFIL):
+        self.config = bandas or {}
+        self.heartbeat = heartbeat
+        self.fraccion_perfil = fraccion_perfil
+        self.evaluados = 0
+        self.publicados = 0
+        self.por_heartbeat = 0
+
+    # ───────────────────────────────────────────────────────────────────────
+    # BANDAS
+    # ───────────────────────────────────────────────────────────────────────
+    def banda(self, esquema, clave):
+        """Banda de un campo numérico: config del esquema → config global → BANDAS"""
+        propio = self.config.get(esquema)
+        if isinstance(propio, dict) and clave in propio:
+            return float(propio[clave])
+        global_ = self.config.get(clave)
+        if global_ is not None and not isinstance(global_, dict):
+            return float(global_)
+        return BANDAS.get(clave, 0.0)
+
+    def banda_perfil(self, clave, minimo, maximo):
+        """Banda de un widget con rango: config si la hay, si no fracción del rango"""
+        if clave in self.config and not isinstance(self.config[clave], dict):
+            return float(self.config[clave])
+        return self.fraccion_perfil * (maximo - minimo)
+
+    def preparar(self, dispositivo):
+        return EstadoReporte(tuple(dispositivo.bandas(self)))
+
+    # ───────────────────────────────────────────────────────────────────────
+    # HOT PATH
+    # ───────────────────────────────────────────────────────────────────────
+    def reportar(self, estado, valores, ahora):
+        """True si el tick se publica; en ese caso `valores` pasa a ser la referencia"""
+        self.evaluados += 1
+        ultimo = estado.ultimo
+        if ultimo is None:
+            cambio = True
+        elif ahora - estado.t_ultimo >= self.heartbeat:
+            cambio = True
+            self.por_heartbeat += 1
+        else:
+            cambio = False
+            for valor, previo, banda in zip(valores, ultimo, estado.bandas):
+                if banda is None:
+                    if valor != previo:
+                        cambio = True
+                        break
+                elif abs(valor - previo) > banda:
+                    cambio = True
+                    break
+        if cambio:
+            estado.ultimo = valores
+            estado.t_ultimo = ahora
+            self.publicados += 1
+        return cambio
+
+    def reduccion(self):
+        """Mensajes evaluados por mensaje publicado (1.0 = sin reducción)"""
+        return self.evaluados / self.publicados if self.publicados else 1.0
+
+    def resumen(self):
+        suprimidos = self.evaluados - self.publicados
+        return (f"report-by-exception: {self.publicados:,} de {self.evaluados:,} publicados"
+                f" ({suprimidos:,} suprimidos, {self.por_heartbeat:,} heartbeats)"
+                f" | reducción {self.reduccion():.1f}x")
+
+
+def argumentos_excepcion(parser):
+    parser.add_argument("--excepcion", action="store_true",
+                        help="report-by-exception: publicar sólo cambios fuera de banda + heartbeat")
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT,
+                        help="segundos simulados máximos sin publicar (con --excepcion)")
+    parser.add_argument("--bandas", help="JSON de bandas muertas por dataKey / esquema")
+    parser.add_argument("--banda-perfil", type=float, default=FRACCION_PERFIL,
+                        help="banda de widgets de perfil como fracción de (max - min)")
+    return parser
+
+
+def excepcion_desde_args(args):
+    if not args.excepcion:
+        return None
+    bandas = cargar_bandas(args.bandas) if args.bandas else None
+    return ReporteExcepcion(bandas, args.heartbeat, args.banda_perfil)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+ROUTER DE COMANDOS (TOPIC → DISPOSITIVO)
+=============================================================================
+Reemplaza las cadenas if/elif de on_message de los simuladores:
+
+- ✅ Topics exactos en un dict (O(1)); filtros con + y # en un ArbolTopics
+       (ver topicos.py), así un comando cuesta lo mismo con 5 o 50.000
+       dispositivos registrados
+- ✅ Vocabulario fijo: el payload se interpreta UNA vez como MARCHA /
+       PARADA / CLOSE / TRIP / OPEN y cada dispositivo declara qué hace con
+       cada palabra
+- ✅ Compatibilidad: payloads como '{"cmd":"MARCHA"}' o 'MARCHA_M4' se
+       reconocen por contenido, igual que el `"MARCHA" in comando` original
+
+USO:
+    router = RouterComandos()
+    router.registrar("solfrut/motores/m4/comandos",
+                     {"MARCHA": motor.arrancar, "PARADA": motor.detener})
+    router.registrar("+/reco1/comandos", lambda texto: print(texto))  # payload libre
+    client.subscribe([(f, 0) for f in router.filtros()])
+    router.despachar(msg.topic, msg.payload)
+
+=============================================================================
+"""
+
+from topicos import ArbolTopics
+
+VOCABULARIO = ("MARCHA", "PARADA", "CLOSE", "TRIP", "OPEN")
+
+
+def interpretar(texto):
+    """Palabra del VOCABULARIO contenida en el comando (o None)"""
+    if texto in VOCABULARIO:
+        return texto
+    for palabra in VOCABULARIO:
+        if palabra in texto:
+            return palabra
+    return None
+
+
+class RouterComandos:
+    """Topics / filtros de comandos → acciones de dispositivos"""
+
+    def __init__(self):
+        self.exactos = {}           # topic → [acciones]
+        self.comodines = ArbolTopics()  # filtro → {id: acciones}
+        self._acciones = {}         # id → acciones (los valores del árbol deben ser hashables)
+        self.despachados = 0
+        self.ignorados = 0
+
+    def registrar(self, filtro, acciones):
+        """acciones: {palabra: callable()} o callable(texto) para payloads libres"""
+        if "+" in filtro or "#" in filtro:
+            clave = id(acciones)
+            self._acciones[clave] = acciones
+            self.comodines.agregar(filtro, clave)
+        else:
+            self.exactos.setdefault(filtro, []).append(acciones)
+
+    def filtros(self):
+        """Topics a suscribir (exactos + filtros con comodines)"""
+        return list(self.exactos) + [f for f, _ in self.comodines.items()]
+
+    def destinos(self, topic):
+        destinos = self.exactos.get(topic, [])
+        if self.comodines.filtros:
+            coinciden = self.comodines.buscar(topic)
+            if coinciden:
+                destinos = destinos + [self._acciones[c] for c in coinciden]
+        return destinos
+
+    def despachar(self, topic, payload):
+        """Ejecuta las acciones registradas para `topic`. Retorna cuántas corrieron"""
+        destinos = self.destinos(topic)
+        if not destinos:
+            self.ignorados += 1
+            return 0
+        if isinstance(payload, (bytes, bytearray)):
+            payload = payload.decode()
+        texto = payload.upper().strip()
+        palabra = interpretar(texto)
+        ejecutadas = 0
+        for acciones in destinos:
+            if callable(acciones):
+                acciones(texto)
+            else:
+                accion = acciones.get(palabra)
+                if accion is None:
+                    continue
+                accion()
+            ejecutadas += 1
+        self.despachados += ejecutadas
+        return ejecutadas
@@ -0,0 +1,723 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+RUNTIME ASYNCIO - MILES DE DISPOSITIVOS VIRTUALES POR PROCESO
+=============================================================================
+Cada dispositivo virtual (motor Solfrut, línea Coca-Cola, bomba de bombeo,
+reconectadores) es un tick liviano en una rueda de tiempos compartida
+(planificador.py): una fecha límite absoluta por dispositivo, fase al azar
+dentro de su período, sin deriva. Todos comparten un pool chico de
+conexiones paho integradas al event loop (sin loop_start(), sin un thread
+por cliente): cada socket se atiende con add_reader/add_writer y cada
+conexión publica a través de una cola acotada (ver publicacion.py).
+
+La física de motores corre en lote (FlotaMotores.paso) en su propio tick,
+seguida de los totales y protecciones de todos los reconectadores Coca-Cola
+(TopologiaAlimentadores.paso); el tick de cada dispositivo sólo codifica y
+publica su estado.
+
+TOPICS:
+    Los layouts TOPICS de cada simulador, con el primer nivel reemplazado
+    por el tenant de cada planta: solfrut → solfrut-0001, solfrut-0002...
+    Con --originales, los escenarios de una sola planta publican en los
+    topics del script sin tenant (ver simular.py).
+    Con --lote cada planta Solfrut / Coca-Cola publica un único mensaje
+    por tick en <tenant>/planta/lote (ver lotes.py).
+
+USO:
+    python runtime_async.py --solfrut 500 --cocacola 200 --bombeo 1000
+    python runtime_async.py --bombeo-full 10 --solfrut 1 --originales   # solfrut en sus topics
+    python runtime_async.py --cocacola 50 --velocidad 3600 --inicio 2026-02-16T00:00 --duracion 604800
+    python runtime_async.py --broker <host> --port 8883 --tls --user U --password P
+    python runtime_async.py --cocacola 1000 --lote
+    python runtime_async.py --cocacola 1000 --binario      # payloads binarios (binario.py)
+    python runtime_async.py --cocacola 20 --rollup HOUR DAY --velocidad max --duracion 172800
+    python runtime_async.py --cocacola 500 --conexiones 8 --qos 1 --politica coalescer
+    python runtime_async.py --solfrut 50 --por-dispositivo   # una conexión por dispositivo
+    python runtime_async.py --bombeo 100000 --jitter 0.05    # atraso p50/p95/p99 de los ticks
+    python runtime_async.py --cocacola 500 --metricas-puerto 9108   # /metrics por etapa del tick
+    python runtime_async.py --solfrut 100 --seed 42 --escenario escenario.txt
+        # guion: "300 TRIP solfrut-0001/reco1", "320 FALLA solfrut-0001/motores/m5"
+
+=============================================================================
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import time
+from datetime import datetime
+
+import bombeo
+import bombeo_full
+from agregacion import AgregadorVentanas, argumentos_rollup
+from binario import BINARIOS
+from codificadores import CODIFICADORES, MODOS_TIMESTAMP, RelojTick
+from inyector_fallas import InyectorFallas, argumentos_fallas, nombre_objetivo, opciones_fallas
+from lotes import EmpaquetadorPlanta
+from metricas import argumentos_metricas, metricas_desde_args
+from planificador import RuedaTemporal, argumentos_planificador, opciones_planificador
+from publicacion import MQTT_ERR_SUCCESS, PoolConexiones, argumentos_pool, opciones_cola
+from reloj_virtual import RELOJ_REAL, argumentos_reloj, reloj_desde_args
+from reporte_excepcion import argumentos_excepcion, excepcion_desde_args
+from router_comandos import RouterComandos
+from sonda import SondaEnvio
+
+
+def topic_tenant(topic, tenant):
+    """Reemplaza el primer nivel del topic por el tenant (None → topic original)"""
+    if tenant is None:
+        return topic
+    return tenant + topic[topic.index("/"):]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INTEGRACIÓN PAHO ↔ ASYNCIO
+# ═══════════════════════════════════════════════════════════════════════════
+class AsyncioHelper:
+    """Atiende el socket de un cliente paho desde el event loop"""
+    def __init__(self, loop, client):
+        self.loop = loop
+        self.client = client
+        self.misc = None
+        client.on_socket_open = self.on_socket_open
+        client.on_socket_close = self.on_socket_close
+        client.on_socket_register_write = self.on_socket_register_write
+        client.on_socket_unregister_write = self.on_socket_unregister_write
+
+    def on_socket_open(self, client, userdata, sock):
+        self.loop.add_reader(sock, client.loop_read)
+        self.misc = self.loop.create_task(self.misc_loop())
+
+    def on_socket_close(self, client, userdata, sock):
+        self.loop.remove_reader(sock)
+        if self.misc:
+            self.misc.cancel()
+
+    def on_socket_register_write(self, client, userdata, sock):
+        self.loop.add_writer(sock, client.loop_write)
+
+    def on_socket_unregister_write(self, client, userdata, sock):
+        self.loop.remove_writer(sock)
+
+    async def misc_loop(self):
+        # Keepalive / reintentos de paho
+        while self.client.loop_misc() == MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DISPOSITIVOS VIRTUALES
+# ═══════════════════════════════════════════════════════════════════════════
+class DispositivoVirtual:
+    """Publica su telemetría cada `periodo` segundos y atiende comandos
+
+    Subclases: `codificador` precompilado o, sin él, to_json() con el payload
+    completo (timestamp incluido), que codificar() pasa por json.dumps
+    """
+    periodo = 2.0
+    codificador = None  # Codificador precompilado (None → json.dumps(to_json()))
+
+    def __init__(self, topic_data, topic_cmd=None):
+        self.topic_data = topic_data
+        self.topic_cmd = topic_cmd
+        self.fuente = self  # objeto que lee el codificador
+
+    def actualizar(self):
+        """Física propia del dispositivo (los motores la corren en lote)"""
+
+    def acciones(self):
+        """{palabra del vocabulario (MARCHA/PARADA/CLOSE/TRIP/OPEN): callable()}"""
+        return {}
+
+    def codificar(self, reloj):
+        if self.codificador is None:
+            return json.dumps(self.to_json())
+        # Timestamp en el modo propio del esquema (bomba: epoch, como bombeo.py), si tiene
+        return self.codificador.codificar(self.fuente, reloj.actual(self.codificador.modo_timestamp))
+
+    def codificar_binario(self, reloj):
+        reloj.actual()
+        return BINARIOS[self.codificador.nombre].codificar(self.fuente, reloj.ahora)
+
+    def valores(self):
+        """Valores crudos de los campos del payload (report-by-exception)"""
+        return self.codificador.valores(self.fuente)
+
+    def bandas(self, reporte):
+        """Banda muerta por campo, alineada con valores() (None = cambio exacto)"""
+        nombre = self.codificador.nombre
+        return [reporte.banda(nombre, clave) if numerico else None
+                for (clave, _, _, _), numerico in zip(self.codificador.campos,
+                                                       self.codificador.numericos)]
+
+    def muestras(self):
+        """[(topic, [(dataKey, valor)])] numéricos del tick, para los rollups"""
+        valores = self.valores()
+        return [(self.topic_data, [(clave, valores[i]) for i, clave in self.codificador.claves_numericas])]
+
+    def tarea(self, runtime):
+        """Tick del dispositivo para el planificador (RuedaTemporal.programar)"""
+        reporte = runtime.excepcion
+        estado = reporte.preparar(self) if reporte is not None else None
+        codificar = self.codificar_binario if runtime.binario else self.codificar
+        agregador = runtime.agregador
+        tiempo = runtime.tiempo
+        if runtime.metricas is not None:
+            return self._tick_medido(runtime, reporte, estado, codificar)
+
+        def tick():
+            self.actualizar()
+            if agregador is not None:
+                # Todas las muestras, aunque report-by-exception no publique el tick
+                t = tiempo.time()
+                for topic, pares in self.muestras():
+                    agregador.registrar(topic, pares, t)
+            if estado is None or reporte.reportar(estado, self.valores(), tiempo.time()):
+                runtime.publicar(self.topic_data, codificar(runtime.reloj))
+        return tick
+
+    def _tick_medido(self, runtime, reporte, estado, codificar):
+        """tick() con el tiempo de cada etapa en runtime.metricas (ver metricas.py)"""
+        m = runtime.metricas
+        agregador, tiempo, reloj = runtime.agregador, runtime.tiempo, runtime.reloj
+        # Sin codificador precompilado: to_json y json.dumps por separado
+        separar = (codificar == self.codificar and self.codificador is None
+                   and type(self).codificar is DispositivoVirtual.codificar)
+        reloj_ns = time.perf_counter_ns
+
+        def tick():
+            t0 = reloj_ns()
+            self.actualizar()
+            t1 = reloj_ns()
+            m.actualizar.medir(t1 - t0)
+            if agregador is not None:
+                t = tiempo.time()
+                for topic, pares in self.muestras():
+                    agregador.registrar(topic, pares, t)
+            if estado is None or reporte.reportar(estado, self.valores(), tiempo.time()):
+                t1 = reloj_ns()
+                if separar:
+                    datos = self.to_json()
+                    t2 = reloj_ns()
+                    m.to_json.medir(t2 - t1)
+                    payload = json.dumps(datos)
+                    t3 = reloj_ns()
+                    m.json_dumps.medir(t3 - t2)
+                else:
+                    payload = codificar(reloj)
+                    t3 = reloj_ns()
+                    m.codificar.medir(t3 - t1)
+                runtime.publicar(self.topic_data, payload)
+                m.publicar.medir(reloj_ns() - t3)
+        return tick
+
+
+class MotorSolfrut(DispositivoVirtual):
+    codificador = CODIFICADORES["motor_solfrut"]
+
+    def __init__(self, motor, topics):
+        super().__init__(topics["data"], topics["cmd"])
+        self.motor = self.fuente = motor
+
+    def to_json(self):
+        return self.motor.to_json()
+
+    def acciones(self):
+        return {"MARCHA": self.motor.arrancar, "PARADA": self.motor.detener}
+
+
+class RecoSolfrut(DispositivoVirtual):
+    codificador = CODIFICADORES["reco_solfrut"]
+
+    def __init__(self, motores, topics):
+        super().__init__(topics["data"], topics["cmd"])
+        self.motores = motores
+        self.cerrado = True
+
+    def to_json(self):
+        return {
+            "estado": "ON" if self.cerrado else "OFF",
+            "timestamp": self.motores[0].reloj.now().isoformat()
+        }
+
+    def cerrar(self):
+        self.cerrado = True
+
+    def abrir(self):
+        self.cerrado = False
+        for motor in self.motores:
+            if motor.running:
+                motor.detener()
+
+    def acciones(self):
+        return {"CLOSE": self.cerrar, "MARCHA": self.cerrar,
+                "TRIP": self.abrir, "PARADA": self.abrir}
+
+
+class LineaCocaCola(DispositivoVirtual):
+    def __init__(self, motor, topics):
+        from flota import TIPO_COMPRESOR, TIPO_ENFRIADOR
+
+        super().__init__(topics["data"], topics["cmd"])
+        self.motor = self.fuente = motor
+        esquema = {TIPO_COMPRESOR: "compresor", TIPO_ENFRIADOR: "enfriador"}
+        self.codificador = CODIFICADORES[esquema.get(motor.tipo, "motor_cocacola")]
+
+    def actualizar(self):
+        if self.motor.running:
+            self.motor.horas_operacion += 1/1800  # Incremento por ciclo
+
+    def to_json(self):
+        return self.motor.to_json()
+
+    def acciones(self):
+        return {"MARCHA": self.motor.arrancar, "PARADA": self.motor.detener}
+
+
+class RecoCocaCola(DispositivoVirtual):
+    """Totales y protecciones los calcula la topología en la tarea de física"""
+    codificador = CODIFICADORES["reconectador"]
+
+    def __init__(self, motores, topics, alimentadores):
+        from simulador_cocacola import ReconectadorState
+
+        super().__init__(topics["data"], topics["cmd"])
+        self.motores = motores
+        self.reco = self.fuente = ReconectadorState(motores, alimentadores)
+
+    def to_json(self):
+        return self.reco.to_json()
+
+    def abrir(self):
+        self.reco.abrir()
+        for motor in self.motores.values():
+            motor.detener()
+
+    def acciones(self):
+        return {"CLOSE": self.reco.cerrar, "MARCHA": self.reco.cerrar,
+                "TRIP": self.abrir, "PARADA": self.abrir, "OPEN": self.abrir}
+
+
+class BombaVirtual(DispositivoVirtual):
+    periodo = 1.0
+    codificador = CODIFICADORES["bomba"]
+
+    def __init__(self, topic_data, topic_cmd):
+        super().__init__(topic_data, topic_cmd)
+        self.bomba = self.fuente = bombeo.BombaState()
+
+    def actualizar(self):
+        self.bomba.actualizar()
+
+    def to_json(self):
+        return self.bomba.to_json()
+
+    def acciones(self):
+        return {"MARCHA": lambda: self.bomba.comando("MARCHA"),
+                "PARADA": lambda: self.bomba.comando("PARADA")}
+
+
+class BombaFull(DispositivoVirtual):
+    """Bomba de bombeo_full.py; corre la física de la PlantaFull que comparte con ServiciosPlanta"""
+    periodo = 1.0
+    codificador = CODIFICADORES["bomba_full"]
+
+    def __init__(self, planta, topic_data, topic_cmd):
+        super().__init__(topic_data, topic_cmd)
+        self.planta = self.fuente = planta
+
+    def actualizar(self):
+        self.planta.actualizar()
+
+    def to_json(self):
+        return self.planta.bomba_json()
+
+    def acciones(self):
+        return {"MARCHA": lambda: self.planta.comando_bomba("MARCHA"),
+                "PARADA": lambda: self.planta.comando_bomba("PARADA")}
+
+
+class ServiciosPlanta(DispositivoVirtual):
+    """Planta general de bombeo_full.py (luces, ambiente, tanque): sólo publica"""
+    periodo = 1.0
+    codificador = CODIFICADORES["planta_general"]
+
+    def __init__(self, planta, topic_data, topic_cmd):
+        super().__init__(topic_data, topic_cmd)
+        self.planta = self.fuente = planta
+
+    def to_json(self):
+        return self.planta.planta_json()
+
+    def acciones(self):
+        return {"MARCHA": lambda: self.planta.comando_luces("MARCHA"),
+                "PARADA": lambda: self.planta.comando_luces("PARADA")}
+
+
+class PlantaLote(DispositivoVirtual):
+    """Todos los dispositivos de una planta en un único mensaje por tick"""
+
+    def __init__(self, dispositivos):
+        self.empaquetador = EmpaquetadorPlanta(dispositivos[0].topic_data)
+        super().__init__(self.empaquetador.topic)
+        self.dispositivos = dispositivos
+        self.periodo = dispositivos[0].periodo
+        for d in dispositivos:
+            self.empaquetador.agregar(d.topic_data, d.codificador, d.fuente)
+
+    def actualizar(self):
+        for d in self.dispositivos:
+            d.actualizar()
+
+    def codificar(self, reloj):
+        return self.empaquetador.codificar(reloj.actual())
+
+    def to_json(self):
+        return {d.topic_data: d.to_json() for d in self.dispositivos}
+
+    def valores(self):
+        return tuple(v for d in self.dispositivos for v in d.valores())
+
+    def bandas(self, reporte):
+        return [b for d in self.dispositivos for b in d.bandas(reporte)]
+
+    def muestras(self):
+        return [m for d in self.dispositivos for m in d.muestras()]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RUNTIME
+# ═══════════════════════════════════════════════════════════════════════════
+class RuntimeSimulacion:
+    """Un proceso, un pool MQTT, miles de dispositivos en una rueda de tiempos"""
+
+    def __init__(self, broker, port, usuario=None, password=None, tls=False,
+                 client_id="Runtime_Simulador", timestamp="iso", tiempo=None, sonda=False,
+                 excepcion=None, lote=False, binario=False, conexiones=1, por_dispositivo=False,
+                 cola=None, planificador=None, seed=None, metricas=None):
+        self.broker = broker
+        self.port = port
+        self.tiempo = tiempo or RELOJ_REAL  # reloj de la simulación (real o virtual)
+        self.reloj = RelojTick(timestamp, fuente=self.tiempo)  # un timestamp compartido por tick
+        self.sonda = SondaEnvio() if sonda else None  # seq + t_envio por topic (ver sonda.py)
+        self.excepcion = excepcion  # ReporteExcepcion o None (publicar todos los ticks)
+        self.lote = lote  # True → un mensaje por planta por tick (PlantaLote)
+        self.binario = binario  # True → payloads binarios con id de esquema (binario.py)
+        self.agregador = None  # AgregadorVentanas (rollups HOUR / DAY) o None
+        self.dispositivos = []
+        self.router = RouterComandos()  # topics de comandos → acciones
+        self.flotas = []  # (flota, periodo, alimentadores o None)
+        # Fallas sorteadas por eventos y guion de escenario (objetivos: topic de comandos sin /comandos)
+        self.inyector = InyectorFallas(self.tiempo, seed)
+        self.publicados = 0
+        self.comandos = 0
+        self.metricas = metricas  # MetricasTick o None (tick sin instrumentar)
+        # Un planificador para todos los ticks: fechas límite absolutas, sin deriva
+        self.rueda = RuedaTemporal(self.tiempo, **(planificador or {}))
+        # Conexiones MQTT: dispositivos repartidos, cola acotada por conexión
+        self.pool = PoolConexiones(broker, port, usuario, password, tls, client_id, conexiones,
+                                   por_dispositivo, self.on_message, cola)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # ARMADO DE PLANTAS
+    # ───────────────────────────────────────────────────────────────────────
+    def agregar(self, dispositivo, comandos=()):
+        """Dispositivo + su conexión del pool; `comandos`: dispositivos cuyos comandos escucha"""
+        self.dispositivos.append(dispositivo)
+        filtros = []
+        for d in (dispositivo, *comandos):
+            if d.topic_cmd:
+                acciones = d.acciones()
+                self.router.registrar(d.topic_cmd, acciones)
+                filtros.append(d.topic_cmd)
+                if hasattr(d, "motor"):
+                    acciones = {**acciones, "FALLA": d.motor.fallar}  # sólo por guion, no por MQTT
+                self.inyector.registrar(nombre_objetivo(d.topic_cmd), acciones)
+        self.pool.asignar(dispositivo.topic_data, filtros)
+        return dispositivo
+
+    def agregar_planta(self, dispositivos):
+        """Dispositivos de una planta: sueltos, o en una PlantaLote con --lote"""
+        if not self.lote:
+            for dispositivo in dispositivos:
+                self.agregar(dispositivo)
+            return
+        self.agregar(PlantaLote(dispositivos), comandos=dispositivos)
+
+    def registrar_comando(self, filtro, destino):
+        """Rutea `filtro` (admite + y #) a destino.comando(texto) sin publicar telemetría"""
+        self.router.registrar(filtro, destino.comando)
+        self.pool.asignar(filtros=[filtro])
+        self.inyector.registrar(nombre_objetivo(filtro), destino.comando)
+
+    def activar_rollups(self, granularidades):
+        """Rollups min/max/avg/count por ventana en <topic>/rollup/<granularidad>"""
+        if granularidades:
+            self.agregador = AgregadorVentanas(self.publicar, granularidades)
+
+    def agregar_flota(self, flota, periodo=2.0, falla=None, rearme=None, alimentadores=None):
+        """`falla` / `rearme`: distribuciones del inyector (ej "exp:200") o None"""
+        self.flotas.append((flota, periodo, alimentadores))
+        self.inyector.registrar_flota(flota, falla=falla, rearme=rearme)
+
+    # Solfrut / Coca-Cola importan flota.py (NumPy) recién al armar su primera planta
+    def planta_solfrut(self, tenant, flota):
+        import simulador_solfrut
+
+        topics = {k: {t: topic_tenant(v, tenant) for t, v in tv.items()}
+                  for k, tv in simulador_solfrut.TOPICS.items()}
+        motores = [
+            simulador_solfrut.MotorState("MOTOR 4", 22.5, 40.0, flota),
+            simulador_solfrut.MotorState("MOTOR 5", 15.0, 40.0, flota),
+            simulador_solfrut.MotorState("MOTOR 6", 32.0, 50.0, flota),
+        ]
+        dispositivos = [MotorSolfrut(motor, topics[motor_id])
+                        for motor_id, motor in zip(("m4", "m5", "m6"), motores)]
+        self.agregar_planta(dispositivos + [RecoSolfrut(motores, topics["reco"])])
+
+    def planta_cocacola(self, tenant, flota, alimentadores):
+        import simulador_cocacola
+
+        topics = {k: {t: topic_tenant(v, tenant) for t, v in tv.items()}
+                  for k, tv in simulador_cocacola.TOPICS.items()}
+        motores = {
+            "embotelladora": simulador_cocacola.MotorState("EMBOTELLADORA L1", 50, 62.5, 90.0,
+                                                           flota_motores=flota),
+            "transportadora": simulador_cocacola.MotorState("TRANSPORTADORA L2", 30, 37.5, 55.0,
+                                                            flota_motores=flota),
+            "compresor": simulador_cocacola.CompresorState(flota),
+            "enfriador": simulador_cocacola.EnfriadorState(flota),
+        }
+        dispositivos = [LineaCocaCola(motor, topics[motor_id]) for motor_id, motor in motores.items()]
+        self.agregar_planta(dispositivos + [RecoCocaCola(motores, topics["reco"], alimentadores)])
+
+    def planta_bombeo(self, tenant):
+        self.agregar(BombaVirtual(topic_tenant(bombeo.TOPIC_TELEMETRIA, tenant),
+                                  topic_tenant(bombeo.TOPIC_COMANDOS, tenant)))
+
+    def planta_bombeo_full(self, tenant):
+        """Bomba + planta general de bombeo_full.py sobre una misma PlantaFull"""
+        planta = bombeo_full.PlantaFull()
+        self.agregar_planta([
+            BombaFull(planta, topic_tenant(bombeo_full.TOPIC_BOMBA_DATA, tenant),
+                      topic_tenant(bombeo_full.TOPIC_BOMBA_CMD, tenant)),
+            ServiciosPlanta(planta, topic_tenant(bombeo_full.TOPIC_PLANTA_DATA, tenant),
+                            topic_tenant(bombeo_full.TOPIC_LUCES_CMD, tenant)),
+        ])
+
+    # ───────────────────────────────────────────────────────────────────────
+    # MQTT
+    # ───────────────────────────────────────────────────────────────────────
+    def on_message(self, client, userdata, msg):
+        t0 = time.perf_counter_ns()
+        try:
+            self.comandos += self.router.despachar(msg.topic, msg.payload) > 0
+        except Exception as e:
+            print(f"❌ Error procesando comando en {msg.topic}: {e}")
+        if self.metricas is not None:
+            self.metricas.comando.medir(time.perf_counter_ns() - t0)
+
+    def publicar(self, topic, payload):
+        if self.sonda is not None:
+            payload = self.sonda.marcar(topic, payload)
+        self.pool.publicar(topic, payload)
+        self.publicados += 1
+
+    # ───────────────────────────────────────────────────────────────────────
+    # TAREAS
+    # ───────────────────────────────────────────────────────────────────────
+    def _fisica(self, flota, alimentadores):
+        t0 = time.perf_counter_ns()
+        flota.paso()
+        if alimentadores is not None:
+            alimentadores.reportar_disparos(alimentadores.paso())
+        if self.metricas is not None:
+            self.metricas.fisica.medir(time.perf_counter_ns() - t0)
+
+    def _fallas(self):
+        for evento in self.inyector.avanzar():
+            if evento.objetivo is not None:
+                print(f"🎬 [t+{evento.t - self.inyector.t0:.0f}s] {evento.accion} {evento.objetivo}")
+
+    async def _estadisticas(self, intervalo=5.0):
+        previos, t_prev = self.publicados, time.monotonic()
+        while True:
+            await asyncio.sleep(intervalo)
+            ahora = time.monotonic()
+            tasa = (self.publicados - previos) / (ahora - t_prev)
+            previos, t_prev = self.publicados, ahora
+            virtual = "" if self.tiempo is RELOJ_REAL else f" | t sim {self.tiempo.now():%Y-%m-%d %H:%M}"
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {len(self.dispositivos):,} dispositivos"
+                  f" | {tasa:,.0f} msg/s | {self.publicados:,} publicados | {self.comandos} comandos"
+                  f"{virtual}")
+            if self.excepcion is not None:
+                print(f"   📉 {self.excepcion.resumen()}")
+            if self.agregador is not None:
+                print(f"   🧮 {self.agregador.resumen()}")
+            self.pool.actualizar_tasas()
+            print(f"   🔌 {self.pool.resumen()}")
+            print(f"   {self.rueda.resumen()}")
+            if self.metricas is not None:
+                print(f"   {self.metricas.resumen()}")
+            if self.inyector.disparados or self.inyector.pendientes():
+                print(f"   {self.inyector.resumen()}")
+
+    async def correr(self, duracion=None, extras=(), estadisticas=True):
+        loop = asyncio.get_running_loop()
+        await self.pool.conectar(lambda client: AsyncioHelper(loop, client))
+
+        # Fallas y guion desde ahora; física en fase 0 (sin jitter); dispositivos con
+        # fase al azar en su período
+        self.inyector.iniciar()
+        self.rueda.programar(self._fallas, 1.0, fase=0.0, jitter=0.0)
+        for flota, periodo, alimentadores in self.flotas:
+            self.rueda.programar(functools.partial(self._fisica, flota, alimentadores),
+                                 periodo, fase=0.0, jitter=0.0)
+        for dispositivo in self.dispositivos:
+            self.rueda.programar(dispositivo.tarea(self), dispositivo.periodo)
+        tareas = [asyncio.create_task(self.rueda.correr())]
+        tareas += [asyncio.create_task(c) for c in extras]
+        if self.metricas is not None:
+            self.metricas.vincular(self)
+            tareas += [asyncio.create_task(c) for c in self.metricas.tareas()]
+        if estadisticas:
+            tareas.append(asyncio.create_task(self._estadisticas()))
+        try:
+            if duracion is None:
+                await asyncio.sleep(float("inf"))
+            else:
+                await self.tiempo.sleep(duracion)  # duración en tiempo simulado
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+            if self.agregador is not None:
+                self.agregador.vaciar()  # ventanas abiertas → rollups parciales
+                print(f"🧮 {self.agregador.resumen()}")
+            self.pool.desconectar()
+            if self.excepcion is not None:
+                print(f"📉 {self.excepcion.resumen()}")
+            if estadisticas:
+                self.pool.actualizar_tasas()
+                print(f"🔌 {self.pool.resumen()}")
+                if len(self.pool.conexiones) > 1:
+                    self.pool.imprimir()
+                print(self.rueda.resumen())
+                if self.metricas is not None:
+                    print(self.metricas.resumen())
+                if self.inyector.disparados:
+                    print(self.inyector.resumen())
+
+
+def armar_runtime(args, shard=0, shards=1):
+    """Arma las plantas pedidas; con shards > 1 sólo las que tocan a `shard`"""
+    client_id = args.client_id if shards == 1 else f"{args.client_id}_{shard}"
+    tiempo = reloj_desde_args(args.velocidad, args.inicio)
+    runtime = RuntimeSimulacion(args.broker, args.port, args.user, args.password, args.tls,
+                                client_id, args.timestamp, tiempo, args.sonda,
+                                excepcion_desde_args(args), args.lote, args.binario,
+                                args.conexiones, args.por_dispositivo, opciones_cola(args),
+                                opciones_planificador(args),
+                                None if args.seed is None else args.seed + shard,
+                                metricas_desde_args(args, shard, shards))
+    runtime.activar_rollups(args.rollup)
+    falla, rearme = opciones_fallas(args)
+
+    def tenant(escenario, i, total):
+        # --originales: una sola planta del escenario publica en los topics del script
+        return None if args.originales and total == 1 else f"{escenario}-{i + 1:04d}"
+
+    if args.solfrut:
+        from flota import FlotaMotores
+        flota = FlotaMotores(capacidad=args.solfrut * 3 // shards + 3, reloj=tiempo)
+        runtime.agregar_flota(flota, falla=falla, rearme=rearme)
+        for i in range(shard, args.solfrut, shards):
+            runtime.planta_solfrut(tenant("solfrut", i, args.solfrut), flota)
+    if args.cocacola:
+        from alimentadores import TopologiaAlimentadores
+        from flota import FlotaMotores
+        flota = FlotaMotores(capacidad=args.cocacola * 4 // shards + 4, reloj=tiempo)
+        alimentadores = TopologiaAlimentadores(flota, capacidad=args.cocacola // shards + 1)
+        runtime.agregar_flota(flota, alimentadores=alimentadores)
+        for i in range(shard, args.cocacola, shards):
+            runtime.planta_cocacola(tenant("cocacola", i, args.cocacola), flota, alimentadores)
+        flota.arrancar(slice(0, flota.n))  # Arranque inicial (en lote)
+    for i in range(shard, args.bombeo, shards):
+        runtime.planta_bombeo(tenant("bombeo", i, args.bombeo))
+    for i in range(shard, args.bombeo_full, shards):
+        runtime.planta_bombeo_full(tenant("bombeo_full", i, args.bombeo_full))
+    if args.periodo is not None:
+        for dispositivo in runtime.dispositivos:
+            dispositivo.periodo = args.periodo
+    if args.escenario:
+        runtime.inyector.escenario(args.escenario, solo_registrados=shards > 1)
+    return runtime
+
+
+def argumentos_broker(parser, client_id="Runtime_Simulador"):
+    parser.add_argument("--broker", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--tls", action="store_true")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--client-id", default=client_id)
+    parser.add_argument("--periodo", type=float,
+                        help="segundos entre publicaciones de cada dispositivo (0 = máxima tasa)")
+    parser.add_argument("--duracion", type=float,
+                        help="segundos simulados (por defecto: infinito)")
+    argumentos_reloj(parser)
+    parser.add_argument("--timestamp", choices=MODOS_TIMESTAMP, default="iso",
+                        help="formato del timestamp en los payloads")
+    parser.add_argument("--sonda", action="store_true",
+                        help="agregar seq y t_envio a cada payload (monitor_mqtt.py --latencia)")
+    argumentos_excepcion(parser)
+    argumentos_rollup(parser)
+    argumentos_pool(parser)
+    argumentos_planificador(parser)
+    argumentos_fallas(parser)
+    argumentos_metricas(parser)
+    return parser
+
+
+def parser_argumentos(descripcion=__doc__):
+    parser = argparse.ArgumentParser(description=descripcion,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    argumentos_broker(parser)
+    parser.add_argument("--solfrut", type=int, default=0, help="plantas Solfrut (3 motores + reco)")
+    parser.add_argument("--cocacola", type=int, default=0, help="plantas Coca-Cola (4 líneas + reco)")
+    parser.add_argument("--bombeo", type=int, default=0, help="bombas Santa Isabel")
+    parser.add_argument("--bombeo-full", type=int, default=0,
+                        help="bomba + planta general (bombeo_full.py)")
+    parser.add_argument("--originales", action="store_true",
+                        help="escenarios con una sola planta: topics del script original, sin tenant")
+    parser.add_argument("--lote", action="store_true",
+                        help="un mensaje por planta por tick (<tenant>/planta/lote)")
+    parser.add_argument("--binario", action="store_true",
+                        help="payloads binarios con registro de esquemas (binario.py); excluye --lote")
+    return parser
+
+
+def validar_argumentos(parser, args):
+    if args.lote and args.binario:
+        parser.error("--lote y --binario son excluyentes")
+    if args.originales and args.bombeo == 1 and args.bombeo_full == 1:
+        parser.error("--originales: bombeo y bombeo_full publican en los mismos topics de la bomba"
+                     " (con más de una planta de alguno van con tenant)")
+
+
+def main():
+    parser = parser_argumentos()
+    args = parser.parse_args()
+    validar_argumentos(parser, args)
+    runtime = armar_runtime(args)
+    print(f"🚀 Runtime asyncio: {len(runtime.dispositivos):,} dispositivos virtuales")
+    try:
+        asyncio.run(runtime.correr(args.duracion))
+    except KeyboardInterrupt:
+        print("\n🛑 Runtime detenido")
+
+
+if __name__ == "__main__":
+    main()
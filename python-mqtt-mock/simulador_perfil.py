@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+SIMULADOR GENERADO DESDE PERFILES DEL DASHBOARD (profiles/*.json)
+=============================================================================
+Carga un perfil exportado por el dashboard, agrupa los widgets por `topic`
+y arma un productor de payload por topic:
+
+- ✅ Campos numéricos: random walk acotado a [min, max] del widget
+       (sin min/max → 0..100)
+- ✅ Campos de estado: `dataKey` de switches ("ON"/"OFF") y métricas con
+       reglas de texto en conditionalFormatting (ej: CLOSED/OPEN de Noja)
+- ✅ dataKey con puntos ("a.b") → objetos anidados, como payloadParser.js
+- ✅ `commandTopic` de cada switch cableado a MARCHA/PARADA: respeta
+       commandFormat text (onCommand/offCommand) y json (onPayloadJSON)
+- ✅ Con la máquina detenida los valores decaen hacia el mínimo
+- ✅ --excepcion: bandas muertas = fracción de (max - min) de cada widget
+- ✅ --rollup HOUR DAY: min/max/avg/count por ventana (ver agregacion.py)
+- ✅ --seed: la misma semilla da los mismos valores (random walk) y fallas
+
+Cada copia (--copias N) es un tenant distinto: el primer nivel del topic
+se reemplaza por `<tenant>-0001`, `<tenant>-0002`... Corre sobre el runtime
+asyncio, así que escala a miles de topics por proceso.
+
+USO:
+    python simulador_perfil.py ../profiles/perfil_cocacola.json
+    python simulador_perfil.py ../profiles/noja_power_profile_v1.json --copias 500 --periodo 1
+
+=============================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+from metricas import metricas_desde_args
+from planificador import opciones_planificador
+from publicacion import opciones_cola
+from reloj_virtual import RELOJ_REAL, reloj_desde_args
+from reporte_excepcion import excepcion_desde_args
+from runtime_async import DispositivoVirtual, RuntimeSimulacion, argumentos_broker, topic_tenant
+
+# Vocabulario de comandos: palabras que aparecen dentro del payload
+# ("MARCHA" in comando, como los simuladores) y valores exactos
+PALABRAS_ON = ("MARCHA", "CLOSE", "START")
+PALABRAS_OFF = ("PARADA", "TRIP", "OPEN", "STOP")
+EXACTOS = {"ON": True, "TRUE": True, "1": True, "OFF": False, "FALSE": False, "0": False}
+
+RANGO_POR_DEFECTO = (0.0, 100.0)
+
+# Métricas de texto sin min/max (perfiles Exemys): valor (activo, inactivo)
+CLAVES_ESTADO = {"estado": ("ON", "OFF"), "status": ("ON", "OFF"), "falla": ("NO", "SI")}
+
+
+def cargar_perfil(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def agrupar_por_topic(widgets):
+    """topic → lista de widgets que lo leen (en orden de aparición)"""
+    grupos = {}
+    for widget in widgets:
+        if widget.get("topic"):
+            grupos.setdefault(widget["topic"], []).append(widget)
+    return grupos
+
+
+def _clave_switch(widget, widgets):
+    """dataKey de un switch; sin dataKey usa "estado" si el topic lo publica,
+    si no el default de SwitchWidget.jsx ("relay1")"""
+    if widget.get("dataKey"):
+        return widget["dataKey"]
+    if any(w.get("dataKey") == "estado" for w in widgets):
+        return "estado"
+    return "relay1"
+
+
+def _valores_texto(widget):
+    """Valores de texto de las reglas de conditionalFormatting (ej: CLOSED/OPEN)"""
+    reglas = (widget.get("customConfig") or {}).get("conditionalFormatting", {}).get("rules", [])
+    return [r["value"] for r in reglas if isinstance(r.get("value"), str)]
+
+
+def _normalizar(payload):
+    """Payload de comando comparable: JSON parseado o texto en mayúsculas"""
+    texto = payload if isinstance(payload, str) else json.dumps(payload)
+    texto = texto.upper().strip()
+    try:
+        return json.loads(texto)
+    except ValueError:
+        return texto
+
+
+def _vocabulario(comando):
+    """True (marcha), False (parada) o None si el comando no se reconoce"""
+    texto = comando if isinstance(comando, str) else json.dumps(comando)
+    if any(p in texto for p in PALABRAS_OFF):
+        return False
+    if any(p in texto for p in PALABRAS_ON):
+        return True
+    return EXACTOS.get(texto)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PRODUCTOR DE PAYLOAD POR TOPIC
+# ═══════════════════════════════════════════════════════════════════════════
+class CampoEstado:
+    """Campo ON/OFF (o CLOSED/OPEN) controlado por comandos"""
+
+    def __init__(self, ruta, valores):
+        self.ruta = ruta
+        if "CLOSED" in valores and "OPEN" in valores:
+            self.valor_on, self.valor_off = "CLOSED", "OPEN"
+        else:
+            self.valor_on, self.valor_off = CLAVES_ESTADO.get(ruta[-1], ("ON", "OFF"))
+        self.activo = True
+
+
+class ProductorTopic(DispositivoVirtual):
+    """Genera el payload de un topic a partir de sus widgets"""
+
+    def __init__(self, topic, widgets, reloj=None, rng=None):
+        super().__init__(topic, None)
+        self.reloj = reloj or RELOJ_REAL
+        self.rng = rng or random  # random.Random(seed) para una corrida reproducible
+        self.numericos = []   # [ruta, min, max, paso, valor]
+        self.estados = {}     # dataKey → CampoEstado
+        vistos = set()
+        for widget in widgets:
+            es_switch = widget["type"] == "switch"
+            clave = _clave_switch(widget, widgets) if es_switch else widget.get("dataKey")
+            if not clave or clave in vistos:
+                continue
+            vistos.add(clave)
+            ruta = tuple(clave.split("."))
+            textos = _valores_texto(widget)
+            sin_rango = "min" not in widget and "max" not in widget
+            if es_switch or textos or (sin_rango and clave in CLAVES_ESTADO):
+                self.estados[clave] = CampoEstado(ruta, textos)
+                continue
+            minimo = float(widget.get("min", RANGO_POR_DEFECTO[0]))
+            maximo = float(widget.get("max", RANGO_POR_DEFECTO[1]))
+            if maximo <= minimo:
+                minimo, maximo = RANGO_POR_DEFECTO
+            valor = self.rng.uniform(minimo + 0.3 * (maximo - minimo), minimo + 0.7 * (maximo - minimo))
+            self.numericos.append([ruta, minimo, maximo, 0.02 * (maximo - minimo), valor])
+
+    @property
+    def en_marcha(self):
+        return all(e.activo for e in self.estados.values()) if self.estados else True
+
+    def actualizar(self):
+        en_marcha = self.en_marcha
+        for campo in self.numericos:
+            _, minimo, maximo, paso, valor = campo
+            if en_marcha:
+                valor += self.rng.uniform(-paso, paso)
+            else:
+                valor = minimo + (valor - minimo) * 0.8
+            campo[4] = min(maximo, max(minimo, valor))
+
+    def _valores(self):
+        data = {}
+        for ruta, _, _, _, valor in self.numericos:
+            _asignar(data, ruta, round(valor, 2))
+        for estado in self.estados.values():
+            _asignar(data, estado.ruta, estado.valor_on if estado.activo else estado.valor_off)
+        return data
+
+    def to_json(self):
+        data = self._valores()
+        data["timestamp"] = self.reloj.now().isoformat()
+        return data
+
+    def valores(self):
+        return (tuple(campo[4] for campo in self.numericos)
+                + tuple(e.activo for e in self.estados.values()))
+
+    def bandas(self, reporte):
+        return ([reporte.banda_perfil(".".join(ruta), minimo, maximo)
+                 for ruta, minimo, maximo, _, _ in self.numericos]
+                + [None] * len(self.estados))
+
+    def muestras(self):
+        return [(self.topic_data, [(".".join(ruta), valor) for ruta, _, _, _, valor in self.numericos])]
+
+    def codificar(self, reloj):
+        # Esquema dinámico: json.dumps de los valores + timestamp compartido del tick
+        cuerpo = json.dumps(self._valores(), separators=(",", ":"))[1:-1]
+        return "{" + cuerpo + ("," if cuerpo else "") + '"timestamp":' + reloj.actual() + "}"
+
+
+def _asignar(data, ruta, valor):
+    for clave in ruta[:-1]:
+        data = data.setdefault(clave, {})
+    data[ruta[-1]] = valor
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# COMANDOS (commandTopic → switches)
+# ═══════════════════════════════════════════════════════════════════════════
+class ComandosPerfil:
+    """Todos los switches que escuchan un mismo commandTopic"""
+
+    def __init__(self):
+        self.switches = []  # (CampoEstado, payload_on, payload_off)
+
+    def agregar(self, estado, widget):
+        if widget.get("commandFormat") == "json":
+            on, off = widget.get("onPayloadJSON"), widget.get("offPayloadJSON")
+        else:
+            on, off = widget.get("onCommand", "MARCHA"), widget.get("offCommand", "PARADA")
+        self.switches.append((estado, _normalizar(on), _normalizar(off)))
+
+    def comando(self, comando):
+        recibido = _normalizar(comando)
+        aplicado = False
+        for estado, on, off in self.switches:
+            if on == off == recibido:
+                valor = _vocabulario(recibido)  # ej: Noja {"cmd": "trip"}
+            elif recibido == on:
+                valor = True
+            elif recibido == off:
+                valor = False
+            else:
+                continue
+            if valor is not None:
+                estado.activo = valor
+                aplicado = True
+        if not aplicado and len(self.switches) == 1:
+            valor = _vocabulario(recibido)
+            if valor is not None:
+                self.switches[0][0].activo = valor
+
+
+def armar_desde_perfil(runtime, perfil, tenant=None, rng=None):
+    """Agrega al runtime los productores y comandos de un perfil (`rng`: random.Random compartido)"""
+    def t(topic):
+        return topic_tenant(topic, tenant) if tenant else topic
+
+    grupos = agrupar_por_topic(perfil.get("widgets", []))
+    productores = {}
+    for topic, widgets in grupos.items():
+        productores[topic] = runtime.agregar(ProductorTopic(t(topic), widgets, runtime.tiempo, rng))
+
+    comandos = {}
+    for widget in perfil.get("widgets", []):
+        if widget.get("type") != "switch" or not widget.get("commandTopic"):
+            continue
+        clave = _clave_switch(widget, grupos[widget["topic"]])
+        estado = productores[widget["topic"]].estados.get(clave)
+        if estado is None:
+            continue
+        topic_cmd = t(widget["commandTopic"])
+        if topic_cmd not in comandos:
+            comandos[topic_cmd] = ComandosPerfil()
+            runtime.registrar_comando(topic_cmd, comandos[topic_cmd])
+        comandos[topic_cmd].agregar(estado, widget)
+    return productores, comandos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("perfil", help="ruta a un perfil JSON del dashboard")
+    parser.add_argument("--copias", type=int, default=1,
+                        help="tenants simulados (1 = topics originales)")
+    argumentos_broker(parser, client_id="Simulador_Perfil")
+    args = parser.parse_args()
+
+    perfil = cargar_perfil(args.perfil)
+    runtime = RuntimeSimulacion(args.broker, args.port, args.user, args.password, args.tls,
+                                args.client_id, args.timestamp,
+                                reloj_desde_args(args.velocidad, args.inicio), args.sonda,
+                                excepcion_desde_args(args), conexiones=args.conexiones,
+                                por_dispositivo=args.por_dispositivo, cola=opciones_cola(args),
+                                planificador=opciones_planificador(args), seed=args.seed,
+                                metricas=metricas_desde_args(args))
+    runtime.activar_rollups(args.rollup)
+    # Física reproducible con --seed: un random.Random para todas las copias
+    rng = random.Random(args.seed)
+    # Tenant base: primer nivel del topic del primer widget que tiene topic
+    base = next((w["topic"].split("/")[0] for w in perfil.get("widgets", []) if w.get("topic")), "perfil")
+    tenant = None
+    for i in range(args.copias):
+        if args.copias > 1:
+            tenant = f"{base}-{i + 1:04d}"
+        armar_desde_perfil(runtime, perfil, tenant, rng)
+    if args.periodo is not None:
+        for dispositivo in runtime.dispositivos:
+            dispositivo.periodo = args.periodo
+    if args.escenario:
+        runtime.inyector.escenario(args.escenario)
+
+    print(f"🚀 Perfil {args.perfil}: {len(runtime.dispositivos):,} topics de telemetría,"
+          f" {len(runtime.router.filtros()):,} topics de comandos")
+    try:
+        asyncio.run(runtime.correr(args.duracion))
+    except KeyboardInterrupt:
+        print("\n🛑 Simulador detenido")
+
+
+if __name__ == "__main__":
+    main()
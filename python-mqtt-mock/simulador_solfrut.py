@@ -10,7 +10,7 @@ CARACTERÍSTICAS:
 - ✅ Simula Motors 4, 5, 6 + Reconectador 101
 - ✅ Control Marcha/Parada con pulsos momentáneos (TODOS LOS MOTORES)
 - ✅ Curvas de corriente realistas
-- ✅ Simulación de fallas aleatorias
+- ✅ Fallas aleatorias por eventos y escenarios con guion (inyector_fallas.py)
 - ✅ Estados basados en entradas digitales (DI)
 
 TOPICS MQTT:
@@ -25,19 +25,25 @@ TOPICS MQTT:
 
 USO:
     python simulador_solfrut.py
+    python simulador_solfrut.py --seed 42 --falla weibull:1.5:3600
+    python simulador_solfrut.py --escenario escenario.txt   # ej "300 TRIP reco1" / "320 FALLA m5"
 
 AUTOR: Claude + Tu Equipo SolFrut
 FECHA: 2025-12-11
 =============================================================================
 """
 
-import paho.mqtt.client as mqtt
-import time
-import random
+import argparse
 import json
-import math
 from datetime import datetime
 
+from codificadores import CODIFICADORES, RelojTick
+from flota import FlotaMotores, VistaMotor, MODELO_SOLFRUT
+from inyector_fallas import InyectorFallas, argumentos_fallas, opciones_fallas
+from planificador import Metronomo
+from publicacion import ColaPublicacion
+from router_comandos import RouterComandos
+
 # ═══════════════════════════════════════════════════════════════════════════
 # CONFIGURACIÓN HIVEMQ CLOUD
 # ═══════════════════════════════════════════════════════════════════════════
@@ -71,16 +77,12 @@ TOPICS = {
 # ═══════════════════════════════════════════════════════════════════════════
 # ESTADO INTERNO DEL SISTEMA
 # ═══════════════════════════════════════════════════════════════════════════
-class MotorState:
-    """Simula un motor con sus entradas/salidas digitales y analógicas"""
-    def __init__(self, name, corriente_nominal, corriente_max):
-        self.name = name
-        self.running = False  # DI (funcionando)
-        self.falla = False    # DI (falla)
-        self.corriente_nominal = corriente_nominal
-        self.corriente_max = corriente_max
-        self.corriente_actual = 0.0
-        self.tiempo_arranque = 0
+class MotorState(VistaMotor):
+    """Simula un motor con sus entradas/salidas digitales y analógicas
+    (vista sobre una fila de `flota_motores`; la física corre en FlotaMotores.paso)"""
+    def __init__(self, name, corriente_nominal, corriente_max, flota_motores):
+        super().__init__(flota_motores, name, corriente_nominal, corriente_max,
+                         modelo=MODELO_SOLFRUT)
         self.do_marcha = False  # DO (salida marcha)
         self.do_parada = False  # DO (salida parada)
         
@@ -89,46 +91,14 @@ class MotorState:
         print(f"   🟢 [{self.name}] DO_MARCHA activado (pulso 500ms)")
         self.do_marcha = True
         self.do_parada = False
-        self.running = True
-        self.tiempo_arranque = time.time()
-        self.falla = False
+        super().arrancar()
         
     def detener(self):
         """Simula pulso en DO_PARADA"""
         print(f"   🔴 [{self.name}] DO_PARADA activado (pulso 500ms)")
         self.do_parada = True
         self.do_marcha = False
-        self.running = False
-        self.corriente_actual = 0.0
-        
-    def simular_falla(self):
-        """Dispara una falla aleatoria (1% de probabilidad cada ciclo)"""
-        if self.running and random.random() < 0.01:
-            self.falla = True
-            self.running = False
-            self.corriente_actual = 0.0
-            print(f"   ⚠️  [{self.name}] ¡FALLA DETECTADA! Motor detenido.")
-            
-    def actualizar_corriente(self):
-        """Simula curva de arranque + operación normal"""
-        if not self.running:
-            self.corriente_actual = 0.0
-            return
-            
-        tiempo_encendido = time.time() - self.tiempo_arranque
-        
-        # FASE 1: Arranque (0-3 seg) - Pico de corriente
-        if tiempo_encendido < 3.0:
-            pico = self.corriente_nominal * 1.8  # 180% nominal
-            self.corriente_actual = pico * (tiempo_encendido / 3.0)
-            
-        # FASE 2: Operación normal con variación
-        else:
-            variacion = random.uniform(-0.05, 0.05)  # ±5%
-            self.corriente_actual = self.corriente_nominal * (1 + variacion)
-            
-        # Limitar al máximo
-        self.corriente_actual = min(self.corriente_actual, self.corriente_max)
+        super().detener()
         
     def to_json(self):
         """Genera payload JSON para MQTT"""
@@ -136,175 +106,200 @@ class MotorState:
             "estado": "ON" if self.running else "OFF",
             "falla": "SI" if self.falla else "NO",
             "corriente": round(self.corriente_actual, 2),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": self.reloj.now().isoformat()
         }
 
-# Instancias de motores
-motores = {
-    "m4": MotorState("MOTOR 4", 22.5, 40.0),  # ✅ AHORA CONTROLABLE
-    "m5": MotorState("MOTOR 5", 15.0, 40.0),  
-    "m6": MotorState("MOTOR 6", 32.0, 50.0)   
-}
 
-# Estado del reconectador
-reconectador = {
-    "cerrado": True  # True=CLOSED, False=TRIP
-}
+class PlantaSolfrut:
+    """Motores 4, 5, 6 + reconectador 101 y sus comandos (sin conexión: ver main)"""
+
+    def __init__(self, flota_motores=None):
+        # Estado físico de todos los motores (struct-of-arrays, ver flota.py)
+        self.flota = flota_motores or FlotaMotores()
+        self.motores = {
+            "m4": MotorState("MOTOR 4", 22.5, 40.0, self.flota),  # ✅ AHORA CONTROLABLE
+            "m5": MotorState("MOTOR 5", 15.0, 40.0, self.flota),
+            "m6": MotorState("MOTOR 6", 32.0, 50.0, self.flota)
+        }
+        self.nombres = {m.indice: m.name for m in self.motores.values()}
+        # Estado del reconectador
+        self.reconectador = {
+            "cerrado": True  # True=CLOSED, False=TRIP
+        }
+
+        # Comandos: topic → {palabra: acción}
+        self.router = RouterComandos()
+        for nombre, motor in self.motores.items():
+            self.router.registrar(TOPICS[nombre]["cmd"], {"MARCHA": motor.arrancar, "PARADA": motor.detener})
+        self.router.registrar(TOPICS["reco"]["cmd"], {
+            "CLOSE": self.cerrar_reconectador, "MARCHA": self.cerrar_reconectador,
+            "TRIP": self.abrir_reconectador, "PARADA": self.abrir_reconectador,
+        })
+
+        # ✅ Motor 4 arranca apagado (ahora se controla remotamente)
+        # self.motores["m4"].arrancar()  # COMENTADO - ahora se controla por MQTT
+
+    def cerrar_reconectador(self):
+        self.reconectador["cerrado"] = True
+        print(f"   🟢 [RECONECTADOR] CLOSE ejecutado")
 
-# ✅ Motor 4 arranca apagado (ahora se controla remotamente)
-# motores["m4"].arrancar()  # COMENTADO - ahora se controla por MQTT
+    def abrir_reconectador(self):
+        self.reconectador["cerrado"] = False
+        # Detener todos los motores al abrir reconectador
+        for motor in self.motores.values():
+            if motor.running:
+                motor.detener()
+        print(f"   🔴 [RECONECTADOR] TRIP ejecutado - Motores detenidos")
+
+    # ───────────────────────────────────────────────────────────────────────
+    # CALLBACKS MQTT
+    # ───────────────────────────────────────────────────────────────────────
+    def on_connect(self, client, userdata, flags, rc, properties=None):
+        """Callback al conectar exitosamente"""
+        if rc == 0:
+            print("=" * 80)
+            print("✅ CONECTADO A HIVEMQ CLOUD")
+            print("=" * 80)
+            print(f"📡 Broker: {BROKER}")
+            print(f"🔐 Usuario: {USERNAME}")
+            print(f"⏰ Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            print("=" * 80)
+
+            # Suscribirse a topics de comandos (✅ INCLUYE M4)
+            client.subscribe([(topic, 0) for topic in self.router.filtros()])
+            print("📥 Suscrito a topics de comandos:")
+            for topic in self.router.filtros():
+                print(f"   - {topic}")
+            print("=" * 80)
+        else:
+            print(f"❌ Fallo en conexión: código {rc}")
+
+    def on_message(self, client, userdata, msg):
+        """Callback al recibir un comando MQTT"""
+        try:
+            comando = msg.payload.decode().upper().strip()
+            topic = msg.topic
+
+            print(f"\n📥 COMANDO RECIBIDO [{datetime.now().strftime('%H:%M:%S')}]")
+            print(f"   Topic: {topic}")
+            print(f"   Payload: {comando}")
+
+            self.router.despachar(topic, comando)
+
+        except Exception as e:
+            print(f"❌ Error procesando comando: {e}")
 
 # ═══════════════════════════════════════════════════════════════════════════
-# CALLBACKS MQTT
+# INICIALIZACIÓN MQTT
 # ═══════════════════════════════════════════════════════════════════════════
-def on_connect(client, userdata, flags, rc, properties=None):
-    """Callback al conectar exitosamente"""
-    if rc == 0:
-        print("=" * 80)
-        print("✅ CONECTADO A HIVEMQ CLOUD")
-        print("=" * 80)
-        print(f"📡 Broker: {BROKER}")
-        print(f"🔐 Usuario: {USERNAME}")
-        print(f"⏰ Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 80)
-        
-        # Suscribirse a topics de comandos (✅ INCLUYE M4)
-        client.subscribe([
-            (TOPICS["m4"]["cmd"], 0),  # ✅ NUEVO
-            (TOPICS["m5"]["cmd"], 0),
-            (TOPICS["m6"]["cmd"], 0),
-            (TOPICS["reco"]["cmd"], 0)
-        ])
-        print("📥 Suscrito a topics de comandos:")
-        print(f"   - {TOPICS['m4']['cmd']}")  # ✅ NUEVO
-        print(f"   - {TOPICS['m5']['cmd']}")
-        print(f"   - {TOPICS['m6']['cmd']}")
-        print(f"   - {TOPICS['reco']['cmd']}")
-        print("=" * 80)
-    else:
-        print(f"❌ Fallo en conexión: código {rc}")
-
-def on_message(client, userdata, msg):
-    """Callback al recibir un comando MQTT"""
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    argumentos_fallas(parser)
+    args = parser.parse_args()
+
+    import paho.mqtt.client as mqtt
+
+    planta = PlantaSolfrut()
+    flota, motores, nombres = planta.flota, planta.motores, planta.nombres
+    reconectador = planta.reconectador
+    # Codificador precompilado (orden de campos fijo) y timestamp por ciclo
+    codificador_motor = CODIFICADORES["motor_solfrut"]
+    reloj = RelojTick()
+
+    # Fallas sorteadas por eventos + guion opcional sobre m4/m5/m6/reco1
+    inyector = InyectorFallas(seed=args.seed)
+    falla, rearme = opciones_fallas(args)
+    inyector.registrar_flota(flota, falla=falla, rearme=rearme)
+    for nombre, motor in motores.items():
+        inyector.registrar(nombre, {"MARCHA": motor.arrancar, "PARADA": motor.detener,
+                                    "FALLA": motor.fallar})
+    inyector.registrar("reco1", {"CLOSE": planta.cerrar_reconectador, "TRIP": planta.abrir_reconectador,
+                                 "OPEN": planta.abrir_reconectador})
+    if args.escenario:
+        inyector.escenario(args.escenario)
+
+    print("\n🚀 Iniciando Simulador Exemys SolFrut...")
+    print(f"🔌 Conectando a {BROKER}:{PORT}...\n")
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, "Exemys_Simulator_SolFrut")
+    client.username_pw_set(USERNAME, PASSWORD)
+    client.tls_set()  # Habilitar SSL/TLS
+    client.on_connect = planta.on_connect
+    client.on_message = planta.on_message
+    # Cola acotada: con el enlace lento sale la última lectura de cada topic, no una fila de viejas
+    publicador = ColaPublicacion(client, capacidad=len(TOPICS), politica="coalescer")
+
     try:
-        comando = msg.payload.decode().upper().strip()
-        topic = msg.topic
-        
-        print(f"\n📥 COMANDO RECIBIDO [{datetime.now().strftime('%H:%M:%S')}]")
-        print(f"   Topic: {topic}")
-        print(f"   Payload: {comando}")
-        
-        # ───────────────────────────────────────────────────────────────────
-        # MOTOR 4 - COMANDOS ✅ NUEVO
-        # ───────────────────────────────────────────────────────────────────
-        if topic == TOPICS["m4"]["cmd"]:
-            if "MARCHA" in comando:
-                motores["m4"].arrancar()
-            elif "PARADA" in comando:
-                motores["m4"].detener()
-                
-        # ───────────────────────────────────────────────────────────────────
-        # MOTOR 5 - COMANDOS
-        # ───────────────────────────────────────────────────────────────────
-        elif topic == TOPICS["m5"]["cmd"]:
-            if "MARCHA" in comando:
-                motores["m5"].arrancar()
-            elif "PARADA" in comando:
-                motores["m5"].detener()
-                
-        # ───────────────────────────────────────────────────────────────────
-        # MOTOR 6 - COMANDOS
-        # ───────────────────────────────────────────────────────────────────
-        elif topic == TOPICS["m6"]["cmd"]:
-            if "MARCHA" in comando:
-                motores["m6"].arrancar()
-            elif "PARADA" in comando:
-                motores["m6"].detener()
-                
-        # ───────────────────────────────────────────────────────────────────
-        # RECONECTADOR - COMANDOS
-        # ───────────────────────────────────────────────────────────────────
-        elif topic == TOPICS["reco"]["cmd"]:
-            if "CLOSE" in comando or "MARCHA" in comando:
-                reconectador["cerrado"] = True
-                print(f"   🟢 [RECONECTADOR] CLOSE ejecutado")
-            elif "TRIP" in comando or "PARADA" in comando:
-                reconectador["cerrado"] = False
-                # Detener todos los motores al abrir reconectador
-                for motor in motores.values():
-                    if motor.running:
-                        motor.detener()
-                print(f"   🔴 [RECONECTADOR] TRIP ejecutado - Motores detenidos")
-                
+        client.connect(BROKER, PORT, 60)
+        client.loop_start()
+
+        # ═══════════════════════════════════════════════════════════════════════
+        # LOOP PRINCIPAL - SIMULACIÓN
+        # ═══════════════════════════════════════════════════════════════════════
+        ciclo = 0
+        metronomo = Metronomo(2)  # fecha límite absoluta: el trabajo no suma deriva
+        inyector.iniciar()
+        print("🔄 Entrando en loop de simulación (Ctrl+C para detener)...\n")
+
+        while True:
+            ciclo += 1
+            timestamp = datetime.now().strftime('%H:%M:%S')
+
+            # ───────────────────────────────────────────────────────────────────
+            # ACTUALIZAR ESTADO DE CADA MOTOR
+            # ───────────────────────────────────────────────────────────────────
+            ts = reloj.tick()
+            flota.paso()
+
+            # Fallas sorteadas (por defecto media 200 s = 1% por ciclo) y eventos del guion
+            for evento in inyector.avanzar():
+                if evento.objetivo is not None:
+                    print(f"   🎬 [t+{evento.t - inyector.t0:.0f}s] {evento.accion} {evento.objetivo}")
+                elif evento.accion == "FALLA":
+                    for idx in evento.indice.tolist():
+                        print(f"   ⚠️  [{nombres[idx]}] ¡FALLA DETECTADA! Motor detenido.")
+
+            for motor_id, motor in motores.items():
+                # Publicar telemetría
+                payload = codificador_motor.codificar(motor, ts)
+                publicador.publicar(TOPICS[motor_id]["data"], payload)
+
+            # ───────────────────────────────────────────────────────────────────
+            # RECONECTADOR
+            # ───────────────────────────────────────────────────────────────────
+            reco_payload = json.dumps({
+                "estado": "ON" if reconectador["cerrado"] else "OFF",
+                "timestamp": datetime.fromtimestamp(reloj.ahora).isoformat()
+            })
+            publicador.publicar(TOPICS["reco"]["data"], reco_payload)
+
+            # ───────────────────────────────────────────────────────────────────
+            # LOG EN CONSOLA (cada 5 ciclos para no saturar)
+            # ───────────────────────────────────────────────────────────────────
+            if ciclo % 5 == 0:
+                print(f"[{timestamp}] Ciclo #{ciclo}")
+                print(f"   M4: {motores['m4'].corriente_actual:5.2f}A | Estado: {motores['m4'].running}")
+                print(f"   M5: {motores['m5'].corriente_actual:5.2f}A | Estado: {motores['m5'].running}")
+                print(f"   M6: {motores['m6'].corriente_actual:5.2f}A | Estado: {motores['m6'].running}")
+                print(f"   Reco: {'CLOSED' if reconectador['cerrado'] else 'TRIP'}")
+                print(f"   Publicación: {publicador.resumen()}")
+                print(f"   {inyector.resumen()}")
+                print()
+
+            metronomo.esperar()  # Publicar cada 2 segundos
+
+    except KeyboardInterrupt:
+        print("\n\n🛑 Simulación detenida por usuario")
+        client.loop_stop()
+        client.disconnect()
+        print("✅ Desconexión limpia. ¡Hasta luego!")
+
     except Exception as e:
-        print(f"❌ Error procesando comando: {e}")
+        print(f"\n❌ ERROR CRÍTICO: {e}")
+        client.loop_stop()
+        client.disconnect()
 
-# ═══════════════════════════════════════════════════════════════════════════
-# INICIALIZACIÓN MQTT
-# ═══════════════════════════════════════════════════════════════════════════
-print("\n🚀 Iniciando Simulador Exemys SolFrut...")
-print(f"🔌 Conectando a {BROKER}:{PORT}...\n")
-
-client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, "Exemys_Simulator_SolFrut")
-client.username_pw_set(USERNAME, PASSWORD)
-client.tls_set()  # Habilitar SSL/TLS
-client.on_connect = on_connect
-client.on_message = on_message
-
-try:
-    client.connect(BROKER, PORT, 60)
-    client.loop_start()
-    
-    # ═══════════════════════════════════════════════════════════════════════
-    # LOOP PRINCIPAL - SIMULACIÓN
-    # ═══════════════════════════════════════════════════════════════════════
-    ciclo = 0
-    print("🔄 Entrando en loop de simulación (Ctrl+C para detener)...\n")
-    
-    while True:
-        ciclo += 1
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        
-        # ───────────────────────────────────────────────────────────────────
-        # ACTUALIZAR ESTADO DE CADA MOTOR
-        # ───────────────────────────────────────────────────────────────────
-        for motor_id, motor in motores.items():
-            motor.actualizar_corriente()
-            motor.simular_falla()
-            
-            # Publicar telemetría
-            payload = json.dumps(motor.to_json())
-            client.publish(TOPICS[motor_id]["data"], payload)
-            
-        # ───────────────────────────────────────────────────────────────────
-        # RECONECTADOR
-        # ───────────────────────────────────────────────────────────────────
-        reco_payload = json.dumps({
-            "estado": "ON" if reconectador["cerrado"] else "OFF",
-            "timestamp": datetime.now().isoformat()
-        })
-        client.publish(TOPICS["reco"]["data"], reco_payload)
-        
-        # ───────────────────────────────────────────────────────────────────
-        # LOG EN CONSOLA (cada 5 ciclos para no saturar)
-        # ───────────────────────────────────────────────────────────────────
-        if ciclo % 5 == 0:
-            print(f"[{timestamp}] Ciclo #{ciclo}")
-            print(f"   M4: {motores['m4'].corriente_actual:5.2f}A | Estado: {motores['m4'].running}")
-            print(f"   M5: {motores['m5'].corriente_actual:5.2f}A | Estado: {motores['m5'].running}")
-            print(f"   M6: {motores['m6'].corriente_actual:5.2f}A | Estado: {motores['m6'].running}")
-            print(f"   Reco: {'CLOSED' if reconectador['cerrado'] else 'TRIP'}")
-            print()
-        
-        time.sleep(2)  # Publicar cada 2 segundos
-        
-except KeyboardInterrupt:
-    print("\n\n🛑 Simulación detenida por usuario")
-    client.loop_stop()
-    client.disconnect()
-    print("✅ Desconexión limpia. ¡Hasta luego!")
-
-except Exception as e:
-    print(f"\n❌ ERROR CRÍTICO: {e}")
-    client.loop_stop()
-    client.disconnect()
\ No newline at end of file
+
+if __name__ == "__main__":
+    main()
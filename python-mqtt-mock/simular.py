@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+SIMULAR - PUNTO DE ENTRADA ÚNICO PARA LOS ESCENARIOS
+=============================================================================
+Un solo comando y un solo proceso para cualquier combinación de escenarios
+(bombeo, bombeo_full, solfrut, cocacola): todos corren en el mismo
+RuntimeSimulacion (runtime_async.py), con una rueda de tiempos y un pool
+MQTT compartidos.
+
+- ✅ Escenario sin cantidad → una planta en los topics del script original
+       (drop-in para los dashboards); `escenario=N` con N > 1 → N plantas
+       con tenant <escenario>-0001, <escenario>-0002...
+- ✅ Mismas opciones que runtime_async.py (broker, reloj virtual, --lote,
+       --binario, rollups, fallas, planificador)
+- ✅ Imports perezosos: paho se importa al conectar al broker y
+       NumPy sólo si hay motores (solfrut / cocacola); bombeo no lo carga
+- ✅ --arranque: benchmark de arranque en procesos nuevos, sin broker:
+       intérprete + imports, armado de plantas y primer tick (codificar y
+       encolar cada dispositivo); todos los escenarios en un proceso vs un
+       proceso por escenario, mediana de --repeticiones
+
+Los scripts de cada escenario (bombeo.py, simulador_solfrut.py...) siguen
+andando solos; importarlos ya no conecta ni arranca loops.
+
+USO:
+    python simular.py bombeo_full solfrut cocacola
+    python simular.py bombeo=500 solfrut=100 cocacola=20 --velocidad max --duracion 3600
+    python simular.py solfrut --broker <host> --port 8883 --tls --user U --password P
+    python simular.py --arranque                      # los 4 escenarios
+    python simular.py --arranque bombeo solfrut=100 --repeticiones 10
+
+=============================================================================
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+ESCENARIOS = ("bombeo", "bombeo_full", "solfrut", "cocacola")
+
+
+def escenario(texto):
+    """"solfrut" → ("solfrut", None); "solfrut=100" → ("solfrut", 100)"""
+    nombre, _, cantidad = texto.partition("=")
+    if nombre not in ESCENARIOS:
+        raise argparse.ArgumentTypeError(f"escenario desconocido {nombre} (usar {', '.join(ESCENARIOS)})")
+    try:
+        return nombre, int(cantidad) if cantidad else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"cantidad inválida en {texto}")
+
+
+def parser_argumentos(argumentos_broker):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("escenarios", nargs="*", type=escenario, metavar="escenario[=N]",
+                        help=f"{', '.join(ESCENARIOS)}; sin N: una planta en los topics originales")
+    argumentos_broker(parser)
+    parser.add_argument("--lote", action="store_true",
+                        help="un mensaje por planta por tick (<tenant>/planta/lote)")
+    parser.add_argument("--binario", action="store_true",
+                        help="payloads binarios con registro de esquemas (binario.py); excluye --lote")
+    parser.add_argument("--arranque", action="store_true",
+                        help="benchmark de tiempo de arranque (sin broker)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="corridas del benchmark")
+    parser.add_argument("--arranque-hijo", type=float, help=argparse.SUPPRESS)
+    return parser
+
+
+def aplicar_escenarios(args):
+    """Cantidades por escenario en los atributos de armar_runtime (--solfrut, --bombeo-full...)"""
+    args.originales = True  # sólo aplica a los escenarios con una planta
+    for nombre in ESCENARIOS:
+        setattr(args, nombre, 0)
+    for nombre, cantidad in args.escenarios:
+        setattr(args, nombre, getattr(args, nombre) + (1 if cantidad is None else cantidad))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BENCHMARK DE ARRANQUE
+# ═══════════════════════════════════════════════════════════════════════════
+def _medir_hijo(args, armar_runtime, t_main, t_imports):
+    """Proceso hijo: armado + primer tick sin conectar; una línea JSON con los instantes"""
+    runtime = armar_runtime(args)
+    t_armado = time.time()
+    for dispositivo in runtime.dispositivos:
+        dispositivo.tarea(runtime)()  # codifica y encola (sin broker queda en la cola)
+    t_tick = time.time()
+    print(json.dumps({
+        "main": t_main - args.arranque_hijo, "imports": t_imports - t_main,
+        "armado": t_armado - t_imports, "tick": t_tick - t_armado,
+        "total": t_tick - args.arranque_hijo, "dispositivos": len(runtime.dispositivos),
+        "numpy": "numpy" in sys.modules, "paho": "paho.mqtt.client" in sys.modules,
+    }))
+
+
+def _lanzar(especificaciones):
+    """Un proceso nuevo por lista de escenarios, todos a la vez; mediciones de cada uno"""
+    procesos = []
+    for escenarios in especificaciones:
+        t = time.time()
+        procesos.append(subprocess.Popen([sys.executable, __file__, "--arranque-hijo", repr(t), *escenarios],
+                                         stdout=subprocess.PIPE, text=True))
+    resultados = []
+    for proceso in procesos:
+        salida, _ = proceso.communicate()
+        if proceso.returncode:
+            raise RuntimeError(f"el proceso de arranque terminó con código {proceso.returncode}")
+        resultados.append(json.loads(salida.strip().splitlines()[-1]))
+    return resultados
+
+
+def benchmark_arranque(args):
+    textos = [nombre if n is None else f"{nombre}={n}" for nombre, n in args.escenarios] or list(ESCENARIOS)
+    print(f"⏱️ Arranque (sin broker): {' '.join(textos)} | {args.repeticiones} repeticiones | mediana")
+    print("-" * 96)
+    print(f"{'modo':<28} | {'intérprete':>10} | {'imports':>8} | {'armado':>8} | {'1er tick':>8}"
+          f" | {'total':>8} | {'NumPy':>5} | {'paho':>4}")
+    print("-" * 96)
+    modos = [("juntos (1 proceso)", [textos])]
+    if len(textos) > 1:
+        modos.append((f"separados ({len(textos)} procesos)", [[t] for t in textos]))
+        modos += [(f"  {t}", [[t]]) for t in textos]
+    for nombre, especificaciones in modos:
+        corridas = [_lanzar(especificaciones) for _ in range(args.repeticiones)]
+        # Separados: listo cuando termina el último proceso
+        mediana = {clave: statistics.median(max(r[clave] for r in corrida) if clave == "total"
+                                             else sum(r[clave] for r in corrida)
+                                             for corrida in corridas)
+                   for clave in ("main", "imports", "armado", "tick", "total")}
+        numpy = any(r["numpy"] for r in corridas[0])
+        paho = any(r["paho"] for r in corridas[0])
+        print(f"{nombre:<28} | {mediana['main'] * 1000:>7.1f} ms | {mediana['imports'] * 1000:>5.1f} ms"
+              f" | {mediana['armado'] * 1000:>5.1f} ms | {mediana['tick'] * 1000:>5.1f} ms"
+              f" | {mediana['total'] * 1000:>5.1f} ms | {'sí' if numpy else 'no':>5} | {'sí' if paho else 'no':>4}")
+    print("-" * 96)
+    print("separados: intérprete / imports / armado / tick sumados (CPU), total = el último en quedar listo")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MAIN
+# ═══════════════════════════════════════════════════════════════════════════
+def main():
+    t_main = time.time()
+    import asyncio
+
+    from runtime_async import argumentos_broker, armar_runtime, validar_argumentos
+    t_imports = time.time()
+
+    parser = parser_argumentos(argumentos_broker)
+    args = parser.parse_args()
+    if args.arranque:
+        benchmark_arranque(args)
+        return
+    if not args.escenarios:
+        parser.error(f"indicar al menos un escenario ({', '.join(ESCENARIOS)})")
+    aplicar_escenarios(args)
+    if args.arranque_hijo is not None:
+        args.originales = False  # con tenants: bombeo y bombeo_full comparten los topics de la bomba
+        _medir_hijo(args, armar_runtime, t_main, t_imports)
+        return
+    validar_argumentos(parser, args)
+
+    runtime = armar_runtime(args)
+    resumen = ", ".join(f"{getattr(args, nombre)} {nombre}" for nombre in ESCENARIOS if getattr(args, nombre))
+    print(f"🚀 {resumen}: {len(runtime.dispositivos):,} dispositivos en un proceso")
+    try:
+        asyncio.run(runtime.correr(args.duracion))
+    except KeyboardInterrupt:
+        print("\n🛑 Simulación detenida")
+
+
+if __name__ == "__main__":
+    main()
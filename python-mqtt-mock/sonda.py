@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+SONDA DE LATENCIA / PÉRDIDA / REORDEN EXTREMO A EXTREMO
+=============================================================================
+Emisor (runtime con --sonda): agrega al final de cada payload JSON un
+número de secuencia por topic y la hora monotónica de envío, junto al
+`timestamp` existente:
+
+    {..., "timestamp": "...", "seq": 1532, "t_envio": 81234.551203}
+
+Receptor (monitor_mqtt.py --latencia): por topic calcula latencia
+(t_recepcion - t_envio), huecos en la secuencia (pérdida) y mensajes fuera
+de orden, y publica percentiles p50/p95/p99 por ventana móvil. Un mensaje
+que llega tarde cuenta sólo como fuera de orden: un seq faltante se da por
+perdido al cerrar la ventana siguiente a la del hueco si no llegó.
+
+time.monotonic() es del sistema (no del proceso): emisor y analizador deben
+correr en la MISMA máquina. El broker puede estar en cualquier lado (broker
+local o HiveMQ Cloud): la latencia medida es el ida y vuelta al broker.
+
+=============================================================================
+"""
+
+import re
+import threading
+import time
+from datetime import datetime
+
+_CAMPOS = re.compile(rb'"seq":(\d+),"t_envio":([0-9.]+)\}$')
+
+
+def percentil(ordenados, p):
+    """Percentil (0-100) de una lista ya ordenada, por rango más cercano"""
+    if not ordenados:
+        return float("nan")
+    i = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[i]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EMISOR
+# ═══════════════════════════════════════════════════════════════════════════
+class SondaEnvio:
+    """Numera los payloads de cada topic y les agrega la hora de envío"""
+
+    def __init__(self):
+        self.secuencias = {}
+
+    def marcar(self, topic, payload):
+        if not isinstance(payload, str) or not payload.endswith("}"):
+            return payload  # payload de texto o binario: sin sonda
+        seq = self.secuencias.get(topic, 0) + 1
+        self.secuencias[topic] = seq
+        separador = "," if len(payload) > 2 else ""
+        return '%s%s"seq":%d,"t_envio":%.6f}' % (payload[:-1], separador, seq, time.monotonic())
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ANALIZADOR
+# ═══════════════════════════════════════════════════════════════════════════
+MAX_FALTANTES = 4096  # seqs faltantes recordados por topic (un hueco más grande se da por perdido)
+
+
+class EstadoTopic:
+    """Secuencia de un topic. Un seq faltante espera en `faltantes` (y después
+    en `pendientes`) por si llega tarde: cuenta como perdido recién si sigue
+    faltando al cerrar la ventana siguiente a la del hueco"""
+    __slots__ = ("ultimo_seq", "latencias", "huecos", "desordenados", "duplicados",
+                 "recibidos", "reinicios", "faltantes", "pendientes")
+
+    def __init__(self):
+        self.ultimo_seq = 0
+        self.latencias = []
+        self.huecos = self.desordenados = self.duplicados = 0
+        self.recibidos = self.reinicios = 0
+        self.faltantes = set()  # huecos de esta ventana
+        self.pendientes = set()  # huecos de la ventana anterior
+
+    def hueco(self, desde, hasta):
+        """seqs [desde, hasta) no recibidos todavía"""
+        if hasta - desde > MAX_FALTANTES:
+            self.huecos += hasta - desde - MAX_FALTANTES
+            desde = hasta - MAX_FALTANTES
+        self.faltantes.update(range(desde, hasta))
+
+    def llego_tarde(self, seq):
+        """True si `seq` estaba en un hueco (reorden, no pérdida ni duplicado)"""
+        for faltantes in (self.faltantes, self.pendientes):
+            if seq in faltantes:
+                faltantes.discard(seq)
+                return True
+        return False
+
+    def dar_por_perdidos(self):
+        """Cierre de ventana: los huecos de la ventana anterior que no llegaron"""
+        self.huecos += len(self.pendientes)
+        self.pendientes, self.faltantes = self.faltantes, set()
+
+    def nueva_ventana(self):
+        self.latencias = []
+        self.huecos = self.desordenados = self.duplicados = 0
+        self.recibidos = self.reinicios = 0
+
+
+class AnalizadorSonda:
+    """Latencia, pérdida y reorden por topic en ventanas de `ventana` segundos"""
+
+    def __init__(self, ventana=10.0):
+        self.ventana = ventana
+        self.topics = {}
+        self.sin_sonda = 0
+        self.inicio_ventana = time.monotonic()
+        self._lock = threading.Lock()
+
+    def registrar(self, topic, payload, t_rx=None):
+        """Hot path (thread de red): un regex sobre el final del payload"""
+        t_rx = time.monotonic() if t_rx is None else t_rx
+        m = _CAMPOS.search(payload, max(0, len(payload) - 48))
+        if m is None:
+            self.sin_sonda += 1
+            return
+        seq, t_envio = int(m.group(1)), float(m.group(2))
+        with self._lock:
+            estado = self.topics.get(topic)
+            if estado is None:
+                estado = self.topics[topic] = EstadoTopic()
+            estado.recibidos += 1
+            estado.latencias.append(t_rx - t_envio)
+            esperado = estado.ultimo_seq + 1
+            if seq == esperado or estado.ultimo_seq == 0:
+                estado.ultimo_seq = seq
+            elif seq > esperado:
+                estado.hueco(esperado, seq)
+                estado.ultimo_seq = seq
+            elif estado.llego_tarde(seq):
+                estado.desordenados += 1
+            elif seq == 1:
+                # El emisor se reinició: lo que faltaba de la secuencia anterior ya no llega
+                estado.reinicios += 1
+                estado.huecos += len(estado.faltantes) + len(estado.pendientes)
+                estado.faltantes, estado.pendientes = set(), set()
+                estado.ultimo_seq = seq
+            else:
+                estado.duplicados += 1  # ya recibido (el último o uno anterior)
+
+    def cerrar_ventana(self):
+        """Resumen de la ventana actual (global + por topic) y arranca otra"""
+        with self._lock:
+            ahora = time.monotonic()
+            duracion = ahora - self.inicio_ventana
+            self.inicio_ventana = ahora
+            por_topic = []
+            todas = []
+            for topic, estado in self.topics.items():
+                estado.dar_por_perdidos()
+                if not estado.recibidos and not estado.huecos:
+                    continue
+                latencias = sorted(estado.latencias)
+                todas.extend(latencias)
+                por_topic.append({
+                    "topic": topic,
+                    "recibidos": estado.recibidos,
+                    "p50": percentil(latencias, 50),
+                    "p95": percentil(latencias, 95),
+                    "p99": percentil(latencias, 99),
+                    "perdidos": estado.huecos,
+                    "desordenados": estado.desordenados,
+                    "duplicados": estado.duplicados,
+                    "reinicios": estado.reinicios,
+                })
+                estado.nueva_ventana()
+        todas.sort()
+        return {
+            "duracion": duracion,
+            "recibidos": sum(t["recibidos"] for t in por_topic),
+            "p50": percentil(todas, 50),
+            "p95": percentil(todas, 95),
+            "p99": percentil(todas, 99),
+            "perdidos": sum(t["perdidos"] for t in por_topic),
+            "desordenados": sum(t["desordenados"] for t in por_topic),
+            "topics": por_topic,
+        }
+
+    @staticmethod
+    def imprimir(resumen, top=10):
+        ms = 1000
+        esperados = resumen["recibidos"] + resumen["perdidos"]
+        perdida = resumen["perdidos"] / esperados * 100 if esperados else 0.0
+        print(f"\n[{datetime.now():%H:%M:%S}] ⏱️  {resumen['recibidos']:,} msgs en "
+              f"{resumen['duracion']:.1f} s | p50 {resumen['p50'] * ms:.1f} ms"
+              f" | p95 {resumen['p95'] * ms:.1f} ms | p99 {resumen['p99'] * ms:.1f} ms"
+              f" | perdidos {resumen['perdidos']} ({perdida:.2f}%)"
+              f" | fuera de orden {resumen['desordenados']}")
+        if not resumen["topics"]:
+            return
+        print(f"   {'TOPIC':<48} {'MSGS':>6} {'P50 ms':>8} {'P95 ms':>8} {'P99 ms':>8}"
+              f" {'PERD':>5} {'DESORD':>6}")
+        peores = sorted(resumen["topics"], key=lambda t: t["p99"] if t["recibidos"] else 0.0,
+                        reverse=True)[:top]
+        for t in peores:
+            print(f"   {t['topic'][-48:]:<48} {t['recibidos']:>6} {t['p50'] * ms:>8.1f}"
+                  f" {t['p95'] * ms:>8.1f} {t['p99'] * ms:>8.1f} {t['perdidos']:>5}"
+                  f" {t['desordenados']:>6}")
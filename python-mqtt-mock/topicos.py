@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+=============================================================================
+ÁRBOL DE FILTROS MQTT (TRIE POR NIVELES DE TOPIC)
+=============================================================================
+Guarda valores asociados a filtros MQTT ("a/+/c", "a/#") y resuelve qué
+valores corresponden a un topic concreto recorriendo sólo los niveles del
+topic, sin comparar contra cada filtro:
+
+- ✅ Comodines `+` (un nivel) y `#` (cero o más niveles, sólo al final)
+- ✅ Topics que empiezan con `$` no coinciden con comodines del primer nivel
+- ✅ Cache topic → resultado, invalidada al agregar/quitar filtros
+
+USO:
+    arbol = ArbolTopics()
+    arbol.agregar("solfrut/+/m4/comandos", destino)
+    arbol.buscar("solfrut/motores/m4/comandos")   # {destino: None}
+
+=============================================================================
+"""
+
+
+class _Nodo:
+    __slots__ = ("hijos", "valores")
+
+    def __init__(self):
+        self.hijos = {}
+        self.valores = {}  # valor → dato (ej: sesión → qos)
+
+
+def validar_filtro(filtro):
+    """True si el filtro cumple las reglas de comodines de MQTT 3.1.1"""
+    if not filtro:
+        return False
+    niveles = filtro.split("/")
+    for i, nivel in enumerate(niveles):
+        if nivel == "#" and i != len(niveles) - 1:
+            return False
+        if nivel not in ("+", "#") and ("+" in nivel or "#" in nivel):
+            return False
+    return True
+
+
+def coincide(filtro, topic):
+    """Comparación directa de un filtro contra un topic (sin árbol)"""
+    arbol = ArbolTopics()
+    arbol.agregar(filtro, True)
+    return bool(arbol.buscar(topic))
+
+
+class ArbolTopics:
+    """Filtros MQTT → {valor: dato}; buscar(topic) une los de todos los filtros que coinciden"""
+
+    def __init__(self, combinar=None, max_cache=100_000):
+        self.raiz = _Nodo()
+        self.filtros = 0
+        self.combinar = combinar  # ej: max → mayor QoS si varios filtros coinciden
+        self.max_cache = max_cache
+        self._cache = {}
+
+    def agregar(self, filtro, valor, dato=None):
+        nodo = self.raiz
+        for nivel in filtro.split("/"):
+            hijo = nodo.hijos.get(nivel)
+            if hijo is None:
+                hijo = nodo.hijos[nivel] = _Nodo()
+            nodo = hijo
+        if valor not in nodo.valores:
+            self.filtros += 1
+        nodo.valores[valor] = dato
+        self._cache.clear()
+
+    def quitar(self, filtro, valor):
+        """Quita `valor` del filtro; poda los nodos que quedan vacíos"""
+        camino = [self.raiz]
+        for nivel in filtro.split("/"):
+            nodo = camino[-1].hijos.get(nivel)
+            if nodo is None:
+                return False
+            camino.append(nodo)
+        if camino[-1].valores.pop(valor, _AUSENTE) is _AUSENTE:
+            return False
+        self.filtros -= 1
+        for nivel, (padre, nodo) in zip(reversed(filtro.split("/")),
+                                         reversed(list(zip(camino, camino[1:])))):
+            if nodo.hijos or nodo.valores:
+                break
+            del padre.hijos[nivel]
+        self._cache.clear()
+        return True
+
+    def quitar_valor(self, valor):
+        """Quita `valor` de todos los filtros (ej: sesión desconectada)"""
+        filtros = [f for f, v in self.items() if v is valor]
+        for filtro in filtros:
+            self.quitar(filtro, valor)
+        return filtros
+
+    def items(self):
+        """(filtro, valor) de todo el árbol"""
+        pila = [(self.raiz, [])]
+        while pila:
+            nodo, niveles = pila.pop()
+            for valor in nodo.valores:
+                yield "/".join(niveles), valor
+            for nivel, hijo in nodo.hijos.items():
+                pila.append((hijo, niveles + [nivel]))
+
+    def buscar(self, topic):
+        """{valor: dato} de los filtros que coinciden con `topic` (cacheado)"""
+        resultado = self._cache.get(topic)
+        if resultado is None:
+            if len(self._cache) >= self.max_cache:
+                self._cache.clear()
+            resultado = self._cache[topic] = self._buscar(topic)
+        return resultado
+
+    def _unir(self, resultado, valores):
+        if self.combinar is None:
+            resultado.update(valores)
+            return
+        for valor, dato in valores.items():
+            previo = resultado.get(valor, _AUSENTE)
+            resultado[valor] = dato if previo is _AUSENTE else self.combinar(previo, dato)
+
+    def _buscar(self, topic):
+        resultado = {}
+        niveles = topic.split("/")
+        sistema = topic.startswith("$")
+        pendientes = [(self.raiz, 0)]
+        while pendientes:
+            nodo, i = pendientes.pop()
+            comodines = not (sistema and i == 0)
+            todo = nodo.hijos.get("#") if comodines else None
+            if todo is not None:
+                self._unir(resultado, todo.valores)
+            if i == len(niveles):
+                self._unir(resultado, nodo.valores)
+                continue
+            hijo = nodo.hijos.get(niveles[i])
+            if hijo is not None:
+                pendientes.append((hijo, i + 1))
+            hijo = nodo.hijos.get("+") if comodines else None
+            if hijo is not None:
+                pendientes.append((hijo, i + 1))
+        return resultado
+
+
+_AUSENTE = object()